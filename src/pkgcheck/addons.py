@@ -1,14 +1,26 @@
 """Addon functionality shared by multiple checkers."""
 
+import hashlib
+import mmap
+import multiprocessing
 import os
+import re
+import signal
 import stat
-from collections import defaultdict
+import sys
+import time
+from bisect import bisect_right
+from collections import OrderedDict, defaultdict
 from functools import partial
-from itertools import chain, filterfalse
+from itertools import accumulate, chain, filterfalse
+from typing import NamedTuple
 
-from pkgcore.ebuild import domain, misc
+from pkgcore.ebuild import cpv, domain, misc
 from pkgcore.ebuild import profiles as profiles_mod
+from pkgcore.ebuild.atom import atom as atom_cls
+from pkgcore.package.errors import MetadataException
 from pkgcore.restrictions import packages, values
+from snakeoil.cli import arghparse
 from snakeoil.cli.exceptions import UserException
 from snakeoil.containers import ProtectedSet
 from snakeoil.decorators import coroutine
@@ -19,8 +31,11 @@ from snakeoil.sequences import iflatten_instance
 from snakeoil.strings import pluralism
 from tree_sitter import Language, Parser
 
-from . import base, caches, const, results
+from . import base, caches, results
+from .eclass import EclassAddon
 from .log import logger
+from .packages import FileContent
+from .tracing import get_tracer
 
 
 class ArchesAddon(base.Addon):
@@ -68,6 +83,59 @@ class ArchesAddon(base.Addon):
         namespace.arches = tuple(sorted(arches))
 
 
+class VisibilityVerdicts:
+    """Lossy hash table of profile visibility verdicts stored in shared memory.
+
+    The table is backed by an anonymous shared memory mapping that is
+    inherited by forked worker processes, allowing dependencies solved in one
+    process to be reused by the others without any locking. Each slot stores
+    a key fingerprint alongside its verdict. Since the verdict for a given key
+    never changes, racing writes are harmless and entries are dropped when
+    their probe sequence is full.
+    """
+
+    VISIBLE = 1
+    INSOLUBLE = 2
+
+    # number of 64-bit table slots, pages are only allocated when used
+    _slots = 1 << 21
+    # number of slots checked for each key via linear probing
+    _probes = 8
+    _mask = (1 << 64) - 1
+
+    def __init__(self):
+        self._mmap = mmap.mmap(-1, self._slots * 8)
+        self._table = memoryview(self._mmap).cast('Q')
+
+    def _slot_range(self, key):
+        """Return the fingerprint and probed slot indices for a given key."""
+        h = hash(key) & self._mask
+        # the lowest two bits store the verdict, the highest marks used slots
+        fingerprint = (h | 1 << 63) & ~3 & self._mask
+        start = h % self._slots
+        return fingerprint, (
+            (start + i) % self._slots for i in range(self._probes))
+
+    def get(self, key):
+        """Return the verdict for a given key if it exists."""
+        fingerprint, indices = self._slot_range(key)
+        for i in indices:
+            value = self._table[i]
+            if not value:
+                break
+            elif value & ~3 == fingerprint:
+                return value & 3
+        return None
+
+    def __setitem__(self, key, verdict):
+        fingerprint, indices = self._slot_range(key)
+        for i in indices:
+            value = self._table[i]
+            if not value or value & ~3 == fingerprint:
+                self._table[i] = fingerprint | verdict
+                return
+
+
 class ProfileData:
 
     def __init__(self, profile_name, key, provides, vfilter,
@@ -100,6 +168,64 @@ class ProfileData:
         return immutable, enabled
 
 
+class _ProfileResolver:
+    """Resolve the cache data for profiles, sharing optimized USE data chunks."""
+
+    def __init__(self, tasks):
+        self.tasks = tasks
+        self.chunked_data_cache = {}
+
+    def _flags(self, flags, bare_flags):
+        """Return an optimized, frozen copy of given USE data with extra global flags."""
+        flags = flags.clone(unfreeze=True)
+        flags.add_bare_global((), bare_flags)
+        flags.optimize(cache=self.chunked_data_cache)
+        flags.freeze()
+        return flags
+
+    def __call__(self, i):
+        _profile, profile_obj, stable_key, default_masked_use, files = self.tasks[i]
+        try:
+            # finalize enabled USE flags
+            use = set()
+            misc.incremental_expansion(use, profile_obj.use, 'while expanding USE')
+            return {
+                'files': files,
+                'masks': profile_obj.masks,
+                'unmasks': profile_obj.unmasks,
+                'immutable_flags': self._flags(profile_obj.masked_use, default_masked_use),
+                'stable_immutable_flags': self._flags(
+                    profile_obj.stable_masked_use, default_masked_use),
+                'enabled_flags': self._flags(profile_obj.forced_use, (stable_key,)),
+                'stable_enabled_flags': self._flags(
+                    profile_obj.stable_forced_use, (stable_key,)),
+                'pkg_use': profile_obj.pkg_use,
+                'iuse_effective': profile_obj.iuse_effective,
+                'use': frozenset(use),
+                'provides_repo': profile_obj.provides_repo,
+            }
+        except profiles_mod.ProfileError:
+            return None
+
+
+# profile resolver inherited by forked processes
+_profile_resolver = None
+
+
+def _init_profile_resolver(resolver):
+    """Initialize the profile resolver for a forked process."""
+    global _profile_resolver
+    _profile_resolver = resolver
+    # restore the default SIGTERM handler overridden by pkgcore so workers
+    # exit on pool termination
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+def _resolve_profile(i):
+    """Resolve the cache data for a given profile task index in a forked process."""
+    return _profile_resolver(i)
+
+
 class ProfileAddon(caches.CachedAddon):
     """Addon supporting ebuild repository profiles."""
 
@@ -110,7 +236,7 @@ class ProfileAddon(caches.CachedAddon):
     non_profile_dirs = frozenset(['desc', 'updates'])
 
     # cache registry
-    cache = caches.CacheData(type='profiles', file='profiles.pickle', version=2)
+    cache = caches.CacheData(type='profiles', file='profiles.db', version=2)
 
     @staticmethod
     def mangle_argparser(parser):
@@ -205,27 +331,24 @@ class ProfileAddon(caches.CachedAddon):
 
         profiles = enabled.difference(disabled)
 
-        namespace.arch_profiles = defaultdict(list)
+        # Profile objects are created when updating the cache, only profiles
+        # explicitly selected by the user are verified here. Bad repo profiles
+        # will be caught during repo metadata scans.
+        namespace.target_profiles = []
         for p in sorted(profiles):
             if ignore_deprecated and p.deprecated:
                 continue
 
-            try:
-                profile = target_repo.profiles.create_profile(p, load_profile_base=False)
-            except profiles_mod.ProfileError as e:
-                # Only throw errors if the profile was selected by the user, bad
-                # repo profiles will be caught during repo metadata scans.
-                if namespace.selected_profiles is not None:
+            profile = None
+            if namespace.selected_profiles is not None:
+                try:
+                    profile = target_repo.profiles.create_profile(p, load_profile_base=False)
+                except profiles_mod.ProfileError as e:
                     parser.error(f'invalid profile: {e.path!r}: {e.error}')
-                continue
-
-            if profile.arch is None:
-                # throw error if profiles have been explicitly selected, otherwise skip it
-                if namespace.selected_profiles is not None:
+                if profile.arch is None:
                     parser.error(f'profile make.defaults lacks ARCH setting: {p.path!r}')
-                continue
 
-            namespace.arch_profiles[profile.arch].append((profile, p))
+            namespace.target_profiles.append((profile, p))
 
     @coroutine
     def _profile_files(self):
@@ -251,25 +374,47 @@ class ProfileAddon(caches.CachedAddon):
                 profile_files.extend(files)
             yield profile_mtime, frozenset(profile_files)
 
-    @jit_attr
-    def profile_data(self):
-        """Mapping of profile age and file sets used to check cache viability."""
-        data = {}
-        if self.options.cache['profiles']:
-            gen_profile_data = self._profile_files()
-            for profile_obj, profile in chain.from_iterable(
-                    self.options.arch_profiles.values()):
-                mtime, files = gen_profile_data.send(profile_obj)
-                data[profile] = (mtime, files)
-                next(gen_profile_data)
-        return ImmutableDict(data)
-
     def __init__(self, *args, arches_addon=None, **kwargs):
         self.global_insoluble = set()
+        # visibility verdicts shared between forked processes
+        self.verdicts = VisibilityVerdicts()
         self.profile_filters = defaultdict(list)
         self.profile_evaluate_dict = {}
+        # mapping of scanned profiles to the files in their stacks
+        self.profile_files = ImmutableDict()
         super().__init__(*args, **kwargs)
 
+    def _scanned_arches(self):
+        """Return the set of arches keyworded by the targeted packages.
+
+        None is returned when any arch could be required, e.g. for repo-wide
+        scans or when targets are piped in.
+        """
+        restrictions = getattr(self.options, 'restrictions', None)
+        if not restrictions or not isinstance(restrictions, list):
+            return None
+        arches = set()
+        for scope, restrict in restrictions:
+            if scope < base.category_scope:
+                return None
+            try:
+                for pkg in self.options.target_repo.itermatch(restrict):
+                    arches.update(x.lstrip('~') for x in pkg.keywords)
+            except MetadataException:
+                return None
+        return arches
+
+    def _resolve_profiles(self, tasks):
+        """Resolve the cache data for the given profiles, using a process pool if worthwhile."""
+        resolver = _ProfileResolver(tasks)
+        jobs = min(getattr(self.options, 'jobs', 1), len(tasks))
+        if jobs > 1:
+            ctx = multiprocessing.get_context('fork')
+            with ctx.Pool(jobs, _init_profile_resolver, (resolver,)) as pool:
+                yield from pool.imap(_resolve_profile, range(len(tasks)))
+        else:
+            yield from map(resolver, range(len(tasks)))
+
     def update_cache(self, force=False):
         """Update related cache and push updates to disk."""
         cached_profiles = defaultdict(dict)
@@ -278,147 +423,147 @@ class ProfileAddon(caches.CachedAddon):
         if desired_arches is None or self.options.selected_arches is None:
             # copy it to be safe
             desired_arches = set(official_arches)
+        # skip resolving profiles for arches no targeted package uses
+        if (scanned_arches := self._scanned_arches()) is not None:
+            desired_arches = desired_arches.intersection(scanned_arches)
+
+        # padding for progress output
+        padding = max((len(x) for x in desired_arches), default=0)
+
+        # create profile objects for desired arches, grouping them by arch
+        arch_profiles = defaultdict(list)
+        for profile_obj, profile in self.options.target_profiles:
+            # skip profiles for undesired arches according to profiles.desc
+            if profile.arch not in desired_arches:
+                continue
+            if profile_obj is None:
+                try:
+                    profile_obj = self.options.target_repo.profiles.create_profile(
+                        profile, load_profile_base=False)
+                except profiles_mod.ProfileError:
+                    # profile checks will catch this
+                    continue
+            if profile_obj.arch is not None:
+                arch_profiles[profile_obj.arch].append((profile_obj, profile))
+
+        # profile file data used to check cache viability
+        profile_files = {}
+        gen_profile_data = self._profile_files()
 
         with base.ProgressManager(verbosity=self.options.verbosity) as progress:
             for repo in self.options.target_repo.trees:
                 if self.options.cache['profiles']:
                     cache_file = self.cache_file(repo)
+                    if not force and (cache := self.load_cache(cache_file)) is not None:
+                        # profile entries are loaded on demand when used
+                        cached_profiles[repo.config.profiles_base] = cache.data
                     # add profiles-base -> repo mapping to ease storage procedure
                     cached_profiles[repo.config.profiles_base]['repo'] = repo
-                    if not force:
-                        cache = self.load_cache(cache_file, fallback={})
-                        cached_profiles[repo.config.profiles_base].update(cache)
 
-                chunked_data_cache = {}
+                # profiles to scan with their arch and cache data if it exists
+                scan_profiles = []
+                # profiles lacking up to date cache data
+                tasks = []
 
                 for k in sorted(desired_arches):
                     if k.lstrip("~") not in desired_arches:
                         continue
                     stable_key = k.lstrip("~")
-                    unstable_key = "~" + stable_key
-                    stable_r = packages.PackageRestriction(
-                        "keywords", values.ContainmentMatch2((stable_key,)))
-                    unstable_r = packages.PackageRestriction(
-                        "keywords", values.ContainmentMatch2((stable_key, unstable_key,)))
-
                     default_masked_use = tuple(set(
                         x for x in official_arches if x != stable_key))
 
-                    # padding for progress output
-                    padding = max(len(x) for x in desired_arches)
+                    for profile_obj, profile in arch_profiles.get(k, []):
+                        try:
+                            files = profile_files[profile]
+                        except KeyError:
+                            files = profile_files[profile] = gen_profile_data.send(profile_obj)
+                            next(gen_profile_data)
 
-                    for profile_obj, profile in self.options.arch_profiles.get(k, []):
-                        files = self.profile_data.get(profile, None)
                         try:
                             cached_profile = cached_profiles[profile.base][profile.path]
                             if files != cached_profile['files']:
                                 # force refresh of outdated cache entry
                                 raise KeyError
-
-                            masks = cached_profile['masks']
-                            unmasks = cached_profile['unmasks']
-                            immutable_flags = cached_profile['immutable_flags']
-                            stable_immutable_flags = cached_profile['stable_immutable_flags']
-                            enabled_flags = cached_profile['enabled_flags']
-                            stable_enabled_flags = cached_profile['stable_enabled_flags']
-                            pkg_use = cached_profile['pkg_use']
-                            iuse_effective = cached_profile['iuse_effective']
-                            use = cached_profile['use']
-                            provides_repo = cached_profile['provides_repo']
                         except KeyError:
-                            try:
-                                if self.options.cache['profiles']:
-                                    progress(f'updating {repo} profiles cache: {profile.arch:<{padding}}')
-
-                                masks = profile_obj.masks
-                                unmasks = profile_obj.unmasks
-
-                                immutable_flags = profile_obj.masked_use.clone(unfreeze=True)
-                                immutable_flags.add_bare_global((), default_masked_use)
-                                immutable_flags.optimize(cache=chunked_data_cache)
-                                immutable_flags.freeze()
-
-                                stable_immutable_flags = profile_obj.stable_masked_use.clone(unfreeze=True)
-                                stable_immutable_flags.add_bare_global((), default_masked_use)
-                                stable_immutable_flags.optimize(cache=chunked_data_cache)
-                                stable_immutable_flags.freeze()
-
-                                enabled_flags = profile_obj.forced_use.clone(unfreeze=True)
-                                enabled_flags.add_bare_global((), (stable_key,))
-                                enabled_flags.optimize(cache=chunked_data_cache)
-                                enabled_flags.freeze()
-
-                                stable_enabled_flags = profile_obj.stable_forced_use.clone(unfreeze=True)
-                                stable_enabled_flags.add_bare_global((), (stable_key,))
-                                stable_enabled_flags.optimize(cache=chunked_data_cache)
-                                stable_enabled_flags.freeze()
-
-                                pkg_use = profile_obj.pkg_use
-                                iuse_effective = profile_obj.iuse_effective
-                                provides_repo = profile_obj.provides_repo
-
-                                # finalize enabled USE flags
-                                use = set()
-                                misc.incremental_expansion(use, profile_obj.use, 'while expanding USE')
-                                use = frozenset(use)
-                            except profiles_mod.ProfileError:
-                                # unsupported EAPI or other issue, profile checks will catch this
-                                continue
-
-                            if self.options.cache['profiles']:
-                                cached_profiles[profile.base]['update'] = True
-                                cached_profiles[profile.base][profile.path] = {
-                                    'files': files,
-                                    'masks': masks,
-                                    'unmasks': unmasks,
-                                    'immutable_flags': immutable_flags,
-                                    'stable_immutable_flags': stable_immutable_flags,
-                                    'enabled_flags': enabled_flags,
-                                    'stable_enabled_flags': stable_enabled_flags,
-                                    'pkg_use': pkg_use,
-                                    'iuse_effective': iuse_effective,
-                                    'use': use,
-                                    'provides_repo': provides_repo,
-                                }
-
-                        # used to interlink stable/unstable lookups so that if
-                        # unstable says it's not visible, stable doesn't try
-                        # if stable says something is visible, unstable doesn't try.
-                        stable_cache = set()
-                        unstable_insoluble = ProtectedSet(self.global_insoluble)
-
-                        # few notes.  for filter, ensure keywords is last, on the
-                        # offchance a non-metadata based restrict foregos having to
-                        # access the metadata.
-                        # note that the cache/insoluble are inversly paired;
-                        # stable cache is usable for unstable, but not vice versa.
-                        # unstable insoluble is usable for stable, but not vice versa
-                        vfilter = domain.generate_filter(repo.pkg_masks | masks, unmasks)
-                        self.profile_filters[stable_key].append(ProfileData(
-                            profile.path, stable_key,
-                            provides_repo,
-                            packages.AndRestriction(vfilter, stable_r),
-                            iuse_effective,
-                            use,
-                            pkg_use,
-                            stable_immutable_flags, stable_enabled_flags,
-                            stable_cache,
-                            ProtectedSet(unstable_insoluble),
-                            profile.status,
-                            profile.deprecated))
-
-                        self.profile_filters[unstable_key].append(ProfileData(
-                            profile.path, unstable_key,
-                            provides_repo,
-                            packages.AndRestriction(vfilter, unstable_r),
-                            iuse_effective,
-                            use,
-                            pkg_use,
-                            immutable_flags, enabled_flags,
-                            ProtectedSet(stable_cache),
-                            unstable_insoluble,
-                            profile.status,
-                            profile.deprecated))
+                            cached_profile = None
+                            tasks.append((profile, profile_obj, stable_key, default_masked_use, files))
+                        scan_profiles.append((profile, stable_key, cached_profile))
+
+                # resolve profiles lacking cache data in parallel
+                resolved = {}
+                for task, cached_profile in zip(tasks, self._resolve_profiles(tasks)):
+                    profile, stable_key = task[0], task[2]
+                    if self.options.cache['profiles']:
+                        progress(f'updating {repo} profiles cache: {stable_key:<{padding}}')
+                    if cached_profile is None:
+                        # unsupported EAPI or other issue, profile checks will catch this
+                        continue
+                    resolved[profile] = cached_profile
+                    if self.options.cache['profiles']:
+                        cached_profiles[profile.base]['update'] = True
+                        cached_profiles[profile.base][profile.path] = cached_profile
+
+                for profile, stable_key, cached_profile in scan_profiles:
+                    if cached_profile is None and (cached_profile := resolved.get(profile)) is None:
+                        continue
+                    unstable_key = "~" + stable_key
+                    stable_r = packages.PackageRestriction(
+                        "keywords", values.ContainmentMatch2((stable_key,)))
+                    unstable_r = packages.PackageRestriction(
+                        "keywords", values.ContainmentMatch2((stable_key, unstable_key,)))
+
+                    masks = cached_profile['masks']
+                    unmasks = cached_profile['unmasks']
+                    immutable_flags = cached_profile['immutable_flags']
+                    stable_immutable_flags = cached_profile['stable_immutable_flags']
+                    enabled_flags = cached_profile['enabled_flags']
+                    stable_enabled_flags = cached_profile['stable_enabled_flags']
+                    pkg_use = cached_profile['pkg_use']
+                    iuse_effective = cached_profile['iuse_effective']
+                    use = cached_profile['use']
+                    provides_repo = cached_profile['provides_repo']
+
+                    # used to interlink stable/unstable lookups so that if
+                    # unstable says it's not visible, stable doesn't try
+                    # if stable says something is visible, unstable doesn't try.
+                    stable_cache = set()
+                    unstable_insoluble = ProtectedSet(self.global_insoluble)
+
+                    # few notes.  for filter, ensure keywords is last, on the
+                    # offchance a non-metadata based restrict foregos having to
+                    # access the metadata.
+                    # note that the cache/insoluble are inversly paired;
+                    # stable cache is usable for unstable, but not vice versa.
+                    # unstable insoluble is usable for stable, but not vice versa
+                    vfilter = domain.generate_filter(repo.pkg_masks | masks, unmasks)
+                    self.profile_filters[stable_key].append(ProfileData(
+                        profile.path, stable_key,
+                        provides_repo,
+                        packages.AndRestriction(vfilter, stable_r),
+                        iuse_effective,
+                        use,
+                        pkg_use,
+                        stable_immutable_flags, stable_enabled_flags,
+                        stable_cache,
+                        ProtectedSet(unstable_insoluble),
+                        profile.status,
+                        profile.deprecated))
+
+                    self.profile_filters[unstable_key].append(ProfileData(
+                        profile.path, unstable_key,
+                        provides_repo,
+                        packages.AndRestriction(vfilter, unstable_r),
+                        iuse_effective,
+                        use,
+                        pkg_use,
+                        immutable_flags, enabled_flags,
+                        ProtectedSet(stable_cache),
+                        unstable_insoluble,
+                        profile.status,
+                        profile.deprecated))
+
+        self.profile_files = ImmutableDict(
+            (profile, files) for profile, (_mtime, files) in profile_files.items())
 
         # dump updated profile filters
         for k, v in cached_profiles.items():
@@ -618,8 +763,211 @@ class UseAddon(base.Addon):
         return vals, self._unstated_iuse(pkg, attr, unstated)
 
 
-class NetAddon(base.Addon):
-    """Addon supporting network functionality."""
+class _IndexedPkg(cpv.VersionedCPV):
+    """Lightweight package object created from a repo's md5-cache entry."""
+
+    def __init__(self, category, package, version, repo, data):
+        super().__init__(category, package, version)
+        slot, _sep, subslot = data.get('SLOT', '0').partition('/')
+        iuse = frozenset(data.get('IUSE', '').split())
+        iuse_stripped = frozenset(x.lstrip('-+') for x in iuse)
+
+        sf = object.__setattr__
+        sf(self, 'repo', repo)
+        sf(self, 'slot', slot)
+        sf(self, 'subslot', subslot or slot)
+        sf(self, 'keywords', tuple(data.get('KEYWORDS', '').split()))
+        sf(self, 'iuse', iuse)
+        sf(self, 'iuse_stripped', iuse_stripped)
+        sf(self, 'iuse_effective', iuse_stripped)
+        sf(self, 'live', 'live' in data.get('PROPERTIES', '').split())
+
+
+class RepoIndexAddon(caches.CachedAddon):
+    """Repo-wide index of packages used for dependency queries.
+
+    Packages are mapped by their unversioned keys to sorted sequences of
+    lightweight package objects created directly from md5-cache entries,
+    falling back to regular package objects for missing or outdated entries.
+    For repo-level scans the index is populated up front by the pipeline so
+    it's shared by all forked processes, otherwise keys are indexed on demand.
+
+    Validated md5-cache entries are cached along with the file stats of the
+    entries and their ebuilds, so following scans only rehash ebuilds that
+    changed.
+    """
+
+    # cache registry
+    cache = caches.CacheData(type='index', file='index.db', version=1)
+
+    # md5-cache fields used by indexed packages
+    _fields = ('SLOT', 'KEYWORDS', 'IUSE', 'PROPERTIES', '_eclasses_')
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        search_repo = getattr(self.options, 'search_repo', None)
+        if search_repo is None:
+            # cache updates only specify the target repo
+            search_repo = self.options.target_repo
+        self.repos = getattr(search_repo, 'trees', (search_repo,))
+        self._index = {}
+        self._eclass_md5s = {}
+        # cached and currently valid md5-cache entries per repo
+        self._cached = {}
+        self._entries = defaultdict(dict)
+        self._updated = set()
+
+    def update_cache(self, force=False):
+        """Load the existing validated md5-cache entries from disk."""
+        if self.options.cache.get('index', False) and not force:
+            for repo in self.repos:
+                if (cache := self.load_cache(self.cache_file(repo))) is not None:
+                    self._cached[repo.location] = cache.data
+        # cache updates populate the index in order to push it to disk
+        if getattr(self.options, 'update_cache', False):
+            self.populate()
+
+    def populate(self):
+        """Index all packages, pushing validated md5-cache entries to disk."""
+        keys = set()
+        for repo in self.repos:
+            keys.update(f'{cat}/{pkg}' for cat, pkg in repo.versions)
+        for key in keys:
+            self._pkgs(key)
+
+        if self.options.cache.get('index', False):
+            for repo in self.repos:
+                if (entries := self._entries.get(repo.location)) is None:
+                    continue
+                cached = self._cached.get(repo.location, {})
+                # save when entries were rehashed or removed
+                if repo.location in self._updated or cached.keys() != entries.keys():
+                    cache = caches.DictCache(entries, self.cache)
+                    self.save_cache(cache, self.cache_file(repo))
+
+    def _eclasses(self, repo):
+        """Return the mapping of eclass names to md5 checksums available to a repo."""
+        try:
+            return self._eclass_md5s[repo.location]
+        except KeyError:
+            pass
+
+        eclasses = {}
+        for tree in repo.trees:
+            eclass_dir = pjoin(tree.location, 'eclass')
+            try:
+                paths = os.listdir(eclass_dir)
+            except FileNotFoundError:
+                continue
+            for path in paths:
+                if path.endswith('.eclass'):
+                    with open(pjoin(eclass_dir, path), 'rb') as f:
+                        eclasses[path[:-7]] = hashlib.md5(f.read()).hexdigest()
+        self._eclass_md5s[repo.location] = eclasses
+        return eclasses
+
+    def _cache_entry(self, repo, category, package, version):
+        """Return the metadata for a package if its md5-cache entry is valid."""
+        pf = f'{package}-{version}'
+        paths = (
+            pjoin(repo.location, 'metadata', 'md5-cache', category, pf),
+            pjoin(repo.location, category, package, f'{pf}.ebuild'))
+        try:
+            stats = tuple(
+                (st.st_ino, st.st_size, st.st_mtime_ns) for st in map(os.stat, paths))
+        except OSError:
+            return None
+
+        cpv = f'{category}/{pf}'
+        cached = self._cached.get(repo.location, {}).get(cpv)
+        if cached is not None and cached[0] == stats:
+            data = cached[1]
+        else:
+            try:
+                with open(paths[0]) as f:
+                    data = dict(x.rstrip('\n').split('=', 1) for x in f if '=' in x)
+                with open(paths[1], 'rb') as f:
+                    ebuild_md5 = hashlib.md5(f.read()).hexdigest()
+            except (IOError, UnicodeDecodeError):
+                return None
+            if data.get('_md5_') != ebuild_md5:
+                return None
+            data = {k: data[k] for k in self._fields if k in data}
+            self._updated.add(repo.location)
+        self._entries[repo.location][cpv] = (stats, data)
+
+        eclasses = data.get('_eclasses_', '').split()
+        eclass_md5s = self._eclasses(repo)
+        for name, md5 in zip(eclasses[::2], eclasses[1::2]):
+            if eclass_md5s.get(name) != md5:
+                return None
+        return data
+
+    def _repo_pkgs(self, repo, category, package):
+        """Yield package objects from a repo for a given package key."""
+        location = getattr(repo, 'location', None)
+        if not location or not os.path.isdir(pjoin(location, 'metadata', 'md5-cache')):
+            yield from repo.itermatch(atom_cls(f'{category}/{package}'))
+            return
+
+        for version in repo.versions.get((category, package), ()):
+            if (data := self._cache_entry(repo, category, package, version)) is not None:
+                yield _IndexedPkg(category, package, version, repo, data)
+            else:
+                yield from repo.itermatch(atom_cls(f'={category}/{package}-{version}'))
+
+    def _pkgs(self, key):
+        """Return the sorted packages for a given unversioned package key."""
+        try:
+            return self._index[key]
+        except KeyError:
+            pass
+
+        category, package = key.split('/', 1)
+        pkgs = []
+        for repo in self.repos:
+            pkgs.extend(self._repo_pkgs(repo, category, package))
+        pkgs = self._index[key] = tuple(sorted(pkgs))
+        return pkgs
+
+    def match(self, atom):
+        """Return the sorted packages matching a given atom."""
+        return [pkg for pkg in self._pkgs(atom.key) if atom.match(pkg)]
+
+    def has_match(self, atom):
+        """Determine if any package matches a given atom."""
+        return any(atom.match(pkg) for pkg in self._pkgs(atom.key))
+
+
+class UrlVerdict(NamedTuple):
+    """Cached verification status for a URL."""
+    # time the URL was last requested
+    checked: float
+    # permanent redirects as (location, HSTS enabled) tuples
+    redirects: tuple = ()
+    # error message for failed requests
+    error: str = None
+    # whether the request failed due to an invalid SSL cert
+    ssl_error: bool = False
+    # response validators used for conditional requests
+    etag: str = None
+    last_modified: str = None
+    # whether the request was skipped since its host repeatedly timed out
+    unresponsive: bool = False
+
+
+class NetAddon(caches.CachedAddon):
+    """Addon supporting network functionality.
+
+    Verdicts for requested URLs are cached so following scans only recheck
+    URLs with expired verdicts, using conditional requests when the previous
+    response provided validators.
+    """
+
+    # cache registry
+    cache = caches.CacheData(type='net', file='net.db', version=1, default=False)
+    # network options are only used by scans
+    cache_options = False
 
     @classmethod
     def mangle_argparser(cls, parser):
@@ -630,35 +978,690 @@ class NetAddon(base.Addon):
         group.add_argument(
             '--user-agent', default='Wget/1.20.3 (linux-gnu)',
             help='custom user agent spoofing')
+        group.add_argument(
+            '--host-tasks', type=arghparse.positive_int, default=4,
+            help='number of concurrent requests per host',
+            docs="""
+                Number of requests run concurrently against the same host,
+                further requests for the host are queued without occupying
+                any of the asynchronous tasks (defaults to 4).
+            """)
+        group.add_argument(
+            '--url-ttl', metavar='DAYS', type=float, default=7,
+            help='days before rechecking working URLs')
+        group.add_argument(
+            '--failed-url-ttl', metavar='DAYS', type=float, default=1,
+            help='days before rechecking failing URLs')
 
-    @property
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._verdicts = {}
+        self._updated = {}
+
+    def update_cache(self, force=False):
+        """Load the existing URL verdicts from disk."""
+        if self.options.cache.get('net', False) and not force:
+            cache = self.load_cache(self.cache_file(self.options.target_repo))
+            if cache is not None:
+                self._verdicts = cache.data
+
+    @jit_attr
     def session(self):
+        """Network session shared by all checks, reusing connections per host."""
         try:
             from .net import Session
             return Session(
                 concurrent=self.options.tasks, timeout=self.options.timeout,
-                user_agent=self.options.user_agent)
+                user_agent=self.options.user_agent,
+                host_concurrent=self.options.host_tasks)
         except ImportError as e:
             if e.name == 'requests':
                 raise UserException('network checks require requests to be installed')
             raise
 
+    def get(self, url):
+        """Return the cached verdict for a given URL if it exists.
+
+        Cached verdicts are loaded from disk on demand, so this should only
+        be called from the scheduling thread.
+        """
+        verdict = self._updated.get(url)
+        if verdict is None:
+            verdict = self._verdicts.get(url)
+        return verdict
+
+    def expired(self, verdict):
+        """Determine if a given verdict should be rechecked."""
+        if verdict is None:
+            return True
+        ttl = self.options.url_ttl if verdict.error is None else self.options.failed_url_ttl
+        return time.time() - verdict.checked > ttl * 86400
+
+    def update(self, url, verdict):
+        """Store the verdict for a given URL."""
+        self._updated[url] = verdict
+
+    def save(self):
+        """Push updated verdicts to disk, dropping expired entries."""
+        if self.options.cache.get('net', False) and self._updated:
+            verdicts = {
+                k: v for k, v in self._verdicts.items()
+                if k not in self._updated and not self.expired(v)}
+            verdicts.update(self._updated)
+            cache = caches.DictCache(verdicts, self.cache)
+            self.save_cache(cache, self.cache_file(self.options.target_repo))
+            self._updated = {}
+
 
 class BashAddon(base.Addon):
-    """Addon supporting parsing bash code."""
+    """Addon supporting parsing bash code.
+
+    Checks scanning parsed items register their queries via
+    :meth:`register_query`. All registered queries are combined into a single
+    query so each parse tree is only walked once, with the captures for each
+    check pulled via :meth:`captures`.
+
+    The bash parsing library is built during installs, it's only loaded once
+    parsing is required.
+    """
+
+    lib_path = pjoin(os.path.dirname(__file__), '_bash-lang.so')
+    # capture tokens in queries, skipping string literals and comments
+    _capture_re = re.compile(r'"(?:[^"\\]|\\.)*"|;[^\n]*|@([\w.-]+)')
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        if not os.path.exists(self.lib_path):
+            # the lib is built during installs, never at scan time
+            raise UserException(
+                f'missing bash parsing library: {self.lib_path!r} '
+                '(run `python setup.py build_py -i` when running from git)')
+
+        # registered queries and their combined form
+        self._queries = {}
+        self._combined_query = None
+        # captures and node strings for the last queried tree
+        self._cached_tree = None
+        self._captures = {}
+        self._strings = {}
+
+    @jit_attr
+    def bash_lang(self):
+        """Bash language object, loaded on first use."""
+        return Language(self.lib_path, 'bash')
+
+    @jit_attr
+    def parser(self):
+        """Bash parser, created on first use."""
+        parser = Parser()
+        parser.set_language(self.bash_lang)
+        return parser
+
+    @jit_attr
+    def grammar(self):
+        """Checksum of the bash grammar used for parsing."""
+        with open(self.lib_path, 'rb') as f:
+            return hashlib.blake2b(f.read()).hexdigest()
+
+    def query(self, query):
+        """Compile a given query for the bash language."""
+        return self.bash_lang.query(query)
+
+    def register_query(self, owner, query):
+        """Register a query for a given owner, e.g. a check class.
+
+        Capture names are namespaced per owner so identical names used by
+        different owners don't collide.
+        """
+        if owner in self._queries:
+            return
+        prefix = f'_{len(self._queries)}.'
+        query = self._capture_re.sub(
+            lambda m: f'@{prefix}{m.group(1)}' if m.group(1) else m.group(0), query)
+        self._queries[owner] = (prefix, query)
+        self._combined_query = None
+        self._cached_tree = None
+
+    def captures(self, pkg, owner):
+        """Return the list of captured nodes and capture names for a given owner."""
+        if pkg.tree is not self._cached_tree:
+            if self._combined_query is None:
+                self._combined_query = self.query(
+                    '\n'.join(query for _prefix, query in self._queries.values()))
+            owners = {prefix: owner for owner, (prefix, _query) in self._queries.items()}
+            captures = defaultdict(list)
+            for node, name in self._combined_query.captures(pkg.tree.root_node):
+                prefix, _, name = name.partition('.')
+                captures[owners[f'{prefix}.']].append((node, sys.intern(name)))
+            self._captures = captures
+            self._strings = {}
+            self._cached_tree = pkg.tree
+        return self._captures.get(owner, ())
+
+    def node_str(self, pkg, node):
+        """Return the interned string for a given node from the last queried tree."""
+        key = (node.start_byte, node.end_byte)
+        try:
+            return self._strings[key]
+        except KeyError:
+            s = sys.intern(pkg.data[node.start_byte:node.end_byte].decode('utf8'))
+            self._strings[key] = s
+            return s
+
+
+class LineScannerAddon(base.Addon):
+    """Addon scanning ebuild lines once for all line checks.
+
+    Line checks register the literal strings that must exist on any line they
+    handle via :meth:`register`. For each EAPI, the strings of all registered
+    checks are combined into a single regex that is run once over the file
+    contents, mapping the matching lines back to the checks owning the
+    matched strings.
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._checks = set()
+        self._patterns = {}
+        self._cached = (None, None, None)
+
+    def register(self, check_cls):
+        """Register a line check class."""
+        if check_cls not in self._checks:
+            self._checks.add(check_cls)
+            self._patterns = {}
+            self._cached = (None, None, None)
+
+    def _compile(self, eapi):
+        """Create the combined regex and related string mappings for a given EAPI."""
+        owners = defaultdict(set)
+        triggers = {}
+        for cls in self._checks:
+            triggers[cls] = tuple(cls.line_triggers(eapi))
+            for s in triggers[cls]:
+                owners[s].add(cls)
+        regex = None
+        if owners:
+            regex = re.compile('|'.join(map(re.escape, sorted(owners, key=len, reverse=True))))
+
+        # determine checks owning strings that can be hidden by overlapping matches
+        overlapped = {}
+        for cls, strings in triggers.items():
+            if any(self._overlaps(s, t) for t in strings for s in owners if s != t):
+                overlapped[cls] = strings
+        return regex, owners, overlapped
+
+    @staticmethod
+    def _overlaps(s, t):
+        """Determine if a match for a given string can hide another string."""
+        return t in s or any(s.endswith(t[:i]) for i in range(1, len(t)))
+
+    def scan(self, pkg):
+        """Return the mapping of line checks to matching line numbers for a package."""
+        lines = pkg.lines
+        eapi = str(pkg.eapi)
+        cached_lines, cached_eapi, matches = self._cached
+        if lines is cached_lines and eapi == cached_eapi:
+            return matches
+
+        try:
+            regex, owners, overlapped = self._patterns[eapi]
+        except KeyError:
+            regex, owners, overlapped = self._patterns[eapi] = self._compile(pkg.eapi)
+
+        matches = defaultdict(set)
+        if regex is not None:
+            # explicitly separate lines so matches never span multiple lines
+            ends = list(accumulate(len(x) + 1 for x in lines))
+            for mo in regex.finditer('\n'.join(lines)):
+                lineno = bisect_right(ends, mo.start()) + 1
+                for cls in owners[mo.group()]:
+                    matches[cls].add(lineno)
+
+            # Matches don't overlap so strings possibly overlapped by other
+            # matches are manually searched for on matching lines.
+            if matches and overlapped:
+                matching = set().union(*matches.values())
+                for cls, strings in overlapped.items():
+                    for lineno in matching.difference(matches[cls]):
+                        line = lines[lineno - 1]
+                        if any(x in line for x in strings):
+                            matches[cls].add(lineno)
+
+        matches = {k: sorted(v) for k, v in matches.items() if v}
+        self._cached = (lines, eapi, matches)
+        return matches
+
+
+class CommandsCache(caches.DictCache):
+    """Cache of ebuild commands extracted using a specific bash grammar."""
+
+    def __init__(self, data, cache, grammar=None):
+        super().__init__(data, cache)
+        self.grammar = grammar
+
+
+class CommandsAddon(caches.CachedAddon):
+    """Persistent cache of the commands called by ebuilds.
+
+    Parse trees can't be stored, but the commands extracted from them are
+    small. They're stored by the checksum of the ebuild content so following
+    scans skip parsing unchanged ebuilds entirely. The cache is discarded
+    when the bash grammar changes.
+
+    Since ebuilds are scanned in forked processes, each process collects its
+    newly extracted commands which are merged and saved by the parent.
+    """
+
+    # cache registry
+    cache = caches.CacheData(type='commands', file='commands.db', version=1)
+
+    required_addons = (BashAddon,)
+
+    def __init__(self, *args, bash_addon):
+        super().__init__(*args)
+        self.bash = bash_addon
+        self.bash.register_query(self.__class__, """(command) @call""")
+        self._cached = None
+        # newly extracted commands and the checksums of all seen ebuilds
+        self._updated = {}
+        self._seen = set()
+
+    def update_cache(self, force=False):
+        """Load the existing commands cache from disk."""
+        if self.options.cache.get('commands', False) and not force:
+            self._cached = self.load_cache(self.cache_file(self.options.target_repo))
+
+    @jit_attr
+    def _commands(self):
+        """Cached commands matching the current bash grammar."""
+        if self._cached is not None and self._cached.grammar == self.bash.grammar:
+            return self._cached
+        return CommandsCache({}, self.cache, grammar=self.bash.grammar)
+
+    def _extract(self, pkg):
+        """Extract command names, line numbers, and calls from a parsed package."""
+        commands = []
+        for call_node, _name in self.bash.captures(pkg, self.__class__):
+            name_node = call_node.child_by_field_name('name')
+            lineno, _colno = name_node.start_point
+            commands.append((
+                self.bash.node_str(pkg, name_node), lineno + 1,
+                self.bash.node_str(pkg, call_node)))
+        return tuple(commands)
+
+    @staticmethod
+    def _key(data):
+        """Return the cache key for given ebuild content."""
+        return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+    def get(self, pkg):
+        """Return the commands called by a given parsed package.
+
+        Each command is a tuple of its name, line number, and full call.
+        """
+        key = self._key(pkg.data)
+        self._seen.add(key)
+        commands = self._updated.get(key)
+        if commands is None:
+            commands = self._commands.get(key)
+        if commands is None:
+            commands = self._updated[key] = self._extract(pkg)
+        return commands
+
+    def keep(self, pkgs):
+        """Mark the ebuilds of given packages as seen without extracting their commands.
+
+        Used for packages that aren't scanned, e.g. ones with replayed
+        results, so their cached commands aren't pruned.
+        """
+        for pkg in pkgs:
+            try:
+                with open(pkg.path, 'rb') as f:
+                    self._seen.add(self._key(f.read()))
+            except FileNotFoundError:
+                continue
+
+    def collect(self):
+        """Return and reset the newly extracted commands for seen ebuilds.
+
+        Seen ebuilds with previously cached commands are mapped to None.
+        """
+        collected = dict.fromkeys(self._seen)
+        collected.update(self._updated)
+        self._updated, self._seen = {}, set()
+        return collected
+
+    def update(self, collected):
+        """Merge the commands collected by a scanning process."""
+        self._seen.update(collected)
+        self._updated.update((k, v) for k, v in collected.items() if v is not None)
+
+    def save(self, prune=False):
+        """Push updated commands to disk.
+
+        When pruning, entries for ebuilds that weren't seen are dropped.
+        """
+        unused = self._commands.keys() - self._seen if prune else ()
+        if self.options.cache.get('commands', False) and (self._updated or unused):
+            data = {k: v for k, v in self._commands.items() if k not in unused}
+            data.update(self._updated)
+            commands = CommandsCache(data, self.cache, grammar=self.bash.grammar)
+            self.save_cache(commands, self.cache_file(self.options.target_repo))
+        self._updated, self._seen = {}, set()
+
+
+class ContentAddon(base.Addon):
+    """Addon sharing file contents between sources and checks.
+
+    Recently used files are kept so all sources and checks handling the same
+    item during a scan read and decode its file only once.
+    """
+
+    # number of files kept in memory
+    _cache_size = 256
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._cache = OrderedDict()
+
+    def get(self, path, source=None):
+        """Return the content object for a given file path."""
+        content = self._cache.get(path)
+        if content is None:
+            content = FileContent(path, source)
+            self._cache[path] = content
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(path)
+        return content
+
+    def ebuild(self, pkg):
+        """Return the content object for a given package's ebuild."""
+        path = getattr(pkg, 'path', None)
+        if path is None:
+            # ebuilds lacking files on disk can't be shared
+            return FileContent(path, pkg.ebuild)
+        # read ebuilds from disk when possible, allowing large files to be mapped
+        source = None if os.path.isfile(path) else pkg.ebuild
+        return self.get(path, source)
+
+
+class ResultsCache(caches.DictCache):
+    """Cache of package results for a specific scan configuration."""
+
+    def __init__(self, data, cache, scan_key=None):
+        super().__init__(data, cache)
+        self.scan_key = scan_key
+
+
+class ResultsAddon(caches.CachedAddon):
+    """Persistent cache of per-package scan results.
+
+    When enabled, the results for each package are stored alongside a
+    fingerprint of the package directory, its metadata cache entries, and the
+    eclasses it inherits. Subsequent repo-level scans using the same checks
+    and repo-wide configuration replay the stored results for unchanged
+    packages instead of rescanning them.
+
+    Note that results depending on data outside a package (e.g. other
+    packages, git history, or the current date) are only refreshed when the
+    package itself changes, therefore this cache is disabled by default.
+    """
+
+    # cache registry
+    cache = caches.CacheData(type='results', file='results.db', version=1, default=False)
+
+    required_addons = (EclassAddon, ProfileAddon)
+
+    # options affecting the results generated for a package
+    _scan_options = (
+        'verbosity', 'filter', 'gentoo_repo', 'selected_arches',
+        'selected_profiles', 'commits', 'glsa_dir', 'net')
+
+    def __init__(self, *args, eclass_addon, profile_addon):
+        super().__init__(*args)
+        self.eclass_addon = eclass_addon
+        self.profile_addon = profile_addon
+        self._cached = None
+        self._results = None
+        self._updated = False
+
+    def update_cache(self, force=False):
+        """Load the existing results cache from disk."""
+        if self.options.cache['results'] and not force:
+            self._cached = self.load_cache(self.cache_file(self.options.target_repo))
+
+    @staticmethod
+    def _hash_files(paths, root):
+        """Hash the contents of a given iterable of file paths."""
+        chksum = hashlib.blake2b()
+        for path in paths:
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            chksum.update(os.path.relpath(path, root).encode())
+            chksum.update(b'\0')
+            chksum.update(hashlib.blake2b(data).digest())
+        return chksum
+
+    def _repo_fingerprint(self):
+        """Fingerprint repo-wide files that affect all packages.
+
+        This covers the files of all scanned profile stacks along with the
+        repo configuration used regardless of profile.
+        """
+        paths = set(chain.from_iterable(self.profile_addon.profile_files.values()))
+        for repo in self.options.target_repo.trees:
+            paths.add(pjoin(repo.location, 'metadata', 'layout.conf'))
+            profiles_base = repo.config.profiles_base
+            for root, dirs, files in os.walk(profiles_base):
+                if root == profiles_base:
+                    # profile dirs are covered by the scanned profile stacks
+                    dirs[:] = [x for x in dirs if x in ProfileAddon.non_profile_dirs]
+                paths.update(pjoin(root, x) for x in files)
+            for root, dirs, files in os.walk(pjoin(repo.location, 'licenses')):
+                paths.update(pjoin(root, x) for x in files)
+        return self._hash_files(sorted(paths), self.options.target_repo.location).hexdigest()
+
+    def load(self, checks):
+        """Initialize cached results for a scan using the given checks."""
+        options = tuple(
+            (x, repr(getattr(self.options, x, None))) for x in self._scan_options)
+        scan_key = (
+            self.options.target_repo.repo_id,
+            tuple(sorted(x.__class__.__name__ for x in checks)),
+            options,
+            self._repo_fingerprint(),
+        )
+        # pull eclass hashes before scanning processes are forked
+        self.eclass_addon.hashes
+        if self._cached is not None and self._cached.scan_key == scan_key:
+            self._results = self._cached
+        else:
+            self._results = ResultsCache({}, self.cache, scan_key=scan_key)
+            self._updated = True
+
+    def fingerprint(self, restrict):
+        """Return the fingerprint for a given unversioned package atom.
+
+        None is returned for packages that shouldn't be cached, e.g. ones with
+        invalid metadata.
+        """
+        repo = self.options.target_repo
+        try:
+            pkgs = list(repo.itermatch(restrict))
+            inherited = sorted(set(chain.from_iterable(pkg.inherited for pkg in pkgs)))
+        except MetadataException:
+            return None
+
+        pkg_dir = pjoin(repo.location, restrict.category, restrict.package)
+        paths = []
+        for root, dirs, files in os.walk(pkg_dir):
+            dirs.sort()
+            paths.extend(pjoin(root, x) for x in sorted(files))
+        md5_cache = pjoin(repo.location, 'metadata', 'md5-cache', restrict.category)
+        paths.extend(pjoin(md5_cache, pkg.PF) for pkg in pkgs)
+        chksum = self._hash_files(paths, repo.location)
+
+        eclass_hashes = self.eclass_addon.hashes
+        for eclass in inherited:
+            chksum.update(f'{eclass}:{eclass_hashes.get(eclass)}\0'.encode())
+        return chksum.hexdigest()
+
+    def get(self, restrict, fingerprint):
+        """Return cached results for a given package if they're up to date."""
+        if fingerprint is not None:
+            try:
+                cached_fingerprint, results = self._results[restrict.key]
+            except KeyError:
+                return None
+            if cached_fingerprint == fingerprint:
+                return results
+        return None
+
+    def update(self, restrict, fingerprint, results):
+        """Store the results for a given package."""
+        self._results[restrict.key] = (fingerprint, results)
+        self._updated = True
+
+    def save(self):
+        """Push updated results to disk, dropping entries for removed packages."""
+        if self._updated:
+            repo = self.options.target_repo
+            for key in list(self._results):
+                if not os.path.isdir(pjoin(repo.location, key)):
+                    del self._results[key]
+            self.save_cache(self._results, self.cache_file(repo))
+            self._updated = False
+
+
+class CostsAddon(caches.CachedAddon):
+    """Persistent history of per-package scanning costs.
+
+    The time spent scanning each package during repo-level scans is stored
+    in order to schedule the most expensive packages first during following
+    scans, avoiding idle processes waiting on large packages at the end.
+    """
+
+    # cache registry
+    cache = caches.CacheData(type='costs', file='costs.db', version=1)
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._costs = {}
+        self._updated = {}
+
+    def update_cache(self, force=False):
+        """Load the existing cost history from disk."""
+        if self.options.cache['costs'] and not force:
+            cache = self.load_cache(self.cache_file(self.options.target_repo))
+            if cache is not None:
+                self._costs = cache.data
+
+    def get(self, restrict):
+        """Return the previous cost in seconds for a given package if it exists."""
+        return self._costs.get(restrict.key)
+
+    def update(self, restrict, cost):
+        """Store the cost for a given package."""
+        self._updated[restrict.key] = cost
+
+    def save(self):
+        """Push updated costs to disk, dropping entries for removed packages."""
+        if self._updated:
+            repo = self.options.target_repo
+            costs = {
+                k: v for k, v in self._costs.items()
+                if os.path.isdir(pjoin(repo.location, k))}
+            costs.update(self._updated)
+            self.save_cache(caches.DictCache(costs, self.cache), self.cache_file(repo))
+            self._updated = {}
+
+
+class IncrementalCache(caches.DictCache):
+    """Cache of per-package check contributions with the commits they were generated for."""
+
+    def __init__(self, data, cache, commits=None):
+        super().__init__(data, cache)
+        self.commits = commits if commits is not None else {}
+
+
+class IncrementalAddon(caches.CachedAddon):
+    """Per-package contributions to repo-level checks for incremental scans.
+
+    Aggregate checks generate their results from data contributed by every
+    package in the repo. When running incremental scans via the --incremental
+    option, these contributions are stored alongside the commit they were
+    generated for so following scans only have to recollect data for packages
+    changed since then.
+    """
+
+    # cache registry
+    cache = caches.CacheData(type='incremental', file='incremental.db', version=2)
 
     def __init__(self, *args):
         super().__init__(*args)
-        lib_path = pjoin(os.path.dirname(__file__), '_bash-lang.so')
-        if not os.path.exists(lib_path):
-            # dynamically build lib when running in git repo
-            bash_lib = pjoin(const.REPO_PATH, 'tree-sitter-bash')
-            Language.build_library(lib_path, [bash_lib])
+        self._updated = {}
+
+    @staticmethod
+    def check_args(parser, namespace):
+        if getattr(namespace, 'incremental', None) and not namespace.cache['incremental']:
+            parser.error('--incremental requires the incremental cache to be enabled')
+
+    def update_cache(self, force=False):
+        """Existing contributions are loaded while determining incremental scan targets."""
+
+    def cached(self):
+        """Return the existing incremental cache for the target repo if it exists."""
+        return self.load_cache(self.cache_file(self.options.target_repo))
+
+    def patch(self, check, contributions):
+        """Merge contributions for changed packages into the cached data for a check.
+
+        When not running incremental scans, the given contributions are
+        returned unaltered. Otherwise, the merged contributions are returned
+        and queued to be pushed to disk via :meth:`save`.
+        """
+        if not getattr(self.options, 'incremental', None):
+            return contributions
+
+        name = check.__class__.__name__
+        data = {}
+        if (cached := self.options.incremental_cache) is not None:
+            data.update(cached[name])
+            # drop existing data for changed packages, including removed ones
+            for key in self.options.incremental_pkgs:
+                data.pop(key, None)
+        data.update(contributions)
+
+        self._updated[name] = data
+        return data
+
+    def save(self):
+        """Push patched check data to disk for use by future incremental scans.
+
+        Existing data for checks that weren't run is kept alongside the
+        commit it was generated for.
+        """
+        if not self._updated:
+            return
+
+        commit = self.options.incremental_commit
+        if (cached := self.cached()) is not None:
+            data = {k: v for k, v in cached.items() if k not in self._updated}
+            commits = {k: v for k, v in cached.commits.items() if k in data}
+        else:
+            data, commits = {}, {}
+        data.update(self._updated)
+        commits.update((k, commit) for k in self._updated)
 
-        self.bash_lang = Language(lib_path, 'bash')
-        self.query = partial(self.bash_lang.query)
-        self.parser = Parser()
-        self.parser.set_language(self.bash_lang)
+        cache = IncrementalCache(data, self.cache, commits=commits)
+        self.save_cache(cache, self.cache_file(self.options.target_repo))
+        self._updated = {}
 
 
 def init_addon(cls, options, addons_map=None):
@@ -681,6 +1684,7 @@ def init_addon(cls, options, addons_map=None):
         # force cache updates
         force_cache = getattr(options, 'force_cache', False)
         if isinstance(addon, caches.CachedAddon):
-            addon.update_cache(force=force_cache)
+            with get_tracer(options).span(f'update {addon.cache.type} cache'):
+                addon.update_cache(force=force_cache)
 
     return addon
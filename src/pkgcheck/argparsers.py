@@ -31,17 +31,23 @@ class EnableNet(argparse.Action):
 
 
 class CacheNegations(arghparse.CommaSeparatedNegations):
-    """Split comma-separated enabled and disabled cache types."""
+    """Split comma-separated enabled and disabled cache types.
 
-    caches = ImmutableDict({cache.type: True for cache in CachedAddon.caches.values()})
+    When all_caches is enabled, caches disabled by default are also targeted
+    if no cache types are explicitly enabled.
+    """
 
-    def __init__(self, *args, **kwargs):
+    caches = ImmutableDict({
+        cache.type: cache.default for cache in CachedAddon.caches.values()})
+
+    def __init__(self, *args, all_caches=False, **kwargs):
+        self.all_caches = all_caches
         # delay setting default since it has to be mutable
         default = arghparse.DelayedValue(self._cache_defaults, 100)
         super().__init__(*args, default=default, **kwargs)
 
     def _cache_defaults(self, namespace, attr):
-        setattr(namespace, attr, dict(self.caches))
+        setattr(namespace, attr, {k: v or self.all_caches for k, v in self.caches.items()})
 
     def parse_values(self, values):
         all_cache_types = {cache.type for cache in CachedAddon.caches.values()}
@@ -53,7 +59,9 @@ class CacheNegations(arghparse.CommaSeparatedNegations):
         else:
             disabled, enabled = super().parse_values(values)
         disabled = set(disabled)
-        enabled = set(enabled) if enabled else all_cache_types
+        # fallback to caches enabled by default when none are explicitly enabled
+        enabled = set(enabled) if enabled else {
+            k for k, v in self.caches.items() if v or self.all_caches}
         if unknown := (disabled | enabled) - all_cache_types:
             unknowns = ', '.join(map(repr, unknown))
             choices = ', '.join(map(repr, sorted(self.caches)))
@@ -44,6 +44,11 @@ class Scope:
     def __hash__(self):
         return hash(self.desc)
 
+    def __reduce__(self):
+        # unpickle to the module-level singletons so identity checks work
+        # against scopes passed between processes
+        return f'{self.desc}_scope'
+
     def __repr__(self):
         address = '@%#8x' % (id(self),)
         return f'<{self.__class__.__name__} desc={self.desc!r} {address}>'
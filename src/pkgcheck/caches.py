@@ -5,14 +5,18 @@ import os
 import pathlib
 import pickle
 import shutil
+import sqlite3
+import tempfile
 from collections import UserDict
+from collections.abc import MutableMapping
+from contextlib import closing
+from itertools import chain
 from operator import attrgetter
 from typing import NamedTuple
 
 from snakeoil import klass
 from snakeoil.cli.exceptions import UserException
 from snakeoil.compatibility import IGNORED_EXCEPTIONS
-from snakeoil.fileutils import AtomicWriteFile
 from snakeoil.mappings import ImmutableDict
 from snakeoil.osutils import pjoin
 
@@ -25,6 +29,13 @@ class CacheData(NamedTuple):
     type: str
     file: str
     version: int
+    # whether the cache is enabled when not explicitly selected
+    default: bool = True
+
+    @property
+    def legacy_file(self):
+        """Cache file name used by older releases storing pickled caches."""
+        return f'{os.path.splitext(self.file)[0]}.pickle'
 
 
 class Cache:
@@ -41,6 +52,124 @@ class DictCache(UserDict, Cache):
         self._cache = cache
 
 
+def _readonly_db(path):
+    """Open a read-only connection to a given cache database.
+
+    Cache databases are never modified in place so connections are opened
+    as immutable, skipping all locking.
+    """
+    uri = f'{pathlib.Path(os.path.abspath(path)).as_uri()}?mode=ro&immutable=1'
+    return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+
+class _LazyCacheData(MutableMapping):
+    """Mapping lazily loading values from a cache database on access.
+
+    Only the keys are read when the cache is loaded, values are unpickled
+    on first access. Database connections are opened read-only per process
+    so forked processes never share them and only pull the entries they use
+    into memory. Modifications are kept in memory until the cache is saved.
+
+    Saved caches replace the database file instead of modifying it, so the
+    file loaded is pinned by an open file descriptor. Processes opening
+    their own connection after the file was replaced by a concurrent run
+    fall back to a private copy of the pinned file so lookups stay
+    consistent with the loaded keys.
+    """
+
+    # maximum size of memory-mapped I/O for database reads
+    _mmap_size = 2 ** 30
+
+    def __init__(self, path, fd, keys=()):
+        self._path = path
+        self._fd = fd
+        self._db = None
+        self._pid = None
+        self._keys = dict.fromkeys(keys)
+        self._loaded = {}
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        """Close the database connection for the current process and unpin the file."""
+        if self._db is not None and self._pid == os.getpid():
+            self._db.close()
+        self._db = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _pinned(self, path):
+        """Determine if a given path refers to the pinned database file."""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return False
+        pinned = os.fstat(self._fd)
+        return (st.st_dev, st.st_ino) == (pinned.st_dev, pinned.st_ino)
+
+    def _open(self):
+        """Open a connection to the pinned database file."""
+        if self._pinned(self._path):
+            db = _readonly_db(self._path)
+            db.execute('PRAGMA user_version')
+            # a replacement before opening would change the file
+            if self._pinned(self._path):
+                return db
+            db.close()
+
+        # the database was replaced, copy the pinned file for private use
+        with tempfile.NamedTemporaryFile(
+                dir=os.path.dirname(self._path), prefix=f'.{os.path.basename(self._path)}.') as f:
+            offset = 0
+            while data := os.pread(self._fd, 2 ** 20, offset):
+                f.write(data)
+                offset += len(data)
+            f.flush()
+            db = _readonly_db(f.name)
+            # the file is opened on first use and kept open after its removal
+            db.execute('PRAGMA user_version')
+        return db
+
+    def _connect(self):
+        """Return the database connection for the current process."""
+        if self._pid != os.getpid():
+            # connections must not be used across forks
+            self._db = self._open()
+            self._db.execute(f'PRAGMA mmap_size = {self._mmap_size}')
+            self._pid = os.getpid()
+        return self._db
+
+    def __getitem__(self, key):
+        try:
+            return self._loaded[key]
+        except KeyError:
+            if key not in self._keys:
+                raise
+        row = self._connect().execute(
+            'SELECT value FROM data WHERE key = ?', (key,)).fetchone()
+        value = self._loaded[key] = pickle.loads(row[0])
+        return value
+
+    def __setitem__(self, key, value):
+        self._keys[key] = None
+        self._loaded[key] = value
+
+    def __delitem__(self, key):
+        del self._keys[key]
+        self._loaded.pop(key, None)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+
 class CachedAddon(base.Addon):
     """Mixin for addon classes that create/use data caches."""
 
@@ -48,6 +177,8 @@ class CachedAddon(base.Addon):
     cache = None
     # registered cache types
     caches = {}
+    # whether the addon's options are added to the cache subcommand
+    cache_options = True
 
     def __init_subclass__(cls, **kwargs):
         """Register available caches."""
@@ -67,15 +198,33 @@ class CachedAddon(base.Addon):
             repo.repo_id.lstrip(os.sep), self.cache.file)
 
     def load_cache(self, path, fallback=None):
+        """Load a cache from a given database file.
+
+        The database only stores the cache object's attributes and the keys
+        of its data up front, data values are loaded on demand.
+        """
         cache = fallback
         try:
-            with open(path, 'rb') as f:
-                cache = pickle.load(f)
-            if cache.version != self.cache.version:
-                logger.debug(
-                    'forcing %s cache regen due to outdated version', self.cache.type)
-                os.remove(path)
-                cache = fallback
+            if not os.path.exists(path):
+                raise FileNotFoundError(path)
+            # pin the database file, saving caches replaces it
+            data = _LazyCacheData(path, os.open(path, os.O_RDONLY))
+            try:
+                db = data._connect()
+                version = db.execute('PRAGMA user_version').fetchone()[0]
+                if version != self.cache.version:
+                    logger.debug(
+                        'forcing %s cache regen due to outdated version', self.cache.type)
+                    data.close()
+                    os.remove(path)
+                    return fallback
+                cache = pickle.loads(db.execute('SELECT value FROM header').fetchone()[0])
+                data._keys = dict.fromkeys(
+                    k for (k,) in db.execute('SELECT key FROM data ORDER BY rowid'))
+            except Exception:
+                data.close()
+                raise
+            cache.data = data
         except IGNORED_EXCEPTIONS:
             raise
         except FileNotFoundError:
@@ -87,13 +236,43 @@ class CachedAddon(base.Addon):
         return cache
 
     def save_cache(self, data, path):
+        """Atomically write a cache to a given database file.
+
+        The cache object's attributes are stored separately from its data
+        which is stored as a table of individually pickled values, all keys
+        must be strings.
+        """
+        header = data.__class__.__new__(data.__class__)
+        header.__dict__.update(data.__dict__)
+        header.data = {}
+        tmp_path = None
         try:
             os.makedirs(os.path.dirname(path), exist_ok=True)
-            with AtomicWriteFile(path, binary=True) as f:
-                pickle.dump(data, f, protocol=-1)
-        except IOError as e:
-            msg = f'failed dumping {self.cache.type} cache: {path!r}: {e.strerror}'
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(path), prefix=f'.{self.cache.file}.')
+            os.close(fd)
+            with closing(sqlite3.connect(tmp_path)) as db:
+                db.execute(f'PRAGMA user_version = {int(data.version)}')
+                db.execute('CREATE TABLE header (value BLOB)')
+                db.execute('CREATE TABLE data (key TEXT PRIMARY KEY, value BLOB)')
+                db.execute(
+                    'INSERT INTO header VALUES (?)', (pickle.dumps(header, protocol=-1),))
+                db.executemany('INSERT INTO data VALUES (?, ?)', (
+                    (k, pickle.dumps(v, protocol=-1)) for k, v in data.items()))
+                db.commit()
+            os.replace(tmp_path, path)
+            # drop cache files left over from older releases
+            try:
+                os.unlink(pjoin(os.path.dirname(path), self.cache.legacy_file))
+            except FileNotFoundError:
+                pass
+        except (IOError, sqlite3.Error) as e:
+            error = e.strerror if isinstance(e, IOError) else e
+            msg = f'failed dumping {self.cache.type} cache: {path!r}: {error}'
             raise UserException(msg)
+        finally:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
 
     @klass.jit_attr
     def existing_caches(self):
@@ -101,8 +280,9 @@ class CachedAddon(base.Addon):
         caches_map = {}
         repos_dir = pjoin(self.options.cache_dir, 'repos')
         for cache in sorted(self.caches.values(), key=attrgetter('type')):
-            caches_map[cache.type] = tuple(sorted(
-                pathlib.Path(repos_dir).rglob(cache.file)))
+            caches_map[cache.type] = tuple(sorted(chain.from_iterable(
+                pathlib.Path(repos_dir).rglob(x)
+                for x in (cache.file, cache.legacy_file))))
         return ImmutableDict(caches_map)
 
     def remove_caches(self):
@@ -111,6 +111,118 @@ class EclassCacheCheck(Check):
             raise SkipCheck(self, 'eclass cache support required')
 
 
+class ShardedCheck(Check):
+    """Repo-level check run in parallel over disjoint category shards.
+
+    Instead of a single process feeding the entire repo, scanning processes
+    feed separate categories into their own partial accumulators. The
+    partial state of each process is passed back via :meth:`state` and
+    combined using :meth:`merge` before :meth:`finish` generates results from
+    the merged state.
+    """
+
+    scope = base.repo_scope
+
+    def state(self):
+        """Return the picklable partial state accumulated while being fed."""
+        raise NotImplementedError(self.state)
+
+    def merge(self, state):
+        """Merge the partial state accumulated by another process."""
+        raise NotImplementedError(self.merge)
+
+
+class SubtaskCheck(Check):
+    """Location check split into independent subtasks run in parallel.
+
+    Instead of doing all its work in a single :meth:`finish` call, the check
+    declares independent units of work via :meth:`subtasks`, e.g. separate
+    directories, which are distributed across scanning processes that each
+    generate the results for their subtasks using :meth:`run_subtask`.
+    """
+
+    def subtasks(self):
+        """Return picklable identifiers for all independent subtasks."""
+        raise NotImplementedError(self.subtasks)
+
+    def run_subtask(self, subtask):
+        """Yield results for a given subtask."""
+        raise NotImplementedError(self.run_subtask)
+
+    def finish(self):
+        for subtask in self.subtasks():
+            yield from self.run_subtask(subtask)
+
+
+class AggregateCheck(ShardedCheck):
+    """Repo-level check generating results from per-package contributions.
+
+    Instead of tracking state while being fed, the data each package
+    contributes is collected separately and results are generated from the
+    contributions of all packages at the end of the scan. This allows the
+    contributions to be cached and patched for incremental scans.
+    """
+
+    scope = base.repo_scope
+    _source = (sources.RepositoryRepoSource, (), (('source', sources.PackageRepoSource),))
+    required_addons = (addons.IncrementalAddon,)
+
+    def __init__(self, *args, incremental_addon):
+        super().__init__(*args)
+        self.incremental = incremental_addon
+        self.contributions = {}
+
+    def collect(self, pkgs):
+        """Return the data contributed by all versions of a package."""
+        raise NotImplementedError(self.collect)
+
+    def report(self, contributions):
+        """Yield results for a mapping of package keys to their contributions."""
+        raise NotImplementedError(self.report)
+
+    def feed(self, pkgs):
+        self.contributions[pkgs[0].key] = self.collect(pkgs)
+        yield from ()
+
+    def state(self):
+        return self.contributions
+
+    def merge(self, state):
+        self.contributions.update(state)
+
+    def finish(self):
+        contributions = self.incremental.patch(self, self.contributions)
+        yield from self.report(contributions)
+
+
+class LineCheck(Check):
+    """Check handling ebuild lines containing specific strings.
+
+    Instead of every check iterating over all ebuild lines, subclasses define
+    the strings lines must contain via :meth:`line_triggers` and then only
+    iterate over the matching lines found by a scan shared between all line
+    checks via :class:`pkgcheck.addons.LineScannerAddon`.
+    """
+
+    _source = sources.EbuildFileRepoSource
+    required_addons = (addons.LineScannerAddon,)
+
+    def __init__(self, *args, line_scanner_addon):
+        super().__init__(*args)
+        self.line_scanner = line_scanner_addon
+        self.line_scanner.register(self.__class__)
+
+    @classmethod
+    def line_triggers(cls, eapi):
+        """Return the strings any line handled for a given EAPI must contain."""
+        raise NotImplementedError(cls.line_triggers)
+
+    def lines(self, pkg):
+        """Yield tuples of line numbers and lines matching the registered strings."""
+        for lineno in self.line_scanner.scan(pkg).get(self.__class__, ()):
+            yield lineno, pkg.lines[lineno - 1]
+
+
 class AsyncCheck(Check):
     """Check that schedules tasks to be run asynchronously."""
 
@@ -131,6 +243,7 @@ class NetworkCheck(AsyncCheck, OptionalCheck):
             raise SkipCheck(self, 'network checks not enabled')
         self.timeout = self.options.timeout
         self.session = net_addon.session
+        self.net = net_addon
 
 
 class SkipCheck(UserException):
@@ -145,10 +258,14 @@ class SkipCheck(UserException):
         super().__init__(f'{check_name}: {msg}')
 
 
-def init_checks(enabled_addons, options):
-    """Initialize selected checks."""
+def init_checks(enabled_addons, options, addons_map=None):
+    """Initialize selected checks.
+
+    Initialized addons are stored in the given mapping if one is passed.
+    """
     enabled = defaultdict(list)
-    addons_map = {}
+    if addons_map is None:
+        addons_map = {}
     source_map = {}
 
     # initialize required caches before other addons
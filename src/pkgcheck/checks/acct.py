@@ -6,10 +6,11 @@ from functools import partial
 from itertools import chain
 
 from pkgcore.ebuild import restricts
+from pkgcore.ebuild.cpv import VersionedCPV
 from pkgcore.restrictions import packages
 
-from .. import base, results, sources
-from . import Check
+from .. import addons, base, results, sources
+from . import ShardedCheck
 
 
 class MissingAccountIdentifier(results.VersionResult, results.Warning):
@@ -55,7 +56,7 @@ class OutsideRangeAccountIdentifier(results.VersionResult, results.Error):
             f"static allocation range (0..499, 60001+)")
 
 
-class AcctCheck(Check):
+class AcctCheck(ShardedCheck):
     """Various checks for acct-* packages.
 
     Verify that acct-* packages do not use conflicting, invalid or out-of-range
@@ -66,13 +67,15 @@ class AcctCheck(Check):
     _restricted_source = (sources.RestrictionRepoSource, (packages.OrRestriction(*(
         restricts.CategoryDep('acct-user'), restricts.CategoryDep('acct-group'))),))
     _source = (sources.RepositoryRepoSource, (), (('source', _restricted_source),))
+    required_addons = (addons.ContentAddon,)
     known_results = frozenset([
         MissingAccountIdentifier, ConflictingAccountIdentifiers,
         OutsideRangeAccountIdentifier,
     ])
 
-    def __init__(self, *args):
+    def __init__(self, *args, content_addon):
         super().__init__(*args)
+        self.content = content_addon
         self.id_re = re.compile(
             r'ACCT_(?P<var>USER|GROUP)_ID=(?P<quot>[\'"]?)(?P<id>[0-9]+)(?P=quot)')
         self.seen_uids = defaultdict(partial(defaultdict, list))
@@ -88,7 +91,7 @@ class AcctCheck(Check):
         except KeyError:
             return
 
-        for line in pkg.ebuild.text_fileobj():
+        for line in self.content.ebuild(pkg).lines:
             m = self.id_re.match(line)
             if m is not None and m.group('var') == expected_var:
                 found_id = int(m.group('id'))
@@ -103,7 +106,17 @@ class AcctCheck(Check):
             yield OutsideRangeAccountIdentifier(expected_var.lower(), found_id, pkg=pkg)
             return
 
-        seen_id_map[found_id][pkg.key].append(pkg)
+        # track picklable CPVs so partial states can be merged across processes
+        seen_id_map[found_id][pkg.key].append(VersionedCPV(pkg.cpvstr))
+
+    def state(self):
+        return self.seen_uids, self.seen_gids
+
+    def merge(self, state):
+        for seen, partial_seen in zip((self.seen_uids, self.seen_gids), state):
+            for found_id, pkgs in partial_seen.items():
+                for key, cpvs in pkgs.items():
+                    seen[found_id][key].extend(cpvs)
 
     def finish(self):
         # report overlapping ID usage
@@ -10,7 +10,7 @@ from snakeoil.strings import pluralism
 
 from .. import eclass as eclass_mod
 from .. import addons, results, sources
-from . import Check
+from . import Check, LineCheck
 
 PREFIX_VARIABLES = ('EROOT', 'ED', 'EPREFIX')
 PATH_VARIABLES = ('BROOT', 'ROOT', 'D') + PREFIX_VARIABLES
@@ -61,16 +61,15 @@ class BannedEapiCommand(_EapiCommandResult, results.Error):
     _status = 'banned'
 
 
-class BadCommandsCheck(Check):
+class BadCommandsCheck(LineCheck):
     """Scan ebuild for various deprecated and banned command usage."""
 
-    _source = sources.EbuildFileRepoSource
     known_results = frozenset([DeprecatedEapiCommand, BannedEapiCommand])
 
     CMD_USAGE_REGEX = r'^(\s*|.*[|&{{(]+\s*)\b(?P<cmd>{})(?!\.)\b'
 
-    def __init__(self, *args):
-        super().__init__(*args)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         self.regexes = self._create_regexes()
 
     def _cmds_regex(self, cmds):
@@ -95,9 +94,13 @@ class BadCommandsCheck(Check):
             d[eapi_str] = tuple(regexes)
         return ImmutableDict(d)
 
+    @classmethod
+    def line_triggers(cls, eapi):
+        return eapi.bash_cmds_banned | eapi.bash_cmds_deprecated
+
     def feed(self, pkg):
         regexes = self.regexes[str(pkg.eapi)]
-        for lineno, line in enumerate(pkg.lines, 1):
+        for lineno, line in self.lines(pkg):
             line = line.strip()
             if not line:
                 continue
@@ -161,10 +164,9 @@ class DoublePrefixInPath(results.VersionResult, results.Error):
         return f'{self.match}: concatenates two paths containing EPREFIX on line{s} {lines}'
 
 
-class PathVariablesCheck(Check):
+class PathVariablesCheck(LineCheck):
     """Scan ebuild for path variables with various issues."""
 
-    _source = sources.EbuildFileRepoSource
     known_results = frozenset([MissingSlash, UnnecessarySlashStrip, DoublePrefixInPath])
     prefixed_dir_functions = (
         'insinto', 'exeinto',
@@ -205,8 +207,8 @@ class PathVariablesCheck(Check):
         'PYTHON_CONFIG', 'PYTHON_SCRIPTDIR',
     )
 
-    def __init__(self, *args):
-        super().__init__(*args)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         self.missing_regex = re.compile(r'(\${(%s)})"?\w+/' % r'|'.join(PATH_VARIABLES))
         self.unnecessary_regex = re.compile(r'(\${(%s)%%/})' % r'|'.join(PATH_VARIABLES))
         self.double_prefix_regex = re.compile(
@@ -225,12 +227,17 @@ class PathVariablesCheck(Check):
                 r'|'.join(self.prefixed_getters),
                 r'|'.join(self.prefixed_rhs_variables)))
 
+    @classmethod
+    def line_triggers(cls, eapi):
+        yield from (f'${{{x}' for x in PATH_VARIABLES)
+        yield from cls.prefixed_dir_functions
+
     def feed(self, pkg):
         missing = defaultdict(list)
         unnecessary = defaultdict(list)
         double_prefix = defaultdict(list)
 
-        for lineno, line in enumerate(pkg.lines, 1):
+        for lineno, line in self.lines(pkg):
             line = line.strip()
             if not line:
                 continue
@@ -271,24 +278,27 @@ class AbsoluteSymlink(results.LineResult, results.Warning):
         return f"dosym called with absolute path on line {self.lineno}: {self.cmd}"
 
 
-class AbsoluteSymlinkCheck(Check):
+class AbsoluteSymlinkCheck(LineCheck):
     """Scan ebuild for dosym absolute path usage instead of relative."""
 
-    _source = sources.EbuildFileRepoSource
     known_results = frozenset([AbsoluteSymlink])
 
     DIRS = ('bin', 'etc', 'lib', 'opt', 'sbin', 'srv', 'usr', 'var')
 
-    def __init__(self, *args):
-        super().__init__(*args)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         dirs = '|'.join(self.DIRS)
         path_vars = '|'.join(PATH_VARIABLES)
         prefixed_regex = rf'"\${{({path_vars})(%/)?}}(?P<cp>")?(?(cp)\S*|.*?")'
         non_prefixed_regex = rf'(?P<op>["\'])?/({dirs})(?(op).*?(?P=op)|\S*)'
         self.regex = re.compile(rf'^\s*(?P<cmd>dosym\s+({prefixed_regex}|{non_prefixed_regex}))')
 
+    @classmethod
+    def line_triggers(cls, eapi):
+        return ('dosym',)
+
     def feed(self, pkg):
-        for lineno, line in enumerate(pkg.lines, 1):
+        for lineno, line in self.lines(pkg):
             if not line.strip():
                 continue
             if mo := self.regex.match(line):
@@ -310,10 +320,9 @@ class DeprecatedInsinto(results.LineResult, results.Warning):
         )
 
 
-class InsintoCheck(Check):
+class InsintoCheck(LineCheck):
     """Scan ebuild for deprecated insinto usage."""
 
-    _source = sources.EbuildFileRepoSource
     known_results = frozenset([DeprecatedInsinto])
 
     path_mapping = ImmutableDict({
@@ -324,16 +333,20 @@ class InsintoCheck(Check):
         '/usr/share/applications': 'domenu or newmenu from desktop.eclass',
     })
 
-    def __init__(self, *args):
-        super().__init__(*args)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         paths = '|'.join(s.replace('/', '/+') + '/?' for s in self.path_mapping)
         self._insinto_re = re.compile(
             rf'(?P<insinto>insinto[ \t]+(?P<path>{paths})(?!/\w+))(?:$|[/ \t])')
         self._insinto_doc_re = re.compile(
             r'(?P<insinto>insinto[ \t]+/usr/share/doc/(")?\$\{PF?\}(?(2)\2)(/\w+)*)(?:$|[/ \t])')
 
+    @classmethod
+    def line_triggers(cls, eapi):
+        return ('insinto',)
+
     def feed(self, pkg):
-        for lineno, line in enumerate(pkg.lines, 1):
+        for lineno, line in self.lines(pkg):
             if not line.strip():
                 continue
             matches = self._insinto_re.search(line)
@@ -375,10 +388,9 @@ class ObsoleteUri(results.VersionResult, results.Warning):
                 f"{self.line}, should be replaced by: {self.replacement}")
 
 
-class ObsoleteUriCheck(Check):
+class ObsoleteUriCheck(LineCheck):
     """Scan ebuild for obsolete URIs."""
 
-    _source = sources.EbuildFileRepoSource
     known_results = frozenset([ObsoleteUri])
 
     REGEXPS = (
@@ -391,14 +403,18 @@ class ObsoleteUriCheck(Check):
          r'\g<prefix>-/archive/\g<ref>/\g<pkg>-\g<ref>.\g<format>'),
     )
 
-    def __init__(self, *args):
-        super().__init__(*args)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         self.regexes = []
         for regexp, repl in self.REGEXPS:
             self.regexes.append((re.compile(regexp), repl))
 
+    @classmethod
+    def line_triggers(cls, eapi):
+        return ('github.com', 'gitlab.com')
+
     def feed(self, pkg):
-        for lineno, line in enumerate(pkg.lines, 1):
+        for lineno, line in self.lines(pkg):
             if not line.strip() or line.startswith('#'):
                 continue
             # searching for multiple matches on a single line is too slow
@@ -564,9 +580,9 @@ class InheritsCheck(Check):
     _source = sources.EbuildParseRepoSource
     known_results = frozenset([
         MissingInherits, IndirectInherits, UnusedInherits, InternalEclassFunc])
-    required_addons = (addons.BashAddon, eclass_mod.EclassAddon)
+    required_addons = (addons.CommandsAddon, eclass_mod.EclassAddon)
 
-    def __init__(self, *args, bash_addon, eclass_addon):
+    def __init__(self, *args, commands_addon, eclass_addon):
         super().__init__(*args)
         self.eclass_cache = eclass_addon.eclasses
         self.internal_funcs = {}
@@ -588,20 +604,15 @@ class InheritsCheck(Check):
             self.eapi_funcs[eapi].update(eapi.bash_cmds_internal)
             self.eapi_funcs[eapi].update(eapi.bash_cmds_deprecated)
 
-        # query bash parse tree for command calls
-        self.cmd_query = bash_addon.query("""(command) @call""")
+        self.commands = commands_addon
 
     def feed(self, pkg):
         full_inherit = set(pkg.inherited)
         used = defaultdict(list)
 
-        # iterate over parse tree captures, matching commands with eclasses
-        for call_node, _name in self.cmd_query.captures(pkg.tree.root_node):
-            name_node = call_node.child_by_field_name('name')
-            call = pkg.data[call_node.start_byte:call_node.end_byte].decode('utf8')
-            name = pkg.data[name_node.start_byte:name_node.end_byte].decode('utf8')
+        # iterate over called commands, matching them with eclasses
+        for name, lineno, call in self.commands.get(pkg):
             if name not in self.eapi_funcs[pkg.eapi]:
-                lineno, colno = name_node.start_point
                 eclass = self.exported_funcs[name]
                 if not eclass:
                     # probably an external command
@@ -612,7 +623,7 @@ class InheritsCheck(Check):
                         # TODO: yield multiple inheritance result
                         continue
                     eclass = inherited
-                used[next(iter(eclass))].append((lineno + 1, call))
+                used[next(iter(eclass))].append((lineno, call))
 
         direct_inherit = set(pkg.inherit)
         # allowed indirect inherits
@@ -673,28 +684,36 @@ class RedundantDodir(results.LineResult, results.Warning):
         return f"dodir called before {self.cmd}, line {self.lineno}: {self.line}"
 
 
-class RedundantDodirCheck(Check):
+class RedundantDodirCheck(LineCheck):
     """Scan ebuild for redundant dodir usage."""
 
-    _source = sources.EbuildFileRepoSource
     known_results = frozenset([RedundantDodir])
 
-    def __init__(self, *args):
-        super().__init__(*args)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         cmds = r'|'.join(('insinto', 'exeinto', 'docinto'))
         self.cmds_regex = re.compile(rf'^\s*(?P<cmd>({cmds}))\s+(?P<path>\S+)')
         self.dodir_regex = re.compile(r'^\s*(?P<call>dodir\s+(?P<path>\S+))')
 
+    @classmethod
+    def line_triggers(cls, eapi):
+        return ('dodir',)
+
     def feed(self, pkg):
-        lines = enumerate(pkg.lines, 1)
-        for lineno, line in lines:
+        # line following the last matching dodir call
+        next_lineno = 0
+        for lineno, line in self.lines(pkg):
             line = line.strip()
-            if not line or line[0] == '#':
+            if lineno == next_lineno or not line or line[0] == '#':
                 continue
             if dodir := self.dodir_regex.match(line):
-                lineno, line = next(lines)
+                next_lineno = lineno + 1
+                try:
+                    line = pkg.lines[lineno]
+                except IndexError:
+                    break
                 if cmd := self.cmds_regex.match(line):
                     if dodir.group('path') == cmd.group('path'):
                         yield RedundantDodir(
                             cmd.group('cmd'), line=dodir.group('call'),
-                            lineno=lineno - 1, pkg=pkg)
+                            lineno=lineno, pkg=pkg)
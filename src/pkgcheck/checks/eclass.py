@@ -2,8 +2,6 @@ import shlex
 import subprocess
 
 from pkgcore.ebuild.eapi import EAPI
-from pkgcore.ebuild.eclass import EclassDoc
-from snakeoil.contexts import patch
 from snakeoil.strings import pluralism
 
 from .. import base, results, sources
@@ -147,11 +145,14 @@ class EclassCheck(EclassCacheCheck):
     known_results = frozenset([
         EclassBashSyntaxError, EclassDocError, EclassDocMissingFunc, EclassDocMissingVar])
 
-    def __init__(self, *args):
+    required_addons = (EclassAddon,)
+
+    def __init__(self, *args, eclass_addon):
         super().__init__(*args)
         latest_eapi = EAPI.known_eapis[sorted(EAPI.known_eapis)[-1]]
         self.known_phases = set(latest_eapi.phases_rev)
         self.eclass_keys = latest_eapi.eclass_keys
+        self.eclass_addon = eclass_addon
 
     def feed(self, eclass):
         # check for eclass bash syntax errors
@@ -168,11 +169,10 @@ class EclassCheck(EclassCacheCheck):
             error = ': '.join(error)
             yield EclassBashSyntaxError(lineno, error, eclass=eclass)
 
-        doc_errors = []
-        parsing_error = lambda exc: doc_errors.append(EclassDocError(str(exc), eclass=eclass))
-        with patch('pkgcore.ebuild.eclass._parsing_error', parsing_error):
-            eclass_obj = EclassDoc(eclass.path, sourced=True)
-        yield from doc_errors
+        # reuse the doc info and errors from the eclass cache
+        eclass_obj, doc_errors = self.eclass_addon.doc(eclass.name)
+        for error in doc_errors:
+            yield EclassDocError(error, eclass=eclass)
 
         phase_funcs = {f'{eclass}_{phase}' for phase in self.known_phases}
         # TODO: ignore overridden funcs from other eclasses?
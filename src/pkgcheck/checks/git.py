@@ -3,7 +3,6 @@
 import os
 import re
 import subprocess
-import tarfile
 from collections import defaultdict
 from datetime import datetime
 from itertools import chain
@@ -17,7 +16,7 @@ from snakeoil.cli.exceptions import UserException
 from snakeoil.osutils import pjoin
 from snakeoil.strings import pluralism
 
-from .. import base, git, results, sources
+from .. import addons, base, git, results, sources
 from . import GentooRepoCheck, GitCheck
 from .header import copyright_regex
 
@@ -169,11 +168,98 @@ class MissingMove(results.PackageResult, results.Error):
         return f'renamed package: {self.old} -> {self.new}'
 
 
+class _GitObjects:
+    """Long-lived `git cat-file --batch` process used to extract historical files."""
+
+    # max number of objects requested at once to avoid filling the pipe buffers
+    _batch_size = 256
+    # raw object id lengths for supported repo object formats
+    _id_lengths = {'sha1': 20, 'sha256': 32}
+
+    def __init__(self, path):
+        # repos using non-default hash algorithms declare them in their config
+        p = subprocess.run(
+            ['git', 'config', '--get', 'extensions.objectFormat'], cwd=path,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, encoding='utf8')
+        object_format = p.stdout.strip().lower() or 'sha1'
+        try:
+            self._id_len = self._id_lengths[object_format]
+        except KeyError:
+            raise UserException(f'unsupported git object format: {object_format!r}')
+        self.proc = subprocess.Popen(
+            ['git', 'cat-file', '--batch'], cwd=path,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        """Stop the `git cat-file` process, waiting for it to exit."""
+        proc = getattr(self, 'proc', None)
+        if proc is not None:
+            # the process exits when its input is closed
+            proc.stdin.close()
+            proc.stdout.close()
+            proc.wait()
+            self.proc = None
+
+    def _read(self, objects):
+        """Yield the types and contents for a sequence of git objects."""
+        for i in range(0, len(objects), self._batch_size):
+            batch = objects[i:i + self._batch_size]
+            self.proc.stdin.write(''.join(f'{x}\n' for x in batch).encode())
+            self.proc.stdin.flush()
+            for obj in batch:
+                header = self.proc.stdout.readline().decode().split()
+                # missing objects are returned as '<object> missing'
+                if len(header) != 3:
+                    raise UserException(f'failed populating archive repo: missing object: {obj}')
+                _hash, obj_type, size = header
+                data = self.proc.stdout.read(int(size))
+                # discard trailing newline
+                self.proc.stdout.read(1)
+                yield obj_type, data
+
+    def _tree_entries(self, data):
+        """Yield the hashes, modes, and names for raw git tree object entries."""
+        i = 0
+        while i < len(data):
+            j = data.index(b'\0', i)
+            mode, name = data[i:j].split(b' ', 1)
+            i = j + 1 + self._id_len
+            yield data[j + 1:i].hex(), mode, os.fsdecode(name)
+
+    def extract(self, obj, path):
+        """Recursively write the contents of a given git object to a path.
+
+        All entries for each tree level are requested in a single batch.
+        """
+        pending = [(obj, b'040000', path)]
+        while pending:
+            objects = [x[0] for x in pending]
+            entries, pending = pending, []
+            for (_obj, mode, path), (obj_type, data) in zip(entries, self._read(objects)):
+                if obj_type == 'tree':
+                    os.makedirs(path, exist_ok=True)
+                    pending.extend(
+                        (obj_hash, obj_mode, pjoin(path, name))
+                        for obj_hash, obj_mode, name in self._tree_entries(data)
+                        # skip submodules
+                        if obj_mode != b'160000')
+                elif mode == b'120000':
+                    os.symlink(data, path)
+                else:
+                    with open(path, 'wb') as f:
+                        f.write(data)
+                    if mode == b'100755':
+                        os.chmod(path, 0o755)
+
+
 class _RemovalRepo(UnconfiguredTree):
     """Repository of removed packages stored in a temporary directory."""
 
-    def __init__(self, repo):
-        self.__parent_repo = repo
+    def __init__(self, repo, git_objects):
+        self.__git_objects = git_objects
         self._eclasses = os.path.exists(pjoin(repo.location, 'eclass'))
         self.__tmpdir = TemporaryDirectory()
         self.__created = False
@@ -205,15 +291,8 @@ class _RemovalRepo(UnconfiguredTree):
         if not self.__created and self._eclasses:
             paths.append('eclass')
 
-        old_files = subprocess.Popen(
-            ['git', 'archive', f'{pkg.commit}~1'] + paths,
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-            cwd=self.__parent_repo.location)
-        if old_files.poll():
-            error = old_files.stderr.read().decode().strip()
-            raise UserException(f'failed populating archive repo: {error}')
-        with tarfile.open(mode='r|', fileobj=old_files.stdout) as tar:
-            tar.extractall(path=self.location)
+        for path in paths:
+            self.__git_objects.extract(f'{pkg.commit}~1:{path}', pjoin(self.location, path))
 
 
 class GitPkgCommitsCheck(GentooRepoCheck, GitCheck):
@@ -221,28 +300,34 @@ class GitPkgCommitsCheck(GentooRepoCheck, GitCheck):
 
     scope = base.package_scope
     _source = (sources.PackageRepoSource, (), (('source', GitCommitsRepoSource),))
-    required_addons = (git.GitAddon,)
+    required_addons = (git.GitAddon, addons.ContentAddon)
     known_results = frozenset([
         DirectStableKeywords, DirectNoMaintainer, RdependChange, EbuildIncorrectCopyright,
         DroppedStableKeywords, DroppedUnstableKeywords, MissingSlotmove, MissingMove,
     ])
 
-    def __init__(self, *args, git_addon):
+    def __init__(self, *args, git_addon, content_addon):
         super().__init__(*args)
         self.today = datetime.today()
         self.repo = self.options.target_repo
         self.valid_arches = self.options.target_repo.known_arches
         self._git_addon = git_addon
+        self.content = content_addon
+
+    @klass.jit_attr
+    def git_objects(self):
+        """Start a `git cat-file` process to extract historical files."""
+        return _GitObjects(self.repo.location)
 
     @klass.jit_attr
     def removal_repo(self):
         """Create a repository of packages removed from git."""
-        return _RemovalRepo(self.repo)
+        return _RemovalRepo(self.repo, self.git_objects)
 
     @klass.jit_attr
     def modified_repo(self):
         """Create a repository of old packages newly modified in git."""
-        return _RemovalRepo(self.repo)
+        return _RemovalRepo(self.repo, self.git_objects)
 
     @klass.jit_attr
     def added_repo(self):
@@ -355,8 +440,8 @@ class GitPkgCommitsCheck(GentooRepoCheck, GitCheck):
             # pull actual package object from repo
             try:
                 pkg = next(self.repo.itermatch(git_pkg.versioned_atom))
-                line = next(pkg.ebuild.text_fileobj())
-            except StopIteration:
+                line = self.content.ebuild(pkg).lines[0]
+            except (StopIteration, IndexError):
                 # ignore probable broken ebuild
                 continue
 
@@ -715,15 +715,16 @@ class InvalidBdepend(results.MetadataError, results.VersionResult):
 class DependencyCheck(Check):
     """Check BDEPEND, DEPEND, RDEPEND, and PDEPEND."""
 
-    required_addons = (addons.UseAddon, git.GitAddon)
+    required_addons = (addons.UseAddon, git.GitAddon, addons.RepoIndexAddon)
     known_results = frozenset([
         BadDependency, MissingPackageRevision, MissingUseDepDefault,
         OutdatedBlocker, NonexistentBlocker, UnstatedIuse, DeprecatedDep,
         InvalidDepend, InvalidRdepend, InvalidPdepend, InvalidBdepend,
     ])
 
-    def __init__(self, *args, use_addon, git_addon):
+    def __init__(self, *args, use_addon, git_addon, repo_index_addon):
         super().__init__(*args)
+        self.repo_index = repo_index_addon
         self.deprecated = self.options.target_repo.deprecated.match
         self.iuse_filter = use_addon.get_filter()
         self.conditional_ops = {'?', '='}
@@ -742,7 +743,7 @@ class DependencyCheck(Check):
             stripped_use.append(x.lstrip('!-'))
         if stripped_use:
             missing_use_deps = defaultdict(set)
-            for pkg in self.options.search_repo.match(atom.no_usedeps):
+            for pkg in self.repo_index.match(atom.no_usedeps):
                 for use in stripped_use:
                     if use not in pkg.iuse_effective:
                         missing_use_deps[use].add(pkg.versioned_atom)
@@ -805,7 +806,7 @@ class DependencyCheck(Check):
                             else:
                                 atom_str = atom.op + atom.cpvstr
                             unblocked = atom_cls(atom_str)
-                            if not self.options.search_repo.match(unblocked):
+                            if not self.repo_index.has_match(unblocked):
                                 if matches := self.existence_repo.match(unblocked):
                                     removal = max(x.date for x in matches)
                                     removal = datetime.strptime(removal, '%Y-%m-%d')
@@ -7,7 +7,7 @@ from pkgcore.ebuild.atom import MalformedAtom, atom
 from snakeoil.osutils import pjoin
 from snakeoil.strings import pluralism
 
-from .. import base, results, sources
+from .. import addons, base, results, sources
 from . import Check
 
 
@@ -279,13 +279,15 @@ class _XmlBaseCheck(Check):
     """Base class for metadata.xml scans."""
 
     schema = None
+    required_addons = (addons.RepoIndexAddon,)
 
     misformed_error = None
     invalid_error = None
     missing_error = None
 
-    def __init__(self, *args):
+    def __init__(self, *args, repo_index_addon):
         super().__init__(*args)
+        self.repo_index = repo_index_addon
         self.repo_base = self.options.target_repo.location
         self.pkgref_cache = {}
         # content validation checks to run after parsing XML doc
@@ -324,7 +326,7 @@ class _XmlBaseCheck(Check):
             if p not in self.pkgref_cache:
                 try:
                     a = atom(p)
-                    found = self.options.search_repo.has_match(a)
+                    found = self.repo_index.has_match(a)
                 except MalformedAtom:
                     found = False
                 self.pkgref_cache[p] = found
@@ -1,7 +1,9 @@
 """Various checks that require network support."""
 
 import socket
+import time
 import traceback
+import urllib.parse
 import urllib.request
 from functools import partial
 
@@ -32,6 +34,10 @@ class DeadUrl(_UrlResult):
     """Package with a dead URL of some type."""
 
 
+class UnresponsiveUrl(_UrlResult):
+    """Package with a URL that wasn't checked since its host repeatedly timed out."""
+
+
 class SSLCertificateError(_UrlResult):
     """Package with https:// HOMEPAGE with an invalid SSL cert."""
 
@@ -95,76 +101,109 @@ class RequestError(_RequestException):
     """Wrapper for generic requests exception."""
 
 
+class HostUnresponsive(RequestError):
+    """Request skipped since its host repeatedly timed out."""
+
+
 class _UrlCheck(NetworkCheck):
     """Generic URL verification check requiring network support."""
 
     known_results = frozenset([
-        DeadUrl, RedirectedUrl, HttpsUrlAvailable, SSLCertificateError,
+        DeadUrl, RedirectedUrl, HttpsUrlAvailable, SSLCertificateError, UnresponsiveUrl,
     ])
 
-    def _http_check(self, attr, url, *, pkg):
-        """Verify http:// and https:// URLs."""
-        result = None
-        try:
-            r = self.session.head(url, allow_redirects=True)
+    def _head(self, url, verdict):
+        """Return the verdict for a HEAD request against a given URL.
 
-            redirected_url = None
+        Previous verdicts are reused until they expire, afterwards they're
+        rechecked using conditional requests if possible.
+        """
+        if not self.net.expired(verdict):
+            return verdict
+
+        headers = {}
+        if verdict is not None and verdict.error is None:
+            if verdict.etag is not None:
+                headers['If-None-Match'] = verdict.etag
+            if verdict.last_modified is not None:
+                headers['If-Modified-Since'] = verdict.last_modified
+
+        try:
+            r = self.session.head(url, allow_redirects=True, headers=headers)
+            redirects = []
             for response in r.history:
                 if not response.is_permanent_redirect:
                     break
-                redirected_url = response.headers['location']
-                hsts = 'strict-transport-security' in response.headers
-
-            if redirected_url:
-                if redirected_url.startswith('https://') and url.startswith('http://'):
-                    result = HttpsUrlAvailable(attr, url, redirected_url, pkg=pkg)
-                elif redirected_url.startswith('http://') and hsts:
-                    redirected_url = f'https://{redirected_url[7:]}'
-                    result = RedirectedUrl(attr, url, redirected_url, pkg=pkg)
-                else:
-                    result = RedirectedUrl(attr, url, redirected_url, pkg=pkg)
+                redirects.append((
+                    response.headers['location'],
+                    'strict-transport-security' in response.headers))
+            verdict = addons.UrlVerdict(
+                time.time(), tuple(redirects),
+                etag=r.headers.get('etag'), last_modified=r.headers.get('last-modified'))
         except SSLError as e:
-            result = SSLCertificateError(attr, url, str(e), pkg=pkg)
+            verdict = addons.UrlVerdict(time.time(), error=str(e), ssl_error=True)
+        except HostUnresponsive as e:
+            # skipped requests aren't cached so following scans recheck them
+            return addons.UrlVerdict(time.time(), error=str(e), unresponsive=True)
         except RequestError as e:
-            result = DeadUrl(attr, url, str(e), pkg=pkg)
+            verdict = addons.UrlVerdict(time.time(), error=str(e))
+
+        self.net.update(url, verdict)
+        return verdict
+
+    def _http_check(self, attr, url, *, verdict, pkg):
+        """Verify http:// and https:// URLs."""
+        result = None
+        verdict = self._head(url, verdict)
+        if verdict.ssl_error:
+            result = SSLCertificateError(attr, url, verdict.error, pkg=pkg)
+        elif verdict.unresponsive:
+            result = UnresponsiveUrl(attr, url, verdict.error, pkg=pkg)
+        elif verdict.error is not None:
+            result = DeadUrl(attr, url, verdict.error, pkg=pkg)
+        elif verdict.redirects:
+            redirected_url, hsts = verdict.redirects[-1]
+            if redirected_url.startswith('https://') and url.startswith('http://'):
+                result = HttpsUrlAvailable(attr, url, redirected_url, pkg=pkg)
+            elif redirected_url.startswith('http://') and hsts:
+                redirected_url = f'https://{redirected_url[7:]}'
+                result = RedirectedUrl(attr, url, redirected_url, pkg=pkg)
+            else:
+                result = RedirectedUrl(attr, url, redirected_url, pkg=pkg)
         return result
 
-    def _https_available_check(self, attr, url, *, future, orig_url, pkg):
+    def _https_available_check(self, attr, url, *, verdict, future, orig_url, pkg):
         """Check if https:// alternatives exist for http:// URLs."""
         result = None
-        try:
-            r = self.session.head(url, allow_redirects=True)
-
-            redirected_url = None
-            for response in r.history:
-                if not response.is_permanent_redirect:
-                    break
-                redirected_url = response.headers['location']
-                hsts = 'strict-transport-security' in response.headers
-
-            # skip result if http:// URL check was redirected to https://
-            if not isinstance(future.result(), HttpsUrlAvailable):
-                if redirected_url:
-                    if redirected_url.startswith('https://'):
-                        result = HttpsUrlAvailable(attr, orig_url, redirected_url, pkg=pkg)
-                    elif redirected_url.startswith('http://') and hsts:
-                        redirected_url = f'https://{redirected_url[7:]}'
-                        result = HttpsUrlAvailable(attr, orig_url, redirected_url, pkg=pkg)
-                else:
-                    result = HttpsUrlAvailable(attr, orig_url, url, pkg=pkg)
-        except (RequestError, SSLError):
-            pass
+        verdict = self._head(url, verdict)
+        # skip result if http:// URL check was redirected to https://
+        if verdict.error is None and not isinstance(future.result(), HttpsUrlAvailable):
+            if verdict.redirects:
+                redirected_url, hsts = verdict.redirects[-1]
+                if redirected_url.startswith('https://'):
+                    result = HttpsUrlAvailable(attr, orig_url, redirected_url, pkg=pkg)
+                elif redirected_url.startswith('http://') and hsts:
+                    redirected_url = f'https://{redirected_url[7:]}'
+                    result = HttpsUrlAvailable(attr, orig_url, redirected_url, pkg=pkg)
+            else:
+                result = HttpsUrlAvailable(attr, orig_url, url, pkg=pkg)
         return result
 
-    def _ftp_check(self, attr, url, *, pkg):
+    def _ftp_check(self, attr, url, *, verdict, pkg):
         """Verify ftp:// URLs with urllib."""
+        if self.net.expired(verdict):
+            verdict = addons.UrlVerdict(time.time())
+            try:
+                urllib.request.urlopen(url, timeout=self.timeout)
+            except urllib.error.URLError as e:
+                verdict = verdict._replace(error=str(e.reason))
+            except socket.timeout as e:
+                verdict = verdict._replace(error=str(e))
+            self.net.update(url, verdict)
+
         result = None
-        try:
-            urllib.request.urlopen(url, timeout=self.timeout)
-        except urllib.error.URLError as e:
-            result = DeadUrl(attr, url, str(e.reason), pkg=pkg)
-        except socket.timeout as e:
-            result = DeadUrl(attr, url, str(e), pkg=pkg)
+        if verdict.error is not None:
+            result = DeadUrl(attr, url, verdict.error, pkg=pkg)
         return result
 
     def task_done(self, pkg, future):
@@ -193,11 +232,22 @@ class _UrlCheck(NetworkCheck):
 
         Note that this tries to avoid hitting the network for the same URL
         twice using a mapping from requested URLs to future objects, adding
-        result-checking callbacks to the futures of existing URLs.
+        result-checking callbacks to the futures of existing URLs. Cached
+        verdicts are pulled here since they're loaded on demand and can't be
+        accessed from other threads. Running requests are limited per host by
+        the executor so slow hosts can't tie up all its threads.
         """
         future = futures.get(url)
         if future is None:
-            future = executor.submit(func, attr, url, **kwargs)
+            verdict = self.net.get(url)
+            try:
+                host = urllib.parse.urlsplit(url).hostname
+            except ValueError:
+                host = None
+            # run dependent checks once the URL check they rely on is done
+            future = executor.submit(
+                func, attr, url, verdict=verdict, key=host,
+                after=kwargs.get('future'), **kwargs)
             future.add_done_callback(partial(self.task_done, None))
             futures[url] = future
         else:
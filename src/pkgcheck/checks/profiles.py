@@ -15,7 +15,7 @@ from snakeoil.sequences import iflatten_instance
 from snakeoil.strings import pluralism
 
 from .. import addons, base, results, sources
-from . import Check
+from . import Check, SubtaskCheck
 
 
 class UnknownProfilePackages(results.ProfilesResult, results.Warning):
@@ -92,7 +92,7 @@ class _ProfileNode(profiles_mod.ProfileNode):
     """Re-inherited to disable instance caching."""
 
 
-class ProfilesCheck(Check):
+class ProfilesCheck(SubtaskCheck):
     """Scan repo profiles for unknown flags/packages."""
 
     required_addons = (addons.UseAddon,)
@@ -127,7 +127,13 @@ class ProfilesCheck(Check):
             local_iuse | self.iuse_handler.global_iuse |
             self.iuse_handler.global_iuse_expand | self.iuse_handler.global_iuse_implicit)
 
-    def finish(self):
+    def subtasks(self):
+        # each profile directory is scanned separately
+        return [
+            root for root, _dirs, _files in os.walk(self.profiles_dir)
+            if root not in self.non_profile_dirs]
+
+    def run_subtask(self, root):
         unknown_pkgs = defaultdict(lambda: defaultdict(list))
         unknown_pkg_use = defaultdict(lambda: defaultdict(list))
         unknown_use = defaultdict(lambda: defaultdict(list))
@@ -213,17 +219,16 @@ class ProfilesCheck(Check):
         report_profile_warnings = lambda x: profile_reports.append(ProfileWarning(x))
         report_profile_errors = lambda x: profile_reports.append(ProfileError(x))
 
-        for root, _dirs, files in os.walk(self.profiles_dir):
-            if root not in self.non_profile_dirs:
-                profile = _ProfileNode(root)
-                for f in set(files).intersection(file_parse_map.keys()):
-                    attr, func = file_parse_map[f]
-                    # convert log warnings/errors into reports
-                    with patch('pkgcore.log.logger.error', report_profile_errors), \
-                            patch('pkgcore.log.logger.warning', report_profile_warnings):
-                        vals = getattr(profile, attr)
-                    if results := func(f, profile, vals):
-                        yield from results
+        profile = _ProfileNode(root)
+        files = {x.name for x in os.scandir(root) if not x.is_dir()}
+        for f in files.intersection(file_parse_map.keys()):
+            attr, func = file_parse_map[f]
+            # convert log warnings/errors into reports
+            with patch('pkgcore.log.logger.error', report_profile_errors), \
+                    patch('pkgcore.log.logger.warning', report_profile_warnings):
+                vals = getattr(profile, attr)
+            if results := func(f, profile, vals):
+                yield from results
 
         yield from profile_reports
 
@@ -6,7 +6,7 @@ from pkgcore.restrictions.boolean import JustOneRestriction, OrRestriction
 from snakeoil.sequences import iflatten_instance
 from snakeoil.strings import pluralism
 
-from .. import results
+from .. import addons, results
 from . import Check
 
 # NB: distutils-r1 inherits one of the first two
@@ -271,9 +271,11 @@ class PythonCompatCheck(Check):
     """
 
     known_results = frozenset([PythonCompatUpdate])
+    required_addons = (addons.RepoIndexAddon,)
 
-    def __init__(self, *args):
+    def __init__(self, *args, repo_index_addon):
         super().__init__(*args)
+        self.repo_index = repo_index_addon
         repo = self.options.target_repo
 
         # determine available PYTHON_TARGET use flags
@@ -345,8 +347,7 @@ class PythonCompatCheck(Check):
             try:
                 # determine if deps support missing python targets
                 for dep in self.python_deps(deps, prefix):
-                    # TODO: use query caching for repo matching?
-                    latest = sorted(self.options.search_repo.match(dep))[-1]
+                    latest = self.repo_index.match(dep)[-1]
                     targets.intersection_update(
                         f"python{x.rsplit('python', 1)[-1]}"
                         for x in latest.iuse_stripped if x.startswith(prefix))
@@ -5,7 +5,7 @@ from snakeoil.osutils import pjoin
 from .. import base, git, results, sources
 from ..packages import RawCPV
 from ..utils import is_binary
-from . import GentooRepoCheck
+from . import GentooRepoCheck, SubtaskCheck
 
 
 class BinaryFile(results.Error):
@@ -20,7 +20,7 @@ class BinaryFile(results.Error):
         return f"binary file found in repository: {self.path!r}"
 
 
-class RepoDirCheck(GentooRepoCheck):
+class RepoDirCheck(GentooRepoCheck, SubtaskCheck):
     """Scan all files in the repository for issues."""
 
     scope = base.repo_scope
@@ -37,15 +37,26 @@ class RepoDirCheck(GentooRepoCheck):
         self.repo = self.options.target_repo
         self.ignored_paths = {
             pjoin(self.repo.location, x) for x in self.ignored_root_dirs}
-        self.dirs = [self.repo.location]
 
-    def finish(self):
-        while self.dirs:
-            for entry in os.scandir(self.dirs.pop()):
+    def _ignored(self, path):
+        return path in self.ignored_paths or self.gitignored(path)
+
+    def subtasks(self):
+        # files in the repo root are scanned separately from each top-level dir
+        dirs = [self.repo.location]
+        for entry in os.scandir(self.repo.location):
+            if entry.is_dir(follow_symlinks=False) and not self._ignored(entry.path):
+                dirs.append(entry.path)
+        return sorted(dirs)
+
+    def run_subtask(self, path):
+        dirs = [path]
+        while dirs:
+            for entry in os.scandir(dirs.pop()):
                 if entry.is_dir(follow_symlinks=False):
-                    if entry.path in self.ignored_paths or self.gitignored(entry.path):
+                    if path == self.repo.location or self._ignored(entry.path):
                         continue
-                    self.dirs.append(entry.path)
+                    dirs.append(entry.path)
                 elif is_binary(entry.path):
                     if not self.gitignored(entry.path):
                         rel_path = entry.path[len(self.repo.location) + 1:]
@@ -72,7 +83,7 @@ class EmptyPackageDir(results.PackageResult, results.Warning):
         return f'empty package directory: {self.category}/{self.package}'
 
 
-class EmptyDirsCheck(GentooRepoCheck):
+class EmptyDirsCheck(GentooRepoCheck, SubtaskCheck):
     """Scan for empty category or package directories."""
 
     scope = base.repo_scope
@@ -83,12 +94,15 @@ class EmptyDirsCheck(GentooRepoCheck):
         super().__init__(*args)
         self.repo = self.options.target_repo
 
-    def finish(self):
-        for cat, pkgs in sorted(self.repo.packages.items()):
-            # ignore entries in profiles/categories with nonexistent dirs
-            if not pkgs and cat in self.repo.category_dirs:
-                yield EmptyCategoryDir(pkg=RawCPV(cat, None, None))
-                continue
-            for pkg in sorted(pkgs):
-                if not self.repo.versions[(cat, pkg)]:
-                    yield EmptyPackageDir(pkg=RawCPV(cat, pkg, None))
+    def subtasks(self):
+        return sorted(self.repo.packages)
+
+    def run_subtask(self, cat):
+        pkgs = self.repo.packages[cat]
+        # ignore entries in profiles/categories with nonexistent dirs
+        if not pkgs and cat in self.repo.category_dirs:
+            yield EmptyCategoryDir(pkg=RawCPV(cat, None, None))
+            return
+        for pkg in sorted(pkgs):
+            if not self.repo.versions[(cat, pkg)]:
+                yield EmptyPackageDir(pkg=RawCPV(cat, pkg, None))
@@ -9,7 +9,8 @@ from snakeoil.sequences import iflatten_instance
 from snakeoil.strings import pluralism
 
 from .. import addons, base, results, sources
-from . import Check
+from ..packages import RawCPV
+from . import AggregateCheck, Check, ShardedCheck
 
 
 class MultiMovePackageUpdate(results.ProfilesResult, results.Warning):
@@ -166,30 +167,23 @@ class UnusedLicenses(results.Warning):
         return f'unused license{s}: {licenses}'
 
 
-class UnusedLicensesCheck(Check):
+class UnusedLicensesCheck(AggregateCheck):
     """Check for unused license files."""
 
-    scope = base.repo_scope
-    _source = sources.RepositoryRepoSource
     known_results = frozenset([UnusedLicenses])
 
-    def __init__(self, *args):
-        super().__init__(*args)
-        self.unused_licenses = None
+    def collect(self, pkgs):
+        return frozenset(chain.from_iterable(
+            iflatten_instance(pkg.license) for pkg in pkgs))
 
-    def start(self):
+    def report(self, contributions):
         master_licenses = set()
         for repo in self.options.target_repo.masters:
             master_licenses.update(repo.licenses)
-        self.unused_licenses = set(self.options.target_repo.licenses) - master_licenses
-
-    def feed(self, pkg):
-        self.unused_licenses.difference_update(iflatten_instance(pkg.license))
-        yield from ()
-
-    def finish(self):
-        if self.unused_licenses:
-            yield UnusedLicenses(sorted(self.unused_licenses))
+        unused_licenses = set(self.options.target_repo.licenses) - master_licenses
+        unused_licenses.difference_update(*contributions.values())
+        if unused_licenses:
+            yield UnusedLicenses(sorted(unused_licenses))
 
 
 class UnusedMirrors(results.Warning):
@@ -226,7 +220,7 @@ class _MirrorsCheck(Check):
         return set(mirrors)
 
 
-class UnusedMirrorsCheck(_MirrorsCheck):
+class UnusedMirrorsCheck(_MirrorsCheck, ShardedCheck):
     """Check for unused mirrors."""
 
     scope = base.repo_scope
@@ -244,6 +238,13 @@ class UnusedMirrorsCheck(_MirrorsCheck):
             self.unused_mirrors.difference_update(self._get_mirrors(pkg))
         yield from ()
 
+    def state(self):
+        return self.unused_mirrors
+
+    def merge(self, state):
+        # mirrors are only unused if no shard used them
+        self.unused_mirrors.intersection_update(state)
+
     def finish(self):
         if self.unused_mirrors:
             yield UnusedMirrors(sorted(self.unused_mirrors))
@@ -263,31 +264,23 @@ class UnusedEclasses(results.Warning):
         return f'unused eclass{es}: {eclasses}'
 
 
-class UnusedEclassesCheck(Check):
+class UnusedEclassesCheck(AggregateCheck):
     """Check for unused eclasses."""
 
-    scope = base.repo_scope
-    _source = sources.RepositoryRepoSource
     known_results = frozenset([UnusedEclasses])
 
-    def __init__(self, *args):
-        super().__init__(*args)
-        self.unused_eclasses = None
+    def collect(self, pkgs):
+        return frozenset(chain.from_iterable(pkg.inherited for pkg in pkgs))
 
-    def start(self):
+    def report(self, contributions):
         master_eclasses = set()
         for repo in self.options.target_repo.masters:
             master_eclasses.update(repo.eclass_cache.eclasses.keys())
-        self.unused_eclasses = set(
+        unused_eclasses = set(
             self.options.target_repo.eclass_cache.eclasses.keys()) - master_eclasses
-
-    def feed(self, pkg):
-        self.unused_eclasses.difference_update(pkg.inherited)
-        yield from ()
-
-    def finish(self):
-        if self.unused_eclasses:
-            yield UnusedEclasses(sorted(self.unused_eclasses))
+        unused_eclasses.difference_update(*contributions.values())
+        if unused_eclasses:
+            yield UnusedEclasses(sorted(unused_eclasses))
 
 
 class UnknownLicenses(results.Warning):
@@ -392,28 +385,23 @@ def _dfs(graph, start, visited=None):
     return visited
 
 
-class GlobalUseCheck(Check):
+class GlobalUseCheck(AggregateCheck):
     """Check global USE and USE_EXPAND flags for various issues."""
 
-    scope = base.repo_scope
-    _source = (sources.RepositoryRepoSource, (), (('source', sources.PackageRepoSource),))
     required_addons = (addons.UseAddon,)
     known_results = frozenset([
         PotentialLocalUse, PotentialGlobalUse, UnusedGlobalUse, UnusedGlobalUseExpand,
     ])
 
-    def __init__(self, *args, use_addon):
-        super().__init__(*args)
-        self.global_flag_usage = defaultdict(set)
+    def __init__(self, *args, use_addon, **kwargs):
+        super().__init__(*args, **kwargs)
         self.repo = self.options.target_repo
 
-    def feed(self, pkgs):
+    def collect(self, pkgs):
         # ignore bad XML, it will be caught by metadata.xml checks
         local_use = set(pkgs[0].local_use.keys())
-        for pkg in pkgs:
-            for flag in pkg.iuse_stripped.difference(local_use):
-                self.global_flag_usage[flag].add(pkg.unversioned_atom)
-        yield from ()
+        return frozenset(chain.from_iterable(
+            pkg.iuse_stripped.difference(local_use) for pkg in pkgs))
 
     @staticmethod
     def _similar_flags(pkgs):
@@ -450,7 +438,12 @@ class GlobalUseCheck(Check):
             if len(component) >= 5:
                 yield [pkgs[i][0] for i in component]
 
-    def finish(self):
+    def report(self, contributions):
+        global_flag_usage = defaultdict(set)
+        for key, flags in contributions.items():
+            for flag in flags:
+                global_flag_usage[flag].add(key)
+
         repo_global_use = {
             flag for matcher, (flag, desc) in self.repo.config.use_desc}
         repo_global_use_expand = {
@@ -462,14 +455,14 @@ class GlobalUseCheck(Check):
         potential_locals = []
 
         for flag in repo_global_use:
-            pkgs = self.global_flag_usage[flag]
+            pkgs = global_flag_usage[flag]
             if not pkgs:
                 unused_global_use.append(flag)
             elif len(pkgs) < 5:
                 potential_locals.append((flag, pkgs))
 
         for flag in repo_global_use_expand:
-            if not self.global_flag_usage[flag]:
+            if not global_flag_usage[flag]:
                 unused_global_use_expand.append(flag)
 
         if unused_global_use:
@@ -678,27 +671,25 @@ class MatchingChksums(results.VersionResult, results.Warning):
         return msg
 
 
-class ManifestCollisionCheck(Check):
+class ManifestCollisionCheck(AggregateCheck):
     """Search Manifest entries for different types of distfile collisions.
 
     In particular, search for matching filenames with different checksums and
     different filenames with matching checksums.
     """
 
-    scope = base.repo_scope
-    _source = (sources.RepositoryRepoSource, (), (('source', sources.PackageRepoSource),))
     known_results = frozenset([ConflictingChksums, MatchingChksums])
 
-    def __init__(self, *args):
-        super().__init__(*args)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         self.seen_files = {}
         self.seen_chksums = {}
         # ignore go.mod false positives (issue #228)
         self._ignored_files_re = re.compile(r'^.*%2F@v.*\.mod$')
 
-    def _conflicts(self, pkg):
+    def _conflicts(self, pkg, distfiles):
         """Check for similarly named distfiles with different checksums."""
-        for filename, chksums in pkg.manifest.distfiles.items():
+        for filename, chksums in distfiles:
             existing = self.seen_files.get(filename)
             if existing is None:
                 self.seen_files[filename] = (
@@ -717,9 +708,9 @@ class ManifestCollisionCheck(Check):
                 seen_chksums.update(chksums)
                 seen_pkgs.append(pkg.key)
 
-    def _matching(self, pkg):
+    def _matching(self, pkg, distfiles):
         """Check for distfiles with matching checksums and different names."""
-        for filename, chksums in pkg.manifest.distfiles.items():
+        for filename, chksums in distfiles:
             key = tuple(chksums.values())
             existing = self.seen_chksums.get(key)
             if existing is None:
@@ -730,10 +721,20 @@ class ManifestCollisionCheck(Check):
                 continue
             yield MatchingChksums(filename, seen_file, seen_pkg, pkg=pkg)
 
-    def feed(self, pkgs):
+    def collect(self, pkgs):
         pkg = pkgs[0]
-        yield from self._conflicts(pkg)
-        yield from self._matching(pkg)
+        distfiles = tuple(
+            (filename, dict(chksums.items()))
+            for filename, chksums in pkg.manifest.distfiles.items())
+        return (pkg.category, pkg.package, pkg.fullver), distfiles
+
+    def report(self, contributions):
+        # scan packages in repo order
+        for key in sorted(contributions, key=lambda x: x.split('/')):
+            cpv, distfiles = contributions[key]
+            pkg = RawCPV(*cpv)
+            yield from self._conflicts(pkg, distfiles)
+            yield from self._matching(pkg, distfiles)
 
 
 class EmptyProject(results.Warning):
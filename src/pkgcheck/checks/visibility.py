@@ -3,7 +3,6 @@ from operator import attrgetter
 
 from pkgcore.ebuild.atom import atom, transitive_use_atom
 from snakeoil import klass
-from snakeoil.iterables import caching_iter
 from snakeoil.sequences import iflatten_func, iflatten_instance, stable_unique
 from snakeoil.strings import pluralism
 
@@ -189,15 +188,16 @@ class VisibilityCheck(feeds.EvaluateDepSet, feeds.QueryCache, Check):
     keyword.
     """
 
-    required_addons = (addons.ProfileAddon,)
+    required_addons = (addons.ProfileAddon, addons.RepoIndexAddon)
     known_results = frozenset([
         VisibleVcsPkg, NonexistentDeps, UncheckableDep,
         NonsolvableDepsInStable, NonsolvableDepsInDev, NonsolvableDepsInExp,
     ])
 
-    def __init__(self, *args, profile_addon):
+    def __init__(self, *args, profile_addon, repo_index_addon):
         super().__init__(*args, profile_addon=profile_addon)
         self.profiles = profile_addon
+        self.repo_index = repo_index_addon
         self.report_cls_map = {
             'stable': NonsolvableDepsInStable,
             'dev': NonsolvableDepsInDev,
@@ -207,7 +207,7 @@ class VisibilityCheck(feeds.EvaluateDepSet, feeds.QueryCache, Check):
     def feed(self, pkg):
         super().feed(pkg)
 
-        # query_cache gets caching_iter partial repo searches shoved into it-
+        # query_cache gets indexed repo matches shoved into it-
         # reason is simple, it's likely that versions of this pkg probably
         # use similar deps- so we're forcing those packages that were
         # accessed for atom matching to remain in memory.
@@ -230,8 +230,7 @@ class VisibilityCheck(feeds.EvaluateDepSet, feeds.QueryCache, Check):
                             # on don't have to use the slower get method
                             self.query_cache[node] = ()
                         else:
-                            matches = caching_iter(
-                                self.options.search_repo.itermatch(node))
+                            matches = self.repo_index.match(node)
                             if matches:
                                 self.query_cache[node] = matches
                                 if orig_node is not node:
@@ -304,6 +303,7 @@ class VisibilityCheck(feeds.EvaluateDepSet, feeds.QueryCache, Check):
 
     def process_depset(self, pkg, attr, depset, edepset, profiles):
         get_cached_query = self.query_cache.get
+        verdicts = self.profiles.verdicts
 
         csolutions = []
         for required in edepset.iter_cnf_solutions():
@@ -323,6 +323,7 @@ class VisibilityCheck(feeds.EvaluateDepSet, feeds.QueryCache, Check):
             provided = profile.provides_has_match
             insoluble = profile.insoluble
             visible = profile.visible
+            profile_id = (profile.key, profile.name)
             for required in csolutions:
                 # scan all of the quickies, the caches...
                 for node in required:
@@ -335,14 +336,24 @@ class VisibilityCheck(feeds.EvaluateDepSet, feeds.QueryCache, Check):
                         if node in insoluble:
                             pass
 
-                        # get is required since there is an intermix between old style
-                        # virtuals and new style- thus the cache priming doesn't get
-                        # all of it.
-                        src = get_cached_query(node.no_usedeps, ())
-                        if node.use:
-                            src = (FakeConfigurable(pkg, profile) for pkg in src)
-                            src = (pkg for pkg in src if node.force_True(pkg))
-                        if any(visible(pkg) for pkg in src):
+                        # reuse verdicts solved by other processes
+                        key = (profile_id, node)
+                        verdict = verdicts.get(key)
+                        if verdict is None:
+                            # get is required since there is an intermix between old style
+                            # virtuals and new style- thus the cache priming doesn't get
+                            # all of it.
+                            src = get_cached_query(node.no_usedeps, ())
+                            if node.use:
+                                src = (FakeConfigurable(pkg, profile) for pkg in src)
+                                src = (pkg for pkg in src if node.force_True(pkg))
+                            if any(visible(pkg) for pkg in src):
+                                verdict = verdicts.VISIBLE
+                            else:
+                                verdict = verdicts.INSOLUBLE
+                            verdicts[key] = verdict
+
+                        if verdict == verdicts.VISIBLE:
                             cache.add(node)
                             break
                         else:
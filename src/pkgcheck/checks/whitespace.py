@@ -5,8 +5,8 @@ from typing import NamedTuple
 
 from snakeoil.strings import pluralism
 
-from .. import results, sources
-from . import Check
+from .. import results
+from . import LineCheck
 
 
 class _Whitespace(results.VersionResult, results.Warning):
@@ -101,10 +101,9 @@ whitespace_data = WhitespaceData(
 )
 
 
-class WhitespaceCheck(Check):
+class WhitespaceCheck(LineCheck):
     """Scan ebuild for useless whitespace."""
 
-    _source = sources.EbuildFileRepoSource
     known_results = frozenset([
         WhitespaceFound, WrongIndentFound, DoubleEmptyLine,
         TrailingEmptyLine, NoFinalNewline, BadWhitespaceCharacter
@@ -112,11 +111,15 @@ class WhitespaceCheck(Check):
 
     _indent_regex = re.compile('^\t* \t+')
 
-    def __init__(self, *args):
-        super().__init__(*args)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         bad_whitespace = ''.join(whitespace_data.chars)
         self.bad_whitespace_regex = re.compile(rf'(?P<char>[{bad_whitespace}])')
 
+    @classmethod
+    def line_triggers(cls, eapi):
+        return whitespace_data.chars
+
     def feed(self, pkg):
         lastlineempty = False
         trailing = []
@@ -124,12 +127,16 @@ class WhitespaceCheck(Check):
         indent = []
         double_empty = []
 
-        for lineno, line in enumerate(pkg.lines, 1):
+        for lineno, line in self.lines(pkg):
             for match in self.bad_whitespace_regex.finditer(line):
                 yield BadWhitespaceCharacter(
                     repr(match.group('char')), match.end('char'),
                     line=repr(line), lineno=lineno, pkg=pkg)
 
+        # Layout issues such as empty lines or bad indentation can occur on any
+        # line without a literal trigger string, so all lines are checked here
+        # separately from the shared line scan.
+        for lineno, line in enumerate(pkg.lines, 1):
             if line != '\n':
                 lastlineempty = False
                 if line[-2:-1] == ' ' or line[-2:-1] == '\t':
@@ -1,14 +1,20 @@
 """Eclass specific support and addon."""
 
+import hashlib
+import multiprocessing
 import os
+import signal
+import subprocess
 from functools import total_ordering
 
 from pkgcore.ebuild.eclass import EclassDoc, EclassDocParsingError
-from snakeoil.klass import jit_attr_none
+from snakeoil.contexts import patch
+from snakeoil.klass import jit_attr, jit_attr_none
 from snakeoil.mappings import ImmutableDict
 from snakeoil.osutils import pjoin
 
 from . import base, caches
+from .packages import FileContent
 
 
 def matching_eclass(eclasses_set, eclass):
@@ -23,18 +29,19 @@ def matching_eclass(eclasses_set, eclass):
 class Eclass:
     """Generic eclass object."""
 
-    def __init__(self, name, path):
+    def __init__(self, name, path, content=None):
         self.name = name
         self.path = os.path.realpath(path)
+        self._content = content
 
     def __str__(self):
         return self.name
 
-    @property
+    @jit_attr
     def lines(self):
+        content = self._content if self._content is not None else FileContent(self.path)
         try:
-            with open(self.path) as f:
-                return tuple(f)
+            return content.lines
         except FileNotFoundError:
             return ()
 
@@ -52,16 +59,78 @@ class Eclass:
         return self.path == other
 
 
+def _blob_hash(path):
+    """Return the git blob hash for a given file."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+def _git_blob_hashes(path):
+    """Return the mapping of unmodified, tracked eclass files to their git blob hashes.
+
+    An empty mapping is returned for paths outside git repos or when git is
+    unavailable.
+    """
+    cmd = ['git', 'ls-files', '-z']
+    try:
+        p = subprocess.run(
+            cmd + ['-s', '--', '*.eclass'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            cwd=path, check=True, encoding='utf8')
+        hashes = {}
+        for line in filter(None, p.stdout.split('\0')):
+            info, name = line.split('\t', 1)
+            hashes[name] = info.split()[1]
+        # skip the index hashes for modified files
+        p = subprocess.run(
+            cmd + ['-m', '--', '*.eclass'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            cwd=path, check=True, encoding='utf8')
+        for name in p.stdout.split('\0'):
+            hashes.pop(name, None)
+    except (FileNotFoundError, subprocess.CalledProcessError):
+        return {}
+    return hashes
+
+
+def _parse_eclass(path):
+    """Parse the docs for a given eclass file, collecting doc errors.
+
+    None is returned for eclasses that can't be parsed.
+    """
+    errors = []
+    parsing_error = lambda exc: errors.append(str(exc))
+    with patch('pkgcore.ebuild.eclass._parsing_error', parsing_error):
+        try:
+            return EclassDoc(path, sourced=True), tuple(errors)
+        except (IOError, EclassDocParsingError):
+            return None
+
+
+class EclassCache(caches.DictCache):
+    """Cache of eclass doc info for a repo."""
+
+    def __init__(self, data, cache, hashes=None, errors=None):
+        super().__init__(data, cache)
+        # mapping of eclasses to their git blob hashes
+        self.hashes = hashes if hashes is not None else {}
+        # mapping of eclasses to their doc parsing errors
+        self.errors = errors if errors is not None else {}
+
+
 class EclassAddon(caches.CachedAddon):
     """Eclass support for various checks."""
 
     # cache registry
-    cache = caches.CacheData(type='eclass', file='eclass.pickle', version=1)
+    cache = caches.CacheData(type='eclass', file='eclass.db', version=2)
 
     def __init__(self, *args):
         super().__init__(*args)
         # mapping of repo locations to their corresponding eclass caches
         self._eclass_repos = {}
+        # mapping of repo locations to their eclass content hashes
+        self._hash_repos = {}
 
     @jit_attr_none
     def eclasses(self, repo=None):
@@ -84,56 +153,123 @@ class EclassAddon(caches.CachedAddon):
                 continue
         return ImmutableDict(d)
 
+    @jit_attr_none
+    def hashes(self):
+        """Mapping of available eclasses to their content hashes."""
+        d = {}
+        for r in self.options.target_repo.trees:
+            try:
+                hashes = self._hash_repos[r.location]
+            except KeyError:
+                eclass_dir = pjoin(r.location, 'eclass')
+                hashes = self._hash_repos[r.location] = self._eclass_hashes(
+                    eclass_dir, self._repo_eclasses(eclass_dir))
+            d.update(hashes)
+        return ImmutableDict(d)
+
+    @staticmethod
+    def _repo_eclasses(eclass_dir):
+        """Return the sorted names and paths of the eclasses in a given directory."""
+        try:
+            return sorted(
+                (x[:-7], pjoin(eclass_dir, x)) for x in os.listdir(eclass_dir)
+                if x.endswith('.eclass'))
+        except FileNotFoundError:
+            return []
+
+    @staticmethod
+    def _eclass_hashes(eclass_dir, eclasses):
+        """Return the content hashes for the given eclasses.
+
+        Hashes are pulled from git for unmodified tracked eclasses and
+        computed directly otherwise.
+        """
+        git_hashes = _git_blob_hashes(eclass_dir) if eclasses else {}
+        hashes = {}
+        for name, path in eclasses:
+            try:
+                hashes[name] = git_hashes.get(f'{name}.eclass') or _blob_hash(path)
+            except IOError:
+                continue
+        return hashes
+
+    def doc(self, name):
+        """Return the cached doc info and doc parsing errors for a target repo eclass."""
+        eclasses = self._eclass_repos[self.options.target_repo.location]
+        return eclasses[name], eclasses.errors.get(name, ())
+
+    def _parse(self, eclasses, progress):
+        """Parse the docs for the given eclasses, using a process pool if worthwhile."""
+        paths = [path for _name, path in eclasses]
+        jobs = min(self.options.jobs, len(paths))
+        if jobs > 1:
+            # restore the default SIGTERM handler overridden by pkgcore so
+            # workers exit on pool termination
+            ctx = multiprocessing.get_context('fork')
+            with ctx.Pool(jobs, signal.signal, (signal.SIGTERM, signal.SIG_DFL)) as pool:
+                for (name, _path), parsed in zip(eclasses, pool.imap(_parse_eclass, paths)):
+                    progress(name)
+                    yield name, parsed
+        else:
+            for name, path in eclasses:
+                progress(name)
+                yield name, _parse_eclass(path)
+
     def update_cache(self, force=False):
         """Update related cache and push updates to disk."""
         if self.options.cache['eclass']:
             for repo in self.options.target_repo.trees:
                 cache_file = self.cache_file(repo)
                 cache_eclasses = False
-                eclasses = {}
+                eclasses = EclassCache({}, self.cache)
 
                 if not force:
-                    eclasses = self.load_cache(cache_file, fallback={})
+                    eclasses = self.load_cache(cache_file, fallback=eclasses)
 
                 # check for eclass removals
                 for name, eclass in list(eclasses.items()):
                     if not os.path.exists(eclass.path):
                         del eclasses[name]
+                        eclasses.hashes.pop(name, None)
+                        eclasses.errors.pop(name, None)
                         cache_eclasses = True
 
                 # verify the repo has eclasses
                 eclass_dir = pjoin(repo.location, 'eclass')
-                try:
-                    repo_eclasses = sorted(
-                        (x[:-7], pjoin(eclass_dir, x)) for x in os.listdir(eclass_dir)
-                        if x.endswith('.eclass'))
-                except FileNotFoundError:
-                    repo_eclasses = []
+                repo_eclasses = self._repo_eclasses(eclass_dir)
+                hashes = self._hash_repos[repo.location] = self._eclass_hashes(
+                    eclass_dir, repo_eclasses)
 
                 if repo_eclasses:
-                    # padding for progress output
-                    padding = max(len(x[0]) for x in repo_eclasses)
-
-                    # check for eclass additions and updates
-                    with base.ProgressManager(verbosity=self.options.verbosity) as progress:
-                        for name, path in repo_eclasses:
-                            try:
-                                if os.path.getmtime(path) != eclasses[name].mtime:
-                                    raise KeyError
-                            except (KeyError, AttributeError):
-                                try:
-                                    progress(f'updating eclass cache: {name:<{padding}}')
-                                    eclasses[name] = EclassDoc(path, sourced=True)
-                                    cache_eclasses = True
-                                except (IOError, EclassDocParsingError):
+                    # determine eclass additions and updates via content hashes
+                    updated = [
+                        (name, path) for name, path in repo_eclasses
+                        if name in hashes and (
+                            name not in eclasses or eclasses.hashes.get(name) != hashes[name])]
+
+                    if updated:
+                        # padding for progress output
+                        padding = max(len(x[0]) for x in updated)
+                        with base.ProgressManager(verbosity=self.options.verbosity) as progress:
+                            status = lambda name: progress(
+                                f'updating eclass cache: {name:<{padding}}')
+                            for name, parsed in self._parse(updated, status):
+                                if parsed is None:
                                     continue
+                                eclasses[name], errors = parsed
+                                eclasses.hashes[name] = hashes[name]
+                                if errors:
+                                    eclasses.errors[name] = errors
+                                else:
+                                    eclasses.errors.pop(name, None)
+                                cache_eclasses = True
 
+                # reset jit attrs
+                self._hashes = None
                 if cache_eclasses:
-                    # reset jit attrs
                     self._eclasses = None
                     self._deprecated = None
                     # push cache updates to disk
-                    data = caches.DictCache(eclasses, self.cache)
-                    self.save_cache(data, cache_file)
+                    self.save_cache(eclasses, cache_file)
 
                 self._eclass_repos[repo.location] = eclasses
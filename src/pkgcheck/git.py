@@ -2,9 +2,11 @@
 
 import argparse
 import itertools
+import multiprocessing
 import os
 import re
 import shlex
+import signal
 import subprocess
 from collections import deque
 from contextlib import AbstractContextManager
@@ -26,7 +28,7 @@ from snakeoil.process import CommandNotFound, find_binary
 from snakeoil.strings import pluralism
 
 from . import base, caches
-from .checks import GitCheck
+from .checks import AggregateCheck, GitCheck
 from .eclass import matching_eclass
 from .log import logger
 
@@ -124,7 +126,8 @@ class _ParseGitRepo:
         self.path = os.path.realpath(path)
         cmd = shlex.split(self._git_cmd)
         cmd.append(f"--pretty=tformat:{'%n'.join(self._format)}")
-        cmd.append(commit_range)
+        # commit ranges can consist of multiple revisions, e.g. 'a ^b ^c'
+        cmd.extend(commit_range.split())
 
         self.git_log = GitLog(cmd, self.path)
         # discard the initial '# BEGIN COMMIT' line
@@ -241,6 +244,26 @@ class GitRepoPkgs(_ParseGitRepo):
             return
 
 
+def _pkg_changes(path, commit_range, local=False):
+    """Yield unique package change tuples for a commit range, newest first."""
+    seen = set()
+    for pkg in GitRepoPkgs(path, commit_range, local=local):
+        atom = pkg.atom
+        key = (atom, pkg.status)
+        if key not in seen:
+            seen.add(key)
+            if local:
+                commit = (atom.fullver, pkg.commit_date, pkg.commit, pkg.data)
+            else:
+                commit = (atom.fullver, pkg.commit_date, pkg.commit)
+            yield atom.category, atom.package, pkg.status, commit
+
+
+def _pkg_changes_shard(path, commit_range):
+    """Collect the package changes for a commit range shard in a worker process."""
+    return list(_pkg_changes(path, commit_range))
+
+
 class _GitCommitPkg(cpv.VersionedCPV):
     """Fake packages encapsulating commits parsed from git log."""
 
@@ -332,6 +355,8 @@ class _ScanCommits(argparse.Action):
             targets = ' '.join(namespace.targets)
             s = pluralism(namespace.targets)
             parser.error(f'--commits is mutually exclusive with target{s}: {targets}')
+        if getattr(namespace, 'incremental', None):
+            parser.error('--commits is mutually exclusive with --incremental')
 
         ref = value if value is not None else 'origin'
         setattr(namespace, self.dest, ref)
@@ -385,6 +410,120 @@ class _ScanCommits(argparse.Action):
         namespace.restrictions = restrictions
 
 
+class _ScanIncremental(argparse.Action):
+    """Argparse action that enables incremental repo scans."""
+
+    _md5_cache_dir = 'metadata/md5-cache'
+    # repo-level data outside package dirs that aggregate check results depend on
+    _repo_data_paths = ('licenses', 'metadata/layout.conf', 'profiles')
+
+    def _changed_paths(self, parser, repo, ref):
+        """Return the repo paths changed in HEAD compared to a given reference."""
+        targets = sorted(repo.category_dirs)
+        for path in ('eclass', self._md5_cache_dir, *self._repo_data_paths):
+            if os.path.exists(pjoin(repo.location, path)):
+                targets.append(path)
+        git_diff_cmd = ['git', 'diff', '--name-only', ref, 'HEAD', '--']
+        try:
+            p = subprocess.run(
+                git_diff_cmd + targets,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                cwd=repo.location, check=True, encoding='utf8')
+        except FileNotFoundError:
+            parser.error('git not available to determine targets for --incremental')
+        except subprocess.CalledProcessError as e:
+            error = e.stderr.splitlines()[0]
+            parser.error(f'failed running git: {error}')
+        return p.stdout.splitlines()
+
+    def _pkg_atoms(self, paths):
+        """Filter package atoms from changed ebuild and metadata cache paths."""
+        md5_cache_prefix = f'{self._md5_cache_dir}/'
+        for x in paths:
+            try:
+                if x.startswith(md5_cache_prefix):
+                    yield atom_cls(f'={x[len(md5_cache_prefix):]}').unversioned_atom
+                else:
+                    yield atom_cls(os.sep.join(x.split(os.sep, 2)[:2]))
+            except MalformedAtom:
+                continue
+
+    def __call__(self, parser, namespace, value, option_string=None):
+        if namespace.targets:
+            targets = ' '.join(namespace.targets)
+            s = pluralism(namespace.targets)
+            parser.error(f'--incremental is mutually exclusive with target{s}: {targets}')
+        if namespace.commits:
+            parser.error('--incremental is mutually exclusive with --commits')
+
+        ref = value if value is not None else 'origin'
+        setattr(namespace, self.dest, ref)
+
+        repo = namespace.target_repo
+        try:
+            namespace.incremental_commit = GitAddon._get_commit_hash(repo.location, 'HEAD')
+        except GitError as e:
+            parser.error(str(e))
+
+        # avoid circular import issues
+        from .addons import IncrementalAddon
+        cached = IncrementalAddon(namespace).cached()
+        namespace.incremental_cache = None
+        namespace.incremental_pkgs = None
+        namespace.contexts.append(GitStash(repo.location))
+
+        # Aggregate check data can only be patched when it exists for all
+        # enabled checks, otherwise fallback to a full repo scan.
+        aggregate_checks = {
+            cls.__name__ for cls in namespace.enabled_checks
+            if issubclass(cls, AggregateCheck)}
+        if cached is None or not aggregate_checks.issubset(cached.commits):
+            logger.debug('no usable incremental cache, running full repo scan')
+            namespace.restrictions = [(base.repo_scope, packages.AlwaysTrue)]
+            return
+
+        try:
+            since = GitAddon._get_commit_hash(repo.location, ref)
+        except GitError as e:
+            parser.error(str(e))
+
+        # determine all packages changed since the given reference and
+        # since the cached data for enabled checks was generated
+        paths = set(self._changed_paths(parser, repo, since))
+        for commit in sorted({cached.commits[x] for x in aggregate_checks} - {since}):
+            paths.update(self._changed_paths(parser, repo, commit))
+
+        pkg_paths, repo_data = partition(
+            sorted(paths), predicate=lambda x: any(
+                x == path or x.startswith(f'{path}/') for path in self._repo_data_paths))
+        pkgs, eclasses = partition(pkg_paths, predicate=lambda x: x.startswith('eclass/'))
+        pkgs = sorted(set(self._pkg_atoms(pkgs)))
+
+        eclass_regex = re.compile(r'^eclass/(?P<eclass>\S+)\.eclass$')
+        eclasses = filter(None, (eclass_regex.match(x) for x in eclasses))
+        eclasses = sorted(x.group('eclass') for x in eclasses)
+
+        restrictions = []
+        if pkgs:
+            restrict = packages.OrRestriction(*pkgs)
+            restrictions.append((base.package_scope, restrict))
+        if eclasses:
+            func = partial(matching_eclass, frozenset(eclasses))
+            restrict = values.AnyMatch(values.FunctionRestriction(func))
+            restrictions.append((base.eclass_scope, restrict))
+
+        if not restrictions:
+            # no pkgs, eclasses, or repo-level data to check, exit early
+            if not next(repo_data, None):
+                parser.exit()
+            # regenerate aggregate check results from the cached data
+            restrictions.append((base.package_scope, packages.AlwaysFalse))
+
+        namespace.incremental_cache = cached
+        namespace.incremental_pkgs = frozenset(x.key for x in pkgs)
+        namespace.restrictions = restrictions
+
+
 class GitStash(AbstractContextManager):
     """Context manager for stashing untracked or modified/uncommitted files.
 
@@ -452,7 +591,10 @@ class GitAddon(caches.CachedAddon):
     """
 
     # cache registry
-    cache = caches.CacheData(type='git', file='git.pickle', version=4)
+    cache = caches.CacheData(type='git', file='git.db', version=4)
+
+    # minimum number of commits per shard when parsing git history in parallel
+    _min_shard_size = 5000
 
     @classmethod
     def mangle_argparser(cls, parser):
@@ -474,6 +616,26 @@ class GitAddon(caches.CachedAddon):
                 Note that will also enable eclass-specific checks if it
                 determines any commits have been made to eclasses.
             """)
+        group.add_argument(
+            '--incremental', nargs='?', metavar='COMMIT',
+            action=arghparse.Delayed, target=_ScanIncremental, priority=100,
+            help="incrementally scan changes using cached repo-level data",
+            docs="""
+                For a local git repo, pkgcheck will scan the packages changed
+                in the current HEAD commit compared to a given reference that
+                defaults to the repo's origin.
+
+                In addition, repo-level checks that aggregate data from all
+                packages (e.g. UnusedLicensesCheck or GlobalUseCheck) store
+                each package's contribution in the incremental cache keyed by
+                commit. Following incremental scans only recollect data for
+                packages changed since the cached commit and regenerate the
+                repo-level results from the patched data. If no usable cache
+                exists, a full repo scan is run in order to create it.
+
+                Note that other repo-level checks are skipped when scanning
+                incrementally.
+            """)
 
     def __init__(self, *args):
         super().__init__(*args)
@@ -523,24 +685,80 @@ class GitAddon(caches.CachedAddon):
         return p.stdout.strip()
 
     @staticmethod
-    def pkg_history(path, commit_range, data=None, local=False, verbosity=-1):
-        """Create or update historical package data for a given commit range."""
+    def _commit_shards(path, commit_range, shards):
+        """Split a commit range into consecutive, non-overlapping ranges.
+
+        Shard boundaries are taken from the first-parent history of the range
+        so concatenating the ranges in order retains newest-first ordering.
+        """
+        try:
+            p = subprocess.run(
+                ['git', 'rev-list', '--first-parent', commit_range],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                cwd=path, check=True, encoding='utf8')
+        except subprocess.CalledProcessError as e:
+            error = e.stderr.strip()
+            raise GitError(f'failed running git rev-list: {error}')
+
+        revs = p.stdout.split()
+        size = max(len(revs) // shards, GitAddon._min_shard_size)
+        if len(revs) <= size:
+            return [commit_range]
+
+        # revisions excluded by the original range apply to all shards
+        exclude, _sep, _head = commit_range.rpartition('..')
+        exclude = f' ^{exclude}' if exclude else ''
+        heads = revs[::size]
+        ranges = [f'{new} ^{old}{exclude}' for new, old in zip(heads, heads[1:])]
+        ranges.append(f'{heads[-1]}{exclude}')
+        return ranges
+
+    @staticmethod
+    def pkg_history(path, commit_range, data=None, local=False, verbosity=-1, jobs=1):
+        """Create or update historical package data for a given commit range.
+
+        When multiple jobs are requested, the commit range is split into
+        shards that are parsed in parallel and merged in order.
+        """
         if data is None:
             data = {}
         seen = set()
+
+        shards = [commit_range]
+        if jobs > 1 and not local:
+            shards = GitAddon._commit_shards(path, commit_range, jobs * 4)
+
         with base.ProgressManager(verbosity=verbosity) as progress:
-            for pkg in GitRepoPkgs(path, commit_range, local=local):
-                atom = pkg.atom
-                key = (atom, pkg.status)
-                if key not in seen:
-                    seen.add(key)
-                    if local:
-                        commit = (atom.fullver, pkg.commit_date, pkg.commit, pkg.data)
-                    else:
-                        progress(f'updating git cache: commit date: {pkg.commit_date}')
-                        commit = (atom.fullver, pkg.commit_date, pkg.commit)
-                    data.setdefault(atom.category, {}).setdefault(
-                        atom.package, {}).setdefault(pkg.status, []).append(commit)
+            if len(shards) > 1:
+                # fork to avoid reimporting modules in the worker processes
+                ctx = multiprocessing.get_context('fork')
+                # Restore the default SIGTERM handler in the workers since the
+                # handler inherited from pkgcore shuts down the parent's ebuild
+                # processors, hanging workers on pool termination.
+                pool = ctx.Pool(
+                    min(jobs, len(shards)), signal.signal, (signal.SIGTERM, signal.SIG_DFL))
+                results = pool.imap(partial(_pkg_changes_shard, path), shards)
+            else:
+                pool = None
+                results = (_pkg_changes(path, commit_range, local=local),)
+
+            try:
+                for i, changes in enumerate(results, 1):
+                    for category, package, status, commit in changes:
+                        key = (category, package, commit[0], status)
+                        if key not in seen:
+                            seen.add(key)
+                            if not local:
+                                msg = f'updating git cache: commit date: {commit[1]}'
+                                if pool is not None:
+                                    msg += f' (shard {i}/{len(shards)})'
+                                progress(msg)
+                            data.setdefault(category, {}).setdefault(
+                                package, {}).setdefault(status, []).append(commit)
+            finally:
+                if pool is not None:
+                    pool.terminate()
+                    pool.join()
         return data
 
     def update_cache(self, force=False):
@@ -571,7 +789,7 @@ class GitAddon(caches.CachedAddon):
                     try:
                         self.pkg_history(
                             repo.location, commit_range, data=data,
-                            verbosity=self.options.verbosity)
+                            verbosity=self.options.verbosity, jobs=self.options.jobs)
                     except GitError as e:
                         raise UserException(str(e))
                     git_cache = GitCache(data, self.cache, commit=commit)
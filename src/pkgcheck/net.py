@@ -2,19 +2,28 @@
 
 import logging
 import os
+import threading
+import urllib.parse
+from collections import Counter
 
 import requests
 
-from .checks.network import RequestError, SSLError
+from .checks.network import HostUnresponsive, RequestError, SSLError
 
 # suppress all urllib3 log messages
 logging.getLogger('urllib3').propagate = False
 
 
 class Session(requests.Session):
-    """Custom requests session handling timeout, concurrency, and header settings."""
+    """Custom requests session handling timeout, concurrency, and header settings.
 
-    def __init__(self, concurrent=None, timeout=None, user_agent=None):
+    Requests to hosts that repeatedly time out fail immediately afterwards.
+    """
+
+    # number of consecutive timeouts before a host is considered unresponsive
+    max_timeouts = 3
+
+    def __init__(self, concurrent=None, timeout=None, user_agent=None, host_concurrent=None):
         super().__init__()
         if timeout == 0:
             # set timeout to 0 to never timeout
@@ -23,16 +32,29 @@ class Session(requests.Session):
             # default to timing out connections after 5 seconds
             self.timeout = timeout if timeout is not None else 5
 
-        # block when urllib3 connection pool is full
+        # Keep connection pools alive for all concurrently requested hosts so
+        # connections are reused, blocking when a host's pool is full.
         concurrent = concurrent if concurrent is not None else os.cpu_count() * 5
-        a = requests.adapters.HTTPAdapter(pool_maxsize=concurrent, pool_block=True)
+        host_concurrent = host_concurrent if host_concurrent is not None else concurrent
+        a = requests.adapters.HTTPAdapter(
+            pool_connections=concurrent, pool_maxsize=host_concurrent, pool_block=True)
         self.mount('https://', a)
         self.mount('http://', a)
 
         # spoof user agent
         self.headers['User-Agent'] = user_agent
 
+        # consecutive timeouts per host, updated by concurrent requests
+        self._timeouts = Counter()
+        self._timeouts_lock = threading.Lock()
+
     def send(self, req, **kwargs):
+        host = urllib.parse.urlsplit(req.url).hostname
+        with self._timeouts_lock:
+            unresponsive = self._timeouts[host] >= self.max_timeouts
+        if unresponsive:
+            raise HostUnresponsive(None, 'host unresponsive, repeatedly timed out')
+
         # forcibly use the session timeout
         kwargs['timeout'] = self.timeout
         try:
@@ -44,11 +66,16 @@ class Session(requests.Session):
                 req.method = 'GET'
                 return self.send(req, **kwargs)
 
+            with self._timeouts_lock:
+                self._timeouts.pop(host, None)
             r.raise_for_status()
             return r
         except requests.exceptions.SSLError as e:
             raise SSLError(e)
-        except requests.exceptions.ConnectionError as e:
-            raise RequestError(e, 'connection failed')
         except requests.exceptions.RequestException as e:
+            if isinstance(e, requests.exceptions.Timeout):
+                with self._timeouts_lock:
+                    self._timeouts[host] += 1
+            if isinstance(e, requests.exceptions.ConnectionError):
+                raise RequestError(e, 'connection failed')
             raise RequestError(e)
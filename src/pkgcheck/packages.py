@@ -1,5 +1,8 @@
 """Various custom package objects."""
 
+import io
+import mmap
+import os
 from functools import total_ordering
 
 from pkgcore.ebuild import atom, cpv
@@ -53,6 +56,50 @@ class RawCPV:
         return f'<{self.__class__.__name__} cpv={self.versioned_atom.cpvstr!r} {address}>'
 
 
+class FileContent:
+    """File contents read once, exposing lazily derived data.
+
+    Contents are pulled from the given data source if one exists, otherwise
+    they're read from the file path. Files at least as large as
+    :attr:`mmap_threshold` are memory-mapped instead of being copied into
+    memory, note that parsing still requires a copy of mapped contents.
+    """
+
+    # minimum file size in bytes for memory-mapping file contents
+    mmap_threshold = 2 ** 16
+
+    def __init__(self, path, source=None):
+        self.path = path
+        self._source = source
+        self._tree = None
+
+    @klass.jit_attr
+    def data(self):
+        """Raw file contents as a bytes-like object."""
+        if self._source is not None:
+            return self._source.bytes_fileobj().read()
+        with open(self.path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size >= self.mmap_threshold:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return f.read()
+
+    @klass.jit_attr
+    def lines(self):
+        """Decoded file lines using universal newlines."""
+        if isinstance(self.data, mmap.mmap):
+            # decode mapped files incrementally rather than as a single string
+            with open(self.path, encoding='utf-8', newline=None) as f:
+                return tuple(f)
+        return tuple(io.StringIO(str(self.data, 'utf-8'), newline=None))
+
+    def parse(self, parser):
+        """Return the parse tree of the file contents, parsing them on first use."""
+        if self._tree is None:
+            # tree-sitter only parses bytes, mapped contents are copied
+            self._tree = parser.parse(bytes(self.data))
+        return self._tree
+
+
 @total_ordering
 class WrappedPkg:
     """Generic package wrapper used to inject attributes into package objects."""
@@ -1,21 +1,453 @@
 """Pipeline building support for connecting sources and checks."""
 
+import heapq
+import json
 import multiprocessing
 import os
+import pickle
 import signal
+import sys
+import tempfile
+import threading
+import time
 import traceback
-from collections import defaultdict, deque
-from concurrent.futures import ThreadPoolExecutor
+from collections import Counter, defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import AbstractContextManager
 from functools import partial
 from itertools import chain
 
+from pkgcore.ebuild import restricts
 from pkgcore.package.errors import MetadataException
 from pkgcore.restrictions import boolean, packages
 
-from . import base
-from .checks import init_checks
+from . import addons, base, objects
+from .checks import ShardedCheck, SubtaskCheck, init_checks
 from .results import MetadataError
 from .sources import UnversionedSource, VersionedSource
+from .tracing import Tracer, get_tracer
+
+
+class SpooledResults:
+    """Sorted results storage spilling to disk once a size limit is reached.
+
+    Held results are sorted and written to temporary run files in batches,
+    then lazily merged back in sorted order when iterated over.
+    """
+
+    def __init__(self, limit):
+        self._limit = limit
+        self._results = []
+        self._runs = []
+
+    def append(self, result):
+        self._results.append(result)
+        if len(self._results) >= self._limit:
+            self._spill()
+
+    def _spill(self):
+        """Write the currently held results to a sorted run file."""
+        f = tempfile.TemporaryFile()
+        pickler = pickle.Pickler(f, protocol=pickle.HIGHEST_PROTOCOL)
+        for result in sorted(self._results):
+            pickler.dump(result)
+        f.seek(0)
+        self._runs.append(f)
+        self._results = []
+
+    @staticmethod
+    def _load(f):
+        """Iterate over the results stored in a run file."""
+        with f:
+            unpickler = pickle.Unpickler(f)
+            while True:
+                try:
+                    yield unpickler.load()
+                except EOFError:
+                    return
+
+    def __iter__(self):
+        runs = [self._load(f) for f in self._runs]
+        results = sorted(self._results)
+        self._runs, self._results = [], []
+        return heapq.merge(*runs, results)
+
+
+class ResultsCodec:
+    """Compact encoding for transferring results between processes.
+
+    Results are encoded as tuples of an interned keyword class id and their
+    attribute items, avoiding pickling full result objects. Since scanning
+    processes are forked from the parent, the keyword ids are shared between
+    them. Results of unregistered classes are passed through unencoded.
+    """
+
+    def __init__(self, keywords):
+        self._keywords = tuple(keywords)
+        self._ids = {cls: i for i, cls in enumerate(self._keywords)}
+
+    def encode(self, results):
+        """Encode a sequence of results."""
+        encoded = []
+        for result in results:
+            i = self._ids.get(result.__class__)
+            if i is None:
+                encoded.append(result)
+            else:
+                encoded.append((i, tuple(result.__dict__.items())))
+        return encoded
+
+    def decode(self, data, keywords=None):
+        """Materialize encoded results, optionally limited to the given keywords."""
+        for item in data:
+            if isinstance(item, tuple):
+                cls = self._keywords[item[0]]
+                if keywords is None or cls in keywords:
+                    result = cls.__new__(cls)
+                    result.__dict__.update(item[1])
+                    yield result
+            elif keywords is None or item.__class__ in keywords:
+                yield item
+
+
+class TaskExecutor:
+    """Thread pool executor limiting the number of running tasks per key.
+
+    Tasks are queued per key (e.g. the host targeted by a network request)
+    and only handed to the thread pool once a slot for their key opens up,
+    so tasks for a slow key can't occupy all threads while tasks for other
+    keys wait. Tasks can also be deferred until a given future is done
+    instead of blocking a thread waiting on it.
+    """
+
+    def __init__(self, max_workers, max_key_workers=None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._max_key_workers = max_key_workers
+        self._running = Counter()
+        self._queued = defaultdict(deque)
+        # number of submitted tasks that haven't finished
+        self._pending = 0
+        self._cond = threading.Condition()
+
+    def submit(self, fn, *args, key=None, after=None, **kwargs):
+        """Schedule a task to run, returning its future."""
+        future = Future()
+        task = (future, fn, args, kwargs, key)
+        with self._cond:
+            self._pending += 1
+        if after is None:
+            self._queue(task)
+        else:
+            after.add_done_callback(lambda _future: self._queue(task))
+        return future
+
+    def _queue(self, task):
+        """Start a task if its key has a free slot, otherwise queue it."""
+        key = task[-1]
+        with self._cond:
+            if (key is not None and self._max_key_workers is not None
+                    and self._running[key] >= self._max_key_workers):
+                self._queued[key].append(task)
+                return
+            self._running[key] += 1
+        self._start(task)
+
+    def _start(self, task):
+        future, fn, args, kwargs, key = task
+        inner = self._executor.submit(fn, *args, **kwargs)
+        inner.add_done_callback(partial(self._done, future, key))
+
+    def _done(self, future, key, inner):
+        """Pass a finished task's result on and start the next task for its key."""
+        with self._cond:
+            queued = self._queued.get(key)
+            if queued:
+                task = queued.popleft()
+                if not queued:
+                    del self._queued[key]
+            else:
+                task = None
+                self._running[key] -= 1
+                if not self._running[key]:
+                    del self._running[key]
+        if task is not None:
+            self._start(task)
+
+        exc = inner.exception()
+        if exc is not None:
+            future.set_exception(exc)
+        else:
+            future.set_result(inner.result())
+
+        with self._cond:
+            self._pending -= 1
+            self._cond.notify_all()
+
+    def shutdown(self):
+        """Wait for all tasks, including deferred ones, to finish."""
+        with self._cond:
+            self._cond.wait_for(lambda: not self._pending)
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+
+class CheckProfile:
+    """Per-check timing and throughput statistics.
+
+    Statistics are tracked per check and source pair in each scanning process
+    and merged in the parent once the processes finish. The time spent
+    generating items by each source is tracked under a check name of None.
+    """
+
+    fields = ('items', 'results', 'errors', 'start', 'feed', 'finish')
+
+    def __init__(self):
+        self._stats = defaultdict(lambda: [0] * len(self.fields))
+
+    def __bool__(self):
+        return bool(self._stats)
+
+    def add(self, check, source, **kwargs):
+        """Add to the statistics of a check and source pair."""
+        stats = self._stats[(check, source)]
+        for field, value in kwargs.items():
+            stats[self.fields.index(field)] += value
+
+    def merge(self, profile):
+        """Merge the statistics from another profile."""
+        for key, values in profile._stats.items():
+            stats = self._stats[key]
+            for i, value in enumerate(values):
+                stats[i] += value
+
+    def __getstate__(self):
+        return dict(self._stats)
+
+    def __setstate__(self, state):
+        self.__init__()
+        self._stats.update(state)
+
+    def stats(self):
+        """Return statistics mappings sorted from most to least time spent."""
+        stats = []
+        for (check, source), values in self._stats.items():
+            d = {'check': check, 'source': source, **dict(zip(self.fields, values))}
+            d['total'] = d['start'] + d['feed'] + d['finish']
+            stats.append(d)
+        return sorted(stats, key=lambda x: x['total'], reverse=True)
+
+    def report(self, out, format='table'):
+        """Output the statistics as a table or JSON."""
+        stats = self.stats()
+        if format == 'json':
+            out.write(json.dumps(stats, indent=2))
+            return
+
+        rows = [(
+            x['check'] or '(source)', x['source'], str(x['items']), str(x['results']),
+            str(x['errors']), *(f"{x[k]:.3f}s" for k in ('start', 'feed', 'finish', 'total')),
+        ) for x in stats]
+        header = ('check', 'source', *self.fields, 'total')
+        widths = [max(map(len, col)) for col in zip(header, *rows)]
+        for row in (header, *rows):
+            cols = [
+                x.ljust(w) if i < 2 else x.rjust(w)
+                for i, (x, w) in enumerate(zip(row, widths))]
+            out.write('  '.join(cols).rstrip())
+
+
+class ScanMetrics(AbstractContextManager):
+    """Live scan progress counters.
+
+    Counters for queued and completed items per scope along with worker
+    activity are stored in shared memory allocated before the scanning
+    processes are forked, allowing the parent to track scan progress while
+    they run. While active, a background thread periodically outputs the
+    progress to a status line and writes it to a metrics textfile in the
+    OpenMetrics text format if enabled.
+    """
+
+    # seconds between status line updates
+    _status_interval = 1
+    # seconds between metrics textfile updates
+    _write_interval = 5
+
+    def __init__(self, jobs, status=False, path=None):
+        self.jobs = jobs
+        self.path = path
+        self._status = status
+        self._scopes = tuple(str(x) for x in base.scopes.values())
+        self._scope_idx = {x: i for i, x in enumerate(self._scopes)}
+        ctx = multiprocessing.get_context('fork')
+        # queued and completed item counts per scope followed by the number
+        # of active workers
+        self._counts = ctx.Array('Q', len(self._scopes) * 2 + 1)
+        self._busy_time = ctx.Value('d', 0.0)
+        self.results = Counter({cls.level: 0 for cls in objects.KEYWORDS.values()})
+        self._start = None
+        self._start_time = None
+        self._finished = False
+        self._displayed = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def queued(self, scope, count=1):
+        """Register items queued for scanning."""
+        with self._counts.get_lock():
+            self._counts[self._scope_idx[str(scope)]] += count
+
+    def task_started(self):
+        """Register a worker starting a scanning task."""
+        with self._counts.get_lock():
+            self._counts[-1] += 1
+
+    def task_done(self, scope, elapsed):
+        """Register a worker finishing a scanning task."""
+        with self._counts.get_lock():
+            self._counts[len(self._scopes) + self._scope_idx[str(scope)]] += 1
+            self._counts[-1] -= 1
+        with self._busy_time.get_lock():
+            self._busy_time.value += elapsed
+
+    def result(self, result):
+        """Register a result being output, clearing the status line for it."""
+        self.results[result.level] += 1
+        if self._displayed:
+            with self._lock:
+                sys.stderr.write('\r\x1b[K')
+                self._displayed = False
+
+    def stats(self):
+        """Return a snapshot of the current progress."""
+        n = len(self._scopes)
+        with self._counts.get_lock():
+            counts = self._counts[:]
+        elapsed = time.monotonic() - self._start
+        queued = dict(zip(self._scopes, counts[:n]))
+        completed = dict(zip(self._scopes, counts[n:n * 2]))
+        remaining = sum(queued.values()) - sum(completed.values())
+        done = sum(completed.values())
+        eta = None
+        if self._finished:
+            eta = 0
+        elif done:
+            eta = elapsed * remaining / done
+        busy_time = self._busy_time.value
+        return {
+            'queued': queued,
+            'completed': completed,
+            'results': dict(self.results),
+            'active': counts[-1],
+            'busy_time': busy_time,
+            'utilization': busy_time / (elapsed * self.jobs) if elapsed else 0,
+            'elapsed': elapsed,
+            'eta': eta,
+        }
+
+    def status(self, stats):
+        """Format progress as a status line."""
+        progress = ', '.join(
+            f'{scope} {stats["completed"][scope]}/{queued}'
+            for scope, queued in stats['queued'].items() if queued)
+        results = sum(stats['results'].values())
+        errors = stats['results'].get('error', 0)
+        eta = '?' if stats['eta'] is None else f'{stats["eta"]:.0f}s'
+        return (
+            f'scanning: {progress or "starting"} | '
+            f'results: {results} ({errors} errors) | '
+            f'workers: {stats["active"]}/{self.jobs} busy, '
+            f'{stats["utilization"]:.0%} utilized | eta: {eta}')
+
+    def metrics(self, stats):
+        """Format progress as OpenMetrics text."""
+        lines = []
+
+        def metric(name, kind, desc, values):
+            lines.append(f'# HELP pkgcheck_scan_{name} {desc}')
+            lines.append(f'# TYPE pkgcheck_scan_{name} {kind}')
+            for labels, value in values:
+                suffix = '_total' if kind == 'counter' else ''
+                lines.append(f'pkgcheck_scan_{name}{suffix}{labels} {value}')
+
+        metric('items_queued', 'gauge', 'Items queued for scanning.', (
+            (f'{{scope="{k}"}}', v) for k, v in stats['queued'].items()))
+        metric('items_completed', 'counter', 'Items scanned.', (
+            (f'{{scope="{k}"}}', v) for k, v in stats['completed'].items()))
+        metric('results', 'counter', 'Results output.', (
+            (f'{{level="{k}"}}', v) for k, v in sorted(stats['results'].items())))
+        metric('workers', 'gauge', 'Scanning processes.', (('', self.jobs),))
+        metric('workers_busy', 'gauge', 'Scanning processes running tasks.', (
+            ('', stats['active']),))
+        metric('worker_busy_seconds', 'counter', 'Time spent running tasks.', (
+            ('', f'{stats["busy_time"]:.3f}'),))
+        metric('worker_utilization', 'gauge', 'Ratio of time workers spent running tasks.', (
+            ('', f'{stats["utilization"]:.3f}'),))
+        metric('start_time_seconds', 'gauge', 'Scan start time since the epoch.', (
+            ('', f'{self._start_time:.3f}'),))
+        metric('duration_seconds', 'gauge', 'Scan duration.', (
+            ('', f'{stats["elapsed"]:.3f}'),))
+        if stats['eta'] is not None:
+            metric('eta_seconds', 'gauge', 'Estimated time until the scan finishes.', (
+                ('', f'{stats["eta"]:.3f}'),))
+        metric('finished', 'gauge', 'Whether the scan has finished.', (
+            ('', int(self._finished)),))
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def write(self):
+        """Atomically write the current progress to the metrics textfile."""
+        data = self.metrics(self.stats())
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+
+    def _update(self):
+        """Periodically output progress until stopped."""
+        last_write = time.monotonic()
+        while not self._stop.wait(self._status_interval):
+            # skip status output while caches are being updated before scanning
+            if self._status and any(self._counts[:len(self._scopes)]):
+                with self._lock:
+                    sys.stderr.write(f'\r\x1b[K{self.status(self.stats())}')
+                    sys.stderr.flush()
+                    self._displayed = True
+            if self.path is not None and time.monotonic() - last_write >= self._write_interval:
+                self.write()
+                last_write = time.monotonic()
+
+    def __enter__(self):
+        self._start = time.monotonic()
+        self._start_time = time.time()
+        if self._status or self.path is not None:
+            self._thread = threading.Thread(target=self._update, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, _exc_type, _exc_value, _traceback):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+        if self._displayed:
+            sys.stderr.write('\r\x1b[K')
+            self._displayed = False
+        self._finished = True
+        if self.path is not None:
+            self.write()
+
+
+class ShardStates:
+    """Partial states of sharded checks accumulated by a scanning process."""
+
+    def __init__(self, pipe_idx, states):
+        self.pipe_idx = pipe_idx
+        self.states = states
 
 
 class Pipeline:
@@ -25,8 +457,18 @@ class Pipeline:
     exception tuples. This iterator forces exceptions to be handled explicitly,
     by outputing the serialized traceback and signaling scanning processes to
     end when an exception object is found.
+
+    Scanning processes also push data for persistent caches, e.g. extracted
+    ebuild commands, which is collected here and saved after the scan.
     """
 
+    # divisor of the remaining package cost per process for guided chunk sizes
+    _guided_divisor = 2
+    # max number of packages per chunk
+    _max_chunk_size = 32
+    # number of held results kept in memory per scope before spilling to disk
+    _spool_size = 10000
+
     def __init__(self, options, scan_scope, restriction):
         self.options = options
         self.restriction = restriction
@@ -37,36 +479,90 @@ class Pipeline:
         self._pkg_scan = (
             scan_scope in (base.version_scope, base.package_scope) and
             isinstance(restriction, boolean.AndRestriction))
+        self._repo_scan = scan_scope is base.repo_scope
 
         # pkgcheck currently requires the fork start method (#254)
         self._mp_ctx = multiprocessing.get_context('fork')
         # create checkrunner pipelines
         self._results_q = self._mp_ctx.SimpleQueue()
         self.options._results_q = self._results_q
+        # persistent per-package results cache
+        self._results_cache = None
+        # persistent per-package cost history used for scheduling
+        self._costs = None
+        # persistent per-ebuild cache of called commands
+        self._commands = None
+        # persistent cache of URL verdicts for network checks
+        self._net = None
+        # persistent per-package contributions to aggregate checks
+        self._incremental = None
+        # encoding for results passed from scanning processes
+        self._codec = ResultsCodec(objects.KEYWORDS.values())
+        # per-check statistics collected by scanning processes if enabled
+        self.profile = None
+        if self.options.profile_checks:
+            self.profile = CheckProfile()
+        self.options._check_profile = self.profile
+        # timeline of scanning activity across processes if enabled
+        self._tracer = get_tracer(self.options)
+        # live progress counters if enabled
+        self._metrics = getattr(self.options, '_scan_metrics', None)
         self._pipes = self._create_runners()
+        # partial states of sharded checks passed back by scanning processes
+        self._shard_states = defaultdict(list)
 
         # initialize settings used by iterator support
         self._pid = None
         signal.signal(signal.SIGINT, self._kill_pipe)
         self._results_iter = iter(self._results_q.get, None)
         self._results = deque()
+        self._held_results = None
         # scoped mapping for caching repo and location specific results
-        self._repo_results = {
-            scope: [] for scope in reversed(list(base.scopes.values()))
-            if scope.level <= base.repo_scope
-        }
+        self._repo_results = {}
+        if not self.options.unordered:
+            self._repo_results = {
+                scope: SpooledResults(self._spool_size)
+                for scope in reversed(list(base.scopes.values()))
+                if scope.level <= base.repo_scope
+            }
 
     def _create_runners(self):
         """Initialize and categorize checkrunners for results pipeline."""
         # initialize enabled checks
-        enabled_checks = init_checks(self.options.addons, self.options)
+        addons_map = {}
+        with self._tracer.span('initialize checks'):
+            enabled_checks = init_checks(self.options.addons, self.options, addons_map)
+        self._commands = addons_map.get(addons.CommandsAddon)
+        self._net = addons_map.get(addons.NetAddon)
+        self._incremental = addons_map.get(addons.IncrementalAddon)
+
+        # load cached package results for repo-level scans if enabled
+        if not self._pkg_scan and self.options.cache.get('results', False):
+            self._results_cache = addons.init_addon(
+                addons.ResultsAddon, self.options, addons_map)
+            self._results_cache.load(chain.from_iterable(enabled_checks.values()))
+
+        # index all packages before forking for repo-level scans
+        if self._repo_scan and (repo_index := addons_map.get(addons.RepoIndexAddon)):
+            with self._tracer.span('populate package index'):
+                repo_index.populate()
+
+        # load package cost history for repo-level scans if enabled
+        if not self._pkg_scan and self.options.cache.get('costs', False):
+            self._costs = addons.init_addon(addons.CostsAddon, self.options)
 
         # initialize checkrunners per source type, using separate runner for async checks
         checkrunners = defaultdict(list)
         runner_cls_map = {'async': AsyncCheckRunner, 'sync': SyncCheckRunner}
         for (source, exec_type), checks in enabled_checks.items():
-            runner = runner_cls_map[exec_type](self.options, source, checks)
-            checkrunners[(source.scope, exec_type)].append(runner)
+            # use separate runners for checks that are run in parallel pieces
+            groups = defaultdict(list)
+            for check in checks:
+                kind = (isinstance(check, ShardedCheck), isinstance(check, SubtaskCheck))
+                groups[kind].append(check)
+            for group in groups.values():
+                runner = runner_cls_map[exec_type](self.options, source, group)
+                checkrunners[(source.scope, exec_type)].append(runner)
 
         # categorize checkrunners for parallelization based on the scan and source scope
         pipes = defaultdict(lambda: defaultdict(list))
@@ -111,17 +607,34 @@ class Pipeline:
                         continue
                     if result.__class__ in self.options.exit_keywords:
                         self.exit_status += 1
+                    if self._metrics is not None:
+                        self._metrics.result(result)
                     return result
             except IndexError:
+                if self._repo_results is None:
+                    # output held repo and location specific results
+                    self._results.append(next(self._held_results))
+                    continue
                 try:
                     results = next(self._results_iter)
                 except StopIteration:
-                    if self._repo_results is None:
-                        raise
                     self._pid = None
+                    with self._tracer.span('save caches'):
+                        if self._results_cache is not None:
+                            self._results_cache.save()
+                        if self._costs is not None:
+                            self._costs.save()
+                        if self._commands is not None:
+                            # drop commands for removed ebuilds after full repo scans
+                            self._commands.save(prune=self._repo_scan)
+                    with self._tracer.span('finish sharded checks'):
+                        self._sort_results(list(self._finish_sharded()))
+                    if self._incremental is not None:
+                        # push data patched by aggregate checks for incremental scans
+                        with self._tracer.span('save incremental cache'):
+                            self._incremental.save()
                     # return cached repo and location specific results
-                    results = chain.from_iterable(map(sorted, self._repo_results.values()))
-                    self._results.extend(results)
+                    self._held_results = chain.from_iterable(self._repo_results.values())
                     self._repo_results = None
                     continue
 
@@ -130,65 +643,255 @@ class Pipeline:
                 if isinstance(results, str):
                     self._kill_pipe(error=results.strip())
 
-                if self._pkg_scan:
-                    # Running on a package scope level, i.e. running within a package
-                    # directory in an ebuild repo. This sorts all generated results,
-                    # removing duplicate MetadataError results.
-                    self._results.extend(sorted(set(results)))
-                else:
-                    # Running at a category scope level or higher. This outputs
-                    # version/package/category results in a stream sorted per package
-                    # while caching any repo, commit, and specific location (e.g.
-                    # profiles or eclass) results. Those are then outputted in sorted
-                    # fashion in order of their scope level from greatest to least
-                    # (displaying repo results first) after all
-                    # version/package/category results have been output.
-                    for result in sorted(results):
-                        try:
-                            self._repo_results[result.scope].append(result)
-                        except KeyError:
-                            self._results.append(result)
+                # merge commands extracted by a scanning process
+                if isinstance(results, dict):
+                    self._commands.update(results)
+                    continue
+
+                # collect partial states of sharded checks from a scanning process
+                if isinstance(results, ShardStates):
+                    self._shard_states[results.pipe_idx].append(results.states)
+                    continue
+
+                # merge check statistics from a scanning process
+                if isinstance(results, CheckProfile):
+                    self.profile.merge(results)
+                    continue
+
+                # merge trace events from a scanning process
+                if isinstance(results, Tracer):
+                    self._tracer.merge(results)
+                    continue
+
+                # store package results and costs for future scans
+                if isinstance(results, tuple):
+                    restrict, fingerprint, cost, results = results
+                    if fingerprint is not None:
+                        results = list(self._codec.decode(results))
+                        self._results_cache.update(restrict, fingerprint, results)
+                    if cost is not None:
+                        self._costs.update(restrict, cost)
+
+                with self._tracer.span('sort results'):
+                    # skip materializing results for unselected keywords
+                    results = self._codec.decode(results, self.options.filtered_keywords)
+                    self._sort_results(results)
+
+    def _sort_results(self, results):
+        """Queue results for output, holding those output after the scan finishes."""
+        if self.options.unordered:
+            # Output results as soon as they're generated.
+            self._results.extend(set(results) if self._pkg_scan else results)
+        elif self._pkg_scan:
+            # Running on a package scope level, i.e. running within a package
+            # directory in an ebuild repo. This sorts all generated results,
+            # removing duplicate MetadataError results.
+            self._results.extend(sorted(set(results)))
+        else:
+            # Running at a category scope level or higher. This outputs
+            # version/package/category results in a stream sorted per package
+            # while caching any repo, commit, and specific location (e.g.
+            # profiles or eclass) results. Those are then outputted in sorted
+            # fashion in order of their scope level from greatest to least
+            # (displaying repo results first) after all
+            # version/package/category results have been output, spilling
+            # them to disk in sorted runs when too many are held.
+            for result in sorted(results):
+                try:
+                    self._repo_results[result.scope].append(result)
+                except KeyError:
+                    self._results.append(result)
+
+    def _finish_sharded(self):
+        """Yield results from sharded checks run against their merged partial states."""
+        for i, pipe in enumerate(self._pipes['sync'].get(base.repo_scope, ())):
+            if pipe.sharded:
+                pipe.start()
+                for states in self._shard_states.pop(i, ()):
+                    pipe.merge(states)
+                yield from pipe.finish()
+
+    def _chunk_tasks(self, tasks):
+        """Group package tasks into chunks ordered by their estimated costs.
+
+        Packages are sorted from most to least expensive using the costs from
+        previous scans, falling back to the median cost for unknown packages.
+        Chunks are then sized using guided self-scheduling: each chunk gets a
+        share of the remaining cost per process, so chunks shrink towards the
+        tail of the queue. Large early chunks minimize per-task queuing
+        overhead, while expensive packages stay in separate chunks at the
+        front of the queue.
+
+        There's no separate work stealing. Scanning processes pull chunks from
+        the shared work queue as they go idle, and the small chunks at the
+        tail balance the remaining load between them.
+        """
+        costs = []
+        if self._costs is not None:
+            costs = [self._costs.get(restrict) for restrict in tasks]
+        known = sorted(x for x in costs if x is not None)
+        if known:
+            default = known[len(known) // 2]
+            costs = [default if x is None else x for x in costs]
+            tasks = [task for _cost, task in sorted(
+                zip(costs, tasks), key=lambda x: x[0], reverse=True)]
+            costs.sort(reverse=True)
+        else:
+            costs = [1] * len(tasks)
+
+        remaining = sum(costs)
+        chunk, chunk_cost = [], 0
+        for cost, task in zip(costs, tasks):
+            chunk.append(task)
+            chunk_cost += cost
+            target = remaining / (self.options.jobs * self._guided_divisor)
+            if chunk_cost >= target or len(chunk) >= self._max_chunk_size:
+                yield tuple(chunk)
+                remaining -= chunk_cost
+                chunk, chunk_cost = [], 0
+        if chunk:
+            yield tuple(chunk)
 
     def _queue_work(self, sync_pipes, work_q):
         """Producer that queues scanning tasks against granular scope restrictions."""
+        metrics = self._metrics
         for scope in sorted(sync_pipes, reverse=True):
             pipes = sync_pipes[scope]
             if scope is base.version_scope:
                 versioned_source = VersionedSource(self.options)
                 for restrict in versioned_source.itermatch(self.restriction):
+                    if metrics is not None:
+                        metrics.queued(scope, len(pipes))
                     for i in range(len(pipes)):
-                        work_q.put((scope, restrict, i))
+                        work_q.put((scope, (restrict,), i))
             elif scope is base.package_scope:
                 unversioned_source = UnversionedSource(self.options)
-                for restrict in unversioned_source.itermatch(self.restriction):
-                    work_q.put((scope, restrict, 0))
+                tasks = list(unversioned_source.itermatch(self.restriction))
+                if metrics is not None:
+                    metrics.queued(scope, len(tasks))
+                for chunk in self._chunk_tasks(tasks):
+                    work_q.put((scope, chunk, 0))
             else:
-                for i in range(len(pipes)):
-                    work_q.put((scope, self.restriction, i))
+                shards = ()
+                if any(pipe.sharded for pipe in pipes):
+                    # split sharded repo checks into per-category tasks
+                    shards = tuple(
+                        packages.AndRestriction(self.restriction, restricts.CategoryDep(x))
+                        for x in sorted(self.options.target_repo.categories))
+                for i, pipe in enumerate(pipes):
+                    if pipe.split:
+                        # queue check indices and their subtasks for split checks
+                        tasks = tuple(
+                            (check_idx, subtask) for check_idx, check in enumerate(pipe.checks)
+                            for subtask in check.subtasks())
+                    elif pipe.sharded:
+                        tasks = shards
+                    else:
+                        tasks = (self.restriction,)
+                    if metrics is not None:
+                        metrics.queued(scope, len(tasks))
+                    for restrict in tasks:
+                        work_q.put((scope, (restrict,), i))
 
         # notify consumers that no more work exists
         for i in range(self.options.jobs):
             work_q.put(None)
 
     def _run_checks(self, pipes, work_q):
-        """Consumer that runs scanning tasks, queuing results for output."""
+        """Consumer that runs scanning tasks, queuing results for output.
+
+        Idle consumers pull the next available chunk of tasks from the shared
+        work queue so remaining work is spread across all processes.
+        """
+        tracer = self._tracer
+        tracer.name_process('scanning process')
+        metrics = self._metrics
+        # scopes and indices of sharded and split pipes started by this process
+        started = set()
         try:
-            for scope, restrict, pipe_idx in iter(work_q.get, None):
-                results = []
+            while True:
+                # track time spent idle, waiting on the producer
+                with tracer.span('wait for tasks'):
+                    task = work_q.get()
+                if task is None:
+                    break
+                scope, tasks, pipe_idx = task
+                for restrict in tasks:
+                    results = []
+                    start = time.perf_counter()
+                    if metrics is not None:
+                        metrics.task_started()
 
-                if scope is base.version_scope:
-                    results.extend(pipes[scope][pipe_idx].run(restrict))
-                elif scope in (base.package_scope, base.category_scope):
-                    for pipe in pipes[scope]:
-                        results.extend(pipe.run(restrict))
-                else:
-                    pipe = pipes[scope][pipe_idx]
-                    pipe.start()
-                    results.extend(pipe.run(restrict))
-                    results.extend(pipe.finish())
+                    fingerprint = None
+                    if scope is base.package_scope and self._results_cache is not None:
+                        with tracer.span('fingerprint package', target=restrict):
+                            fingerprint = self._results_cache.fingerprint(restrict)
+                        # replay cached results for unchanged packages
+                        cached = self._results_cache.get(restrict, fingerprint)
+                        if cached is not None:
+                            if self._commands is not None:
+                                # keep cached commands of replayed ebuilds from being pruned
+                                self._commands.keep(self.options.target_repo.itermatch(restrict))
+                            if metrics is not None:
+                                metrics.task_done(scope, time.perf_counter() - start)
+                            if cached:
+                                self._results_q.put(self._codec.encode(cached))
+                            continue
+
+                    if scope is base.version_scope:
+                        with tracer.span(f'scan {scope}', target=restrict):
+                            results.extend(pipes[scope][pipe_idx].run(restrict))
+                    elif scope in (base.package_scope, base.category_scope):
+                        with tracer.span(f'scan {scope}', target=restrict):
+                            for pipe in pipes[scope]:
+                                results.extend(pipe.run(restrict))
+                    else:
+                        pipe = pipes[scope][pipe_idx]
+                        checks, args = pipe.checks, {}
+                        if pipe.split:
+                            check_idx, subtask = restrict
+                            checks, args = (pipe.checks[check_idx],), {'subtask': subtask}
+                        with tracer.span(
+                                f'scan {scope}', source=pipe.source.__class__.__name__,
+                                checks=', '.join(x.__class__.__name__ for x in checks), **args):
+                            if (pipe.sharded or pipe.split) and (scope, pipe_idx) not in started:
+                                started.add((scope, pipe_idx))
+                                pipe.start()
+                            if pipe.split:
+                                results.extend(pipe.run_subtask(check_idx, subtask))
+                            elif pipe.sharded:
+                                # feed the shard into the partial state for this process
+                                results.extend(pipe.run(restrict))
+                            else:
+                                pipe.start()
+                                results.extend(pipe.run(restrict))
+                                results.extend(pipe.finish())
 
-                if results:
-                    self._results_q.put(results)
+                    elapsed = time.perf_counter() - start
+                    if metrics is not None:
+                        metrics.task_done(scope, elapsed)
+                    cost = None
+                    if scope is base.package_scope and self._costs is not None:
+                        cost = elapsed
+                    if fingerprint is not None or cost is not None:
+                        # push package results for caching, even if none exist
+                        results = self._codec.encode(results)
+                        self._results_q.put((restrict, fingerprint, cost, results))
+                    elif results:
+                        self._results_q.put(self._codec.encode(results))
+
+            # push partial states of sharded checks for merging
+            for scope, i in sorted(started):
+                if pipes[scope][i].sharded:
+                    self._results_q.put(ShardStates(i, pipes[scope][i].state()))
+            # push extracted ebuild commands for caching
+            if self._commands is not None:
+                self._results_q.put(self._commands.collect())
+            # push collected check statistics and trace events
+            if self.profile:
+                self._results_q.put(self.profile)
+            if tracer:
+                self._results_q.put(tracer)
         except Exception:  # pragma: no cover
             # traceback can't be pickled so serialize it
             tb = traceback.format_exc()
@@ -196,12 +899,22 @@ class Pipeline:
 
     def _schedule_async(self, pipes):
         """Schedule asynchronous checks."""
+        tracer = self._tracer
+        tracer.name_process('async process')
         try:
-            with ThreadPoolExecutor(max_workers=self.options.tasks) as executor:
-                # schedule any existing async checks
-                futures = {}
-                for runner in chain.from_iterable(pipes):
-                    runner.schedule(executor, futures, self.restriction)
+            with tracer.span('run async checks'):
+                with TaskExecutor(self.options.tasks, self.options.host_tasks) as executor:
+                    # schedule any existing async checks
+                    with tracer.span('schedule async checks'):
+                        futures = {}
+                        for runner in chain.from_iterable(pipes):
+                            runner.schedule(executor, futures, self.restriction)
+            # push URL verdicts to disk once all requests are done
+            if self._net is not None:
+                with tracer.span('save net cache'):
+                    self._net.save()
+            if tracer:
+                self._results_q.put(tracer)
         except Exception:  # pragma: no cover
             # traceback can't be pickled so serialize it
             tb = traceback.format_exc()
@@ -209,6 +922,8 @@ class Pipeline:
 
     def _run(self):
         """Run the scanning pipeline in parallel by check and scanning scope."""
+        tracer = self._tracer
+        tracer.name_process('pipeline process')
         try:
             signal.signal(signal.SIGINT, signal.SIG_DFL)
             os.setpgrp()
@@ -226,11 +941,16 @@ class Pipeline:
                 pool = self._mp_ctx.Pool(
                     self.options.jobs, self._run_checks, (sync_pipes, work_q))
                 pool.close()
-                self._queue_work(sync_pipes, work_q)
-                pool.join()
+                with tracer.span('queue tasks'):
+                    self._queue_work(sync_pipes, work_q)
+                with tracer.span('wait for scanning processes'):
+                    pool.join()
 
             if async_proc is not None:
-                async_proc.join()
+                with tracer.span('wait for async process'):
+                    async_proc.join()
+            if tracer:
+                self._results_q.put(tracer)
             # notify iterator that no more results exist
             self._results_q.put(None)
         except Exception:  # pragma: no cover
@@ -269,7 +989,18 @@ class SyncCheckRunner(CheckRunner):
         else:
             self._source_itermatch = self.source.itermatch
 
+        # sharded checks are run in parallel over categories
+        self.sharded = all(isinstance(x, ShardedCheck) for x in self.checks)
+        # split checks are run in parallel over their subtasks
+        self.split = all(isinstance(x, SubtaskCheck) for x in self.checks)
+
         self._metadata_errors = deque()
+        self._profile = getattr(self.options, '_check_profile', None)
+        if self._profile is not None:
+            self.start = self._profile_start
+            self.run = self._profile_run
+            self.finish = self._profile_finish
+            self.run_subtask = self._profile_run_subtask
 
     def _metadata_error_cb(self, e):
         """Callback handling MetadataError related results."""
@@ -309,6 +1040,86 @@ class SyncCheckRunner(CheckRunner):
         for check in self.checks:
             yield from check.finish()
 
+    def run_subtask(self, check_idx, subtask):
+        """Run a subtask of a split check while yielding any results."""
+        yield from self.checks[check_idx].run_subtask(subtask)
+
+    def state(self):
+        """Return the partial states of all sharded checks."""
+        return [check.state() for check in self.checks]
+
+    def merge(self, states):
+        """Merge the partial states of all sharded checks from another process."""
+        for check, state in zip(self.checks, states):
+            check.merge(state)
+
+    def _profile_start(self):
+        """Run all check start methods, tracking their run times."""
+        source = self.source.__class__.__name__
+        for check in self.checks:
+            start = time.perf_counter()
+            check.start()
+            self._profile.add(
+                check.__class__.__name__, source, start=time.perf_counter() - start)
+
+    def _profile_run(self, restrict=packages.AlwaysTrue):
+        """Run registered checks, tracking their run times and result counts."""
+        profile = self._profile
+        source = self.source.__class__.__name__
+        items = self._source_itermatch(restrict)
+        while True:
+            errors = len(self._metadata_errors)
+            start = time.perf_counter()
+            try:
+                item = next(items)
+            except StopIteration:
+                break
+            profile.add(
+                None, source, items=1, errors=len(self._metadata_errors) - errors,
+                feed=time.perf_counter() - start)
+
+            for check in self.checks:
+                self._running_check = check
+                errors = len(self._metadata_errors)
+                start = time.perf_counter()
+                try:
+                    results = list(check.feed(item))
+                except MetadataException as e:
+                    results = []
+                    self._metadata_error_cb(e)
+                profile.add(
+                    check.__class__.__name__, source, items=1, results=len(results),
+                    errors=len(self._metadata_errors) - errors,
+                    feed=time.perf_counter() - start)
+                yield from results
+            self._running_check = None
+
+        while self._metadata_errors:
+            pkg, result = self._metadata_errors.popleft()
+            if restrict.match(pkg):
+                yield result
+
+    def _profile_finish(self):
+        """Run all check finish methods, tracking their run times and result counts."""
+        source = self.source.__class__.__name__
+        for check in self.checks:
+            start = time.perf_counter()
+            results = list(check.finish())
+            self._profile.add(
+                check.__class__.__name__, source, results=len(results),
+                finish=time.perf_counter() - start)
+            yield from results
+
+    def _profile_run_subtask(self, check_idx, subtask):
+        """Run a subtask of a split check, tracking its run time and result count."""
+        check = self.checks[check_idx]
+        start = time.perf_counter()
+        results = list(check.run_subtask(subtask))
+        self._profile.add(
+            check.__class__.__name__, self.source.__class__.__name__, results=len(results),
+            finish=time.perf_counter() - start)
+        yield from results
+
 
 class AsyncCheckRunner(CheckRunner):
     """Generic runner for asynchronous checks.
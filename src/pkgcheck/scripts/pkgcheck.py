@@ -6,6 +6,7 @@ ebuild repositories for various issues.
 
 import argparse
 import os
+import sys
 import textwrap
 from collections import defaultdict
 from contextlib import ExitStack
@@ -27,9 +28,11 @@ from snakeoil.osutils import pjoin
 from .. import argparsers, base, const, objects, reporters
 from ..addons import init_addon
 from ..caches import CachedAddon
+from ..checks import AggregateCheck
 from ..cli import ConfigFileParser
 from ..eclass import matching_eclass
-from ..pipeline import Pipeline
+from ..pipeline import CheckProfile, Pipeline, ScanMetrics
+from ..tracing import Tracer
 
 argparser = commandline.ArgumentParser(
     description=__doc__, script=(__file__, __name__))
@@ -141,12 +144,77 @@ main_options.add_argument(
     docs="""
         Number of asynchronous tasks to run concurrently (defaults to 5 * CPU count).
     """)
+main_options.add_argument(
+    '--unordered', action='store_true',
+    help='output results as soon as they are generated',
+    docs="""
+        By default, results are output in sorted order per package with repo,
+        commit, and location specific results (e.g. for profiles or eclasses)
+        held back and output in sorted fashion after all package results.
+
+        When enabled, results are output as soon as they're generated by the
+        scanning processes without any sorting or holding, useful for
+        reporters such as JsonStream whose consumers don't rely on output
+        ordering.
+    """)
+main_options.add_argument(
+    '--profile-checks', action='store_true',
+    help='output per-check timing statistics',
+    docs="""
+        Track the time spent running each check per source along with the
+        number of items fed to it, results it generated, and metadata errors
+        it triggered in all scanning processes. Once the scan finishes, the
+        statistics are output to stderr sorted by total time in the format
+        selected by ``--profile-checks-format``.
+
+        The time spent by sources generating items (e.g. parsing ebuilds) is
+        listed separately. Note that checks running asynchronously (e.g.
+        network checks) aren't tracked and enabling tracking adds overhead
+        to scans.
+    """)
+main_options.add_argument(
+    '--profile-checks-format', choices=('table', 'json'), default='table',
+    help='format of per-check timing statistics',
+    docs="""
+        Format of the statistics output by ``--profile-checks``, either a
+        table (the default) or JSON.
+    """)
+main_options.add_argument(
+    '--trace', metavar='FILE',
+    help='write a timeline of the scan to a file',
+    docs="""
+        Write a timeline of the scan to the given file in the Chrome
+        trace-event JSON format, viewable with trace viewers such as
+        Perfetto (https://ui.perfetto.dev) or ``chrome://tracing``.
+
+        The timeline contains spans for the main process including check
+        and cache initialization and results sorting, the pipeline process
+        queuing scanning tasks, each scanning process' tasks and idle time
+        spent waiting for them, and the asynchronous checks process.
+    """)
+main_options.add_argument(
+    '--metrics-file', metavar='FILE',
+    help='periodically write scan progress metrics to a file',
+    docs="""
+        Periodically write scan progress metrics to the given file in the
+        OpenMetrics text format, e.g. for collection by the Prometheus node
+        exporter's textfile collector. The file is atomically replaced on
+        each update and written a final time when the scan finishes.
+
+        Metrics include the items queued and scanned per scope, results
+        output per level, scanning process utilization, the scan duration,
+        and the estimated time remaining.
+
+        Note that when running in a terminal, scan progress is also output
+        to a status line on stderr unless ``--quiet`` is used.
+    """)
 main_options.add_argument(
     '--cache', action=argparsers.CacheNegations,
     help='forcibly enable/disable caches',
     docs="""
-        All cache types are enabled by default, this option explicitly sets
-        which caches will be generated and used during scanning.
+        All cache types except the results and net caches are enabled by
+        default, this option explicitly sets which caches will be generated
+        and used during scanning.
 
         To enable only certain cache types, specify them in a comma-separated
         list, e.g. ``--cache git,profiles`` will enable both the git and
@@ -162,6 +230,30 @@ main_options.add_argument(
 
         When disabled, no caches will be saved to disk and results requiring
         caches (e.g. git-related checks) will be skipped.
+
+        The results cache stores per-package results from repo-level scans
+        and replays them for packages whose files, metadata cache entries,
+        and inherited eclasses are unchanged. Since results depending on data
+        outside a package (e.g. other packages, git history, or the current
+        date) are only refreshed when the package itself changes, it must be
+        explicitly enabled, e.g. ``--cache yes`` or ``--cache results,git``.
+
+        The costs cache stores the time spent scanning each package during
+        repo-level scans which is used to schedule the most expensive
+        packages first during following scans.
+
+        The index cache stores the validated metadata cache entries used by
+        dependency checks, allowing following scans to only rehash changed
+        ebuilds.
+
+        The commands cache stores the commands called by each ebuild,
+        allowing checks using them to skip parsing unchanged ebuilds.
+
+        The net cache stores the verdicts of URLs requested by network checks
+        so following scans only recheck URLs once their verdicts expire, see
+        the ``--url-ttl`` and ``--failed-url-ttl`` options. Since cached
+        verdicts hide URLs that broke in the meantime, it must be explicitly
+        enabled, e.g. ``--cache yes`` or ``--cache net``.
     """)
 main_options.add_argument(
     '--cache-dir', type=arghparse.create_dir, default=const.USER_CACHE_DIR,
@@ -485,7 +577,7 @@ def _validate_scan_args(parser, namespace):
     # filter enabled checks based on the scanning scope
     namespace.enabled_checks = [
         check for check in namespace.enabled_checks
-        if _selected_check(namespace, scan_scope, check.scope)
+        if _selected_check(namespace, scan_scope, check)
     ]
 
     if not namespace.enabled_checks:
@@ -504,8 +596,9 @@ def _validate_scan_args(parser, namespace):
     namespace.addons = addons
 
 
-def _selected_check(options, scan_scope, scope):
+def _selected_check(options, scan_scope, check):
     """Verify check scope against current scan scope to determine check activation."""
+    scope = check.scope
     if scope == 0:
         if not options.selected_scopes:
             if scan_scope is base.repo_scope or scope is scan_scope:
@@ -523,19 +616,40 @@ def _selected_check(options, scan_scope, scope):
     elif options.commits and scan_scope != 0 and scope is base.commit_scope:
         # Only enable commit-related checks when --commits is specified.
         return True
+    elif options.incremental and scan_scope > 0 and issubclass(check, AggregateCheck):
+        # Enable repo-level checks supporting incremental scans when
+        # --incremental is specified.
+        return True
     return False
 
 
 @scan.bind_main_func
 def _scan(options, out, err):
     ret = []
+    tracer = options._tracer = Tracer(options.trace)
+    tracer.name_process('main process')
+    # output live progress for terminals or when requested
+    status = options.verbosity >= 0 and sys.stderr.isatty()
+    options._scan_metrics = None
+    if status or options.metrics_file is not None:
+        options._scan_metrics = ScanMetrics(
+            options.jobs, status=status, path=options.metrics_file)
     with ExitStack() as stack:
         reporter = options.reporter(out)
         for c in options.pop('contexts') + [reporter]:
             stack.enter_context(c)
+        if options._scan_metrics is not None:
+            stack.enter_context(options._scan_metrics)
+        profile = CheckProfile()
         for scan_scope, restrict in options.restrictions:
             pipe = Pipeline(options, scan_scope, restrict)
             ret.append(reporter(pipe))
+            if pipe.profile is not None:
+                profile.merge(pipe.profile)
+    if options.profile_checks:
+        profile.report(err, options.profile_checks_format)
+    if tracer:
+        tracer.write()
     return int(any(ret))
 
 
@@ -565,8 +679,16 @@ cache.add_argument(
     '-n', '--dry-run', action='store_true',
     help='dry run without performing any changes')
 cache.add_argument(
-    '-t', '--type', dest='cache', action=argparsers.CacheNegations,
-    help='target cache types')
+    '-j', '--jobs', type=arghparse.positive_int, default=os.cpu_count(),
+    help='number of processes to use for cache updates')
+cache.add_argument(
+    '-t', '--type', dest='cache', action=argparsers.CacheNegations, all_caches=True,
+    help='target cache types',
+    docs="""
+        Comma separated list of cache types to target. All cache types are
+        targeted by default, including ones disabled by default for scans
+        such as the results cache.
+    """)
 cache.add_argument(
     '--repo', metavar='REPO', dest='target_repo',
     action=commandline.StoreRepoObject, repo_type='ebuild-raw', allow_external_repos=True,
@@ -577,7 +699,9 @@ cache.add_argument(
 def _setup_cache_addons(parser, namespace):
     """Load all addons using caches and their argparser changes before parsing."""
     for addon in base.get_addons(CachedAddon.caches):
-        addon.mangle_argparser(parser)
+        # skip addons with options only relevant to scans
+        if getattr(addon, 'cache_options', True):
+            addon.mangle_argparser(parser)
 
 
 @cache.bind_final_check
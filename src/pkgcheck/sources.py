@@ -122,17 +122,19 @@ class EclassRepoSource(RepoSource):
     """Repository eclass source."""
 
     scope = base.eclass_scope
-    required_addons = (EclassAddon,)
+    required_addons = (EclassAddon, addons.ContentAddon)
 
-    def __init__(self, *args, eclass_addon):
+    def __init__(self, *args, eclass_addon, content_addon):
         super().__init__(*args)
         repo = self.options.target_repo
         self.eclasses = eclass_addon._eclass_repos[repo.location]
+        self.content = content_addon
 
     def itermatch(self, restrict, **kwargs):
         for name in self.eclasses:
             if restrict.match([name]):
-                yield Eclass(name, self.eclasses[name].path)
+                path = os.path.realpath(self.eclasses[name].path)
+                yield Eclass(name, path, content=self.content.get(path))
 
 
 class FilteredRepoSource(RepoSource):
@@ -217,44 +219,61 @@ class _SourcePkg(WrappedPkg):
 
     __slots__ = ('lines',)
 
-    def __init__(self, pkg):
+    def __init__(self, pkg, lines):
         super().__init__(pkg)
-        self.lines = tuple(pkg.ebuild.text_fileobj())
+        self.lines = lines
 
 
 class EbuildFileRepoSource(RepoSource):
     """Ebuild repository source yielding package objects and their file contents."""
 
+    required_addons = (addons.ContentAddon,)
+
+    def __init__(self, *args, content_addon):
+        super().__init__(*args)
+        self.content = content_addon
+
     def itermatch(self, restrict, **kwargs):
         for pkg in super().itermatch(restrict, **kwargs):
-            yield _SourcePkg(pkg)
+            yield _SourcePkg(pkg, self.content.ebuild(pkg).lines)
 
 
 class _ParsedPkg(WrappedPkg):
-    """Package object with parse tree and raw bytes data injected as attributes."""
+    """Package object with parse tree and raw bytes data injected as attributes.
+
+    The parse tree is only created on first access, allowing checks using
+    cached data to skip parsing.
+    """
 
-    __slots__ = ('data', 'tree')
+    __slots__ = ('_content', '_bash')
 
-    def __init__(self, pkg, data, tree):
+    def __init__(self, pkg, content, bash):
         super().__init__(pkg)
-        self.data = data
-        self.tree = tree
+        self._content = content
+        self._bash = bash
+
+    @property
+    def data(self):
+        return self._content.data
+
+    @property
+    def tree(self):
+        return self._content.parse(self._bash.parser)
 
 
 class EbuildParseRepoSource(RepoSource):
     """Ebuild repository source yielding package objects and their file contents."""
 
-    required_addons = (addons.BashAddon,)
+    required_addons = (addons.BashAddon, addons.ContentAddon)
 
-    def __init__(self, *args, bash_addon):
+    def __init__(self, *args, bash_addon, content_addon):
         super().__init__(*args)
-        self.parser = bash_addon.parser
+        self.bash = bash_addon
+        self.content = content_addon
 
     def itermatch(self, restrict, **kwargs):
         for pkg in super().itermatch(restrict, **kwargs):
-            data = pkg.ebuild.bytes_fileobj().read()
-            tree = self.parser.parse(data)
-            yield _ParsedPkg(pkg, data, tree)
+            yield _ParsedPkg(pkg, self.content.ebuild(pkg), self.bash)
 
 
 class _CombinedSource(RepoSource):
@@ -0,0 +1,96 @@
+"""Timeline tracing support for scans.
+
+Spans are recorded as trace events in the JSON format used by Chrome's
+trace viewer (also supported by Perfetto and speedscope), allowing the
+activity of all scanning processes to be visualized over time.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class Tracer:
+    """Trace event recorder.
+
+    Events are stored per process with tracers inherited by forked processes
+    dropping the events recorded by their parent. Events recorded by other
+    processes are collected by passing their tracers back to the parent and
+    merging them.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._pid = os.getpid()
+        self._events = []
+
+    def __bool__(self):
+        return self.path is not None
+
+    @property
+    def events(self):
+        """Events recorded by the current process and merged from others."""
+        if self._pid != os.getpid():
+            # drop events inherited from the parent process
+            self._pid = os.getpid()
+            self._events = []
+        return self._events
+
+    def name_process(self, name):
+        """Set the name used for the current process."""
+        if self:
+            self.events.append({
+                'name': 'process_name', 'ph': 'M', 'pid': os.getpid(),
+                'args': {'name': name},
+            })
+
+    def span(self, name, **args):
+        """Return a context manager recording a span while active.
+
+        Any arguments are attached to the span, converted to strings if
+        required.
+        """
+        if self:
+            return self._span(name, args)
+        return nullcontext()
+
+    @contextmanager
+    def _span(self, name, args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            args = {
+                k: v if isinstance(v, (str, int, float)) else str(v)
+                for k, v in args.items()}
+            self.events.append({
+                'name': name, 'ph': 'X', 'ts': start * 1e6, 'dur': (end - start) * 1e6,
+                'pid': os.getpid(), 'tid': threading.get_native_id(), 'args': args,
+            })
+
+    def merge(self, tracer):
+        """Merge the events recorded by another process."""
+        self.events.extend(tracer.events)
+
+    def __getstate__(self):
+        return self.path, self.events
+
+    def __setstate__(self, state):
+        self.path, self._events = state
+        self._pid = os.getpid()
+
+    def write(self):
+        """Write all recorded events to the target file."""
+        with open(self.path, 'w') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+
+
+def get_tracer(options):
+    """Return the tracer for a given scan, tracing is disabled if none exists."""
+    return getattr(options, '_tracer', None) or _disabled
+
+
+_disabled = Tracer()
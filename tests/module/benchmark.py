@@ -0,0 +1,290 @@
+"""Synthetic repo generation and scanning benchmarks.
+
+Repos of configurable size are generated with packages depending on each
+other, inheriting chains of eclasses, and using distfiles listed in their
+Manifests along with a set of profiles across multiple arches.
+
+When run directly, a generated repo is scanned in separate processes using
+the NullReporter, first running all default checks together and then each
+check on its own, outputting the wall time, items scanned per second for
+the check's scope, and peak RSS of each run. By default, each scan starts
+without any existing caches.
+
+Alternatively, the line-based checks can be benchmarked in-process by feeding
+them all generated ebuilds using either a single shared line scanner or a
+separate scanner per check, outputting the time spent per ebuild.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+
+from snakeoil.osutils import pjoin
+
+_arches = ('amd64', 'arm64', 'ppc64', 'x86')
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(data)
+
+
+def create_repo(path, categories=4, packages=25, versions=3, fanout=3,
+                eclass_depth=3, profiles=4, distfiles=2, seed=0):
+    """Generate a synthetic ebuild repo at a given path.
+
+    Each ebuild depends on ``fanout`` random packages, inherits the head of
+    a chain of ``eclass_depth`` eclasses, and uses ``distfiles`` distfiles
+    listed in its package's Manifest. Profiles are spread across arches.
+
+    Returns a mapping of scopes to the number of items they contain.
+    """
+    rand = random.Random(seed)
+    cats = [f'cat{i}' for i in range(categories)]
+    pkgs = [f'{cat}/pkg{i}' for cat in cats for i in range(packages)]
+
+    _write(pjoin(path, 'profiles', 'repo_name'), 'synthetic\n')
+    _write(pjoin(path, 'profiles', 'categories'), '\n'.join(cats) + '\n')
+    _write(pjoin(path, 'profiles', 'arch.list'), '\n'.join(_arches) + '\n')
+    _write(pjoin(path, 'profiles', 'use.desc'), 'doc - Build documentation\n')
+    _write(pjoin(path, 'metadata', 'layout.conf'), textwrap.dedent("""\
+        masters =
+        cache-formats =
+        manifest-hashes = BLAKE2B SHA512
+        thin-manifests = true
+    """))
+    _write(pjoin(path, 'licenses', 'blank'), '')
+
+    profiles_desc = []
+    for i in range(profiles):
+        arch = _arches[i % len(_arches)]
+        profile = f'default/linux/{arch}/{i}'
+        profiles_desc.append(f'{arch} {profile} stable')
+        _write(pjoin(path, 'profiles', profile, 'eapi'), '7\n')
+        _write(pjoin(path, 'profiles', profile, 'make.defaults'), textwrap.dedent(f"""\
+            ARCH="{arch}"
+            ACCEPT_KEYWORDS="{arch}"
+        """))
+    _write(pjoin(path, 'profiles', 'profiles.desc'), '\n'.join(profiles_desc) + '\n')
+
+    # chain of eclasses, each inheriting the next one
+    for i in range(eclass_depth):
+        inherit = f'inherit synthetic{i + 1}\n' if i + 1 < eclass_depth else ''
+        _write(pjoin(path, 'eclass', f'synthetic{i}.eclass'), textwrap.dedent(f"""\
+            # @ECLASS: synthetic{i}.eclass
+            # @MAINTAINER:
+            # Synthetic <synthetic@example.com>
+            # @BLURB: synthetic eclass {i}
+            {inherit}
+            # @FUNCTION: synthetic{i}_src_compile
+            # @DESCRIPTION:
+            # Compile the package.
+            synthetic{i}_src_compile() {{
+                default
+            }}
+
+            EXPORT_FUNCTIONS src_compile
+        """))
+
+    for pkg in pkgs:
+        cat, pn = pkg.split('/')
+        pkg_dir = pjoin(path, cat, pn)
+        manifest = []
+        for v in range(1, versions + 1):
+            deps = ' '.join(
+                f'>={dep}-1' for dep in rand.sample(pkgs, min(fanout, len(pkgs)))
+                if dep != pkg)
+            distfiles_list = [f'{pn}-{v}.{i}.tar.gz' for i in range(distfiles)]
+            src_uri = ' '.join(f'https://example.com/{x}' for x in distfiles_list)
+            inherit = 'inherit synthetic0\n' if eclass_depth else ''
+            _write(pjoin(pkg_dir, f'{pn}-{v}.ebuild'), textwrap.dedent(f"""\
+                # Copyright 1999-2020 Gentoo Authors
+                # Distributed under the terms of the GNU General Public License v2
+
+                EAPI=7
+                {inherit}
+                DESCRIPTION="Synthetic package {pkg}"
+                HOMEPAGE="https://example.com/{pn}"
+                SRC_URI="{src_uri}"
+
+                LICENSE="blank"
+                SLOT="0"
+                KEYWORDS="{' '.join(f'~{arch}' for arch in _arches)}"
+                IUSE="doc"
+
+                DEPEND="{deps}"
+                RDEPEND="${{DEPEND}}
+                    doc? ( {pkgs[0]} )"
+            """))
+            for distfile in distfiles_list:
+                data = distfile.encode()
+                manifest.append(
+                    f'DIST {distfile} {len(data)} '
+                    f'BLAKE2B {hashlib.blake2b(data).hexdigest()} '
+                    f'SHA512 {hashlib.sha512(data).hexdigest()}')
+        _write(pjoin(pkg_dir, 'Manifest'), '\n'.join(sorted(manifest)) + '\n')
+        _write(pjoin(pkg_dir, 'metadata.xml'), textwrap.dedent("""\
+            <?xml version="1.0" encoding="UTF-8"?>
+            <!DOCTYPE pkgmetadata SYSTEM "http://www.gentoo.org/dtd/metadata.dtd">
+            <pkgmetadata>
+                <maintainer type="person">
+                    <email>synthetic@example.com</email>
+                </maintainer>
+            </pkgmetadata>
+        """))
+
+    return {
+        'version': len(pkgs) * versions,
+        'package': len(pkgs),
+        'category': len(cats),
+        'repo': 1,
+    }
+
+
+def run_scan(repo, cache_dir, args=()):
+    """Scan a given repo in a separate process, returning its wall time and peak RSS in KiB."""
+    cmd = [
+        sys.executable, '-c', 'from pkgcheck.scripts import run; run("pkgcheck")',
+        'scan', '--config', 'no', '--cache-dir', cache_dir, '-R', 'NullReporter',
+        '-r', repo, *args,
+    ]
+    # stderr is spooled to a file since it isn't read until the scan exits
+    with tempfile.TemporaryFile() as stderr_file:
+        start = time.perf_counter()
+        p = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=stderr_file)
+        # collect resource usage for the scanning process and all its children
+        _pid, status, rusage = os.wait4(p.pid, 0)
+        elapsed = time.perf_counter() - start
+        if os.WIFEXITED(status):
+            p.returncode = os.WEXITSTATUS(status)
+        else:
+            p.returncode = -os.WTERMSIG(status)
+        stderr_file.seek(0)
+        stderr = stderr_file.read().decode()
+    # scans exit with status 1 when error results exist, but output nothing on stderr
+    if p.returncode not in (0, 1) or stderr:
+        raise RuntimeError(f'scan failed: {" ".join(args)}\n{stderr}')
+    return elapsed, rusage.ru_maxrss
+
+
+def feed_line_checks(repo, shared=True, rounds=5):
+    """Feed all ebuilds of a given repo to the line checks, returning the time spent per ebuild.
+
+    When ``shared`` is disabled, each check uses its own line scanner so every
+    check scans the ebuild lines separately.
+    """
+    from pkgcore.ebuild import repo_objs, repository
+    from pkgcore.restrictions import packages
+
+    from pkgcheck import addons, objects
+    from pkgcheck.checks import LineCheck
+    from pkgcheck.sources import EbuildFileRepoSource
+
+    repo_config = repo_objs.RepoConfig(location=repo)
+    options = argparse.Namespace(
+        target_repo=repository.UnconfiguredTree(repo, repo_config=repo_config))
+    source = EbuildFileRepoSource(options, content_addon=addons.ContentAddon(options))
+    pkgs = list(source.itermatch(packages.AlwaysTrue))
+
+    line_scanner = addons.LineScannerAddon(options)
+    checks = []
+    for cls in objects.CHECKS.values():
+        if issubclass(cls, LineCheck):
+            if not shared:
+                line_scanner = addons.LineScannerAddon(options)
+            checks.append(cls(options, line_scanner_addon=line_scanner))
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for pkg in pkgs:
+            for check in checks:
+                for _result in check.feed(pkg):
+                    pass
+    return (time.perf_counter() - start) / (rounds * len(pkgs))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='benchmark scanning synthetic repos')
+    parser.add_argument('--categories', type=int, default=4)
+    parser.add_argument('--packages', type=int, default=25, help='packages per category')
+    parser.add_argument('--versions', type=int, default=3, help='versions per package')
+    parser.add_argument('--fanout', type=int, default=3, help='dependencies per version')
+    parser.add_argument('--eclass-depth', type=int, default=3, help='eclass inheritance depth')
+    parser.add_argument('--profiles', type=int, default=4)
+    parser.add_argument('--distfiles', type=int, default=2, help='Manifest entries per version')
+    parser.add_argument('--checks', help='comma-separated checks to benchmark separately')
+    parser.add_argument(
+        '--warm', action='store_true',
+        help='reuse caches primed by an initial scan instead of starting each scan without caches')
+    parser.add_argument(
+        '--line-checks', action='store_true',
+        help='benchmark feeding ebuilds to line checks using shared and separate scanners')
+    parser.add_argument('--json', action='store_true', help='output results as JSON')
+    parser.add_argument('scan_args', nargs='*', help='extra pkgcheck scan arguments')
+    options = parser.parse_args(args)
+
+    from pkgcheck import objects
+    from pkgcheck.checks import GentooRepoCheck, OverlayRepoCheck
+    if options.checks is None:
+        # generated repos are standalone, non-gentoo repos
+        checks = sorted(
+            name for name, cls in objects.CHECKS.default.items()
+            if not issubclass(cls, (GentooRepoCheck, OverlayRepoCheck)))
+    else:
+        checks = options.checks.split(',')
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        repo = pjoin(tmpdir, 'repo')
+        items = create_repo(
+            repo, categories=options.categories, packages=options.packages,
+            versions=options.versions, fanout=options.fanout,
+            eclass_depth=options.eclass_depth, profiles=options.profiles,
+            distfiles=options.distfiles)
+
+        def scan(name, scope, args):
+            if options.warm:
+                cache_dir = pjoin(tmpdir, 'cache')
+            else:
+                cache_dir = tempfile.mkdtemp(dir=tmpdir)
+            elapsed, rss = run_scan(repo, cache_dir, [*args, *options.scan_args])
+            results[name] = {
+                'scope': scope, 'time': elapsed,
+                'items/s': items.get(scope, 1) / elapsed, 'rss': rss}
+
+        if options.line_checks:
+            for mode, shared in (('shared', True), ('separate', False)):
+                results[mode] = {'time/ebuild': feed_line_checks(repo, shared=shared)}
+        else:
+            if options.warm:
+                run_scan(repo, pjoin(tmpdir, 'cache'), options.scan_args)
+            scan('all', 'version', [])
+            for check in checks:
+                scan(check, str(objects.CHECKS[check].scope), ['-c', check])
+
+    if options.json:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    elif options.line_checks:
+        print(f'{"scanner":<8}  {"time/ebuild":>11}')
+        for name, r in results.items():
+            print(f'{name:<8}  {r["time/ebuild"] * 1e6:>9.1f}us')
+    else:
+        width = max(map(len, results))
+        print(f'{"check":<{width}}  {"scope":<8}  {"time":>7}  {"items/s":>9}  {"rss":>7}')
+        for name, r in results.items():
+            print(
+                f'{name:<{width}}  {r["scope"]:<8}  {r["time"]:>6.2f}s  '
+                f'{r["items/s"]:>9.1f}  {r["rss"] / 1024:>5.0f}MB')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,3 +1,6 @@
+import pickle
+
+from pkgcheck import addons
 from pkgcheck.checks import acct
 from pkgcore.test.misc import FakeRepo
 from snakeoil.cli import arghparse
@@ -13,7 +16,8 @@ class TestAcctUser(misc.ReportTestCase):
 
     def mk_check(self, pkgs):
         self.repo = FakeRepo(pkgs=pkgs, repo_id='test')
-        check = self.check_kls(arghparse.Namespace(target_repo=self.repo))
+        options = arghparse.Namespace(target_repo=self.repo)
+        check = self.check_kls(options, content_addon=addons.ContentAddon(options))
         return check
 
     def mk_pkg(self, name, identifier, version=1, ebuild=None):
@@ -56,6 +60,19 @@ ACCT_{self.kind.upper()}_ID="{identifier}"
         assert r.pkgs == (f'acct-{self.kind}/bar-1', f'acct-{self.kind}/foo-1')
         assert f'conflicting {self.kind} id 100 usage: ' in str(r)
 
+    def test_merged_conflicting_ids(self):
+        pkgs = (self.mk_pkg('foo', 100),
+                self.mk_pkg('bar', 100))
+        # feed packages to separate checks as done for category shards
+        check = self.mk_check(pkgs)
+        for pkg in pkgs:
+            shard = self.mk_check(pkgs)
+            assert list(shard.feed(pkg)) == []
+            check.merge(pickle.loads(pickle.dumps(shard.state())))
+        r, = check.finish()
+        assert isinstance(r, acct.ConflictingAccountIdentifiers)
+        assert r.pkgs == (f'acct-{self.kind}/bar-1', f'acct-{self.kind}/foo-1')
+
     def test_self_nonconflicting_ids(self):
         pkgs = (self.mk_pkg('foo', 100),
                 self.mk_pkg('foo', 100, version=2))
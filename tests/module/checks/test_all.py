@@ -1,9 +1,9 @@
 import pytest
-from pkgcheck import objects, results
+from pkgcheck import addons, objects, results
 from pkgcheck import checks as checks_mod
 from snakeoil.cli import arghparse
 
-from ..misc import init_check
+from ..misc import FakePkg, init_check
 
 
 def test_checks():
@@ -153,3 +153,40 @@ class TestNetworkCheck:
     def test_network_enabled(self, tool):
         options, _ = tool.parse_args(['scan', '--net'])
         assert init_check(checks_mod.NetworkCheck, options)
+
+
+class TestLineCheck:
+
+    def mk_checks(self, line_scanner=None, **triggers):
+        if line_scanner is None:
+            line_scanner = addons.LineScannerAddon(None)
+        checks = {}
+        for name, strings in triggers.items():
+            cls = type(name, (checks_mod.LineCheck,), {
+                'line_triggers': classmethod(lambda cls, eapi, s=strings: s),
+                'known_results': frozenset(),
+            })
+            checks[name] = cls(None, line_scanner_addon=line_scanner)
+        return checks
+
+    def test_matching_lines(self):
+        checks = self.mk_checks(Foo=('foo',), Bar=('bar', 'baz'))
+        pkg = FakePkg('cat/pkg-1', lines=('foo\n', 'bar\n', '\n', 'baz foo\n'))
+        assert list(checks['Foo'].lines(pkg)) == [(1, 'foo\n'), (4, 'baz foo\n')]
+        assert list(checks['Bar'].lines(pkg)) == [(2, 'bar\n'), (4, 'baz foo\n')]
+
+    def test_overlapping_strings(self):
+        checks = self.mk_checks(Foo=('foobar',), Bar=('barbaz', 'oob'))
+        pkg = FakePkg('cat/pkg-1', lines=('foobarbaz\n', 'a\n', 'barbaz'))
+        assert [x for x, _ in checks['Foo'].lines(pkg)] == [1]
+        assert [x for x, _ in checks['Bar'].lines(pkg)] == [1, 3]
+
+    def test_separate_scanners(self):
+        pkg = FakePkg('cat/pkg-1', lines=('foo\n', 'bar\n'))
+        foo_scanner = addons.LineScannerAddon(None)
+        foo = self.mk_checks(foo_scanner, Foo=('foo',))['Foo']
+        bar = self.mk_checks(Bar=('bar',))['Bar']
+        assert list(foo.lines(pkg)) == [(1, 'foo\n')]
+        assert list(bar.lines(pkg)) == [(2, 'bar\n')]
+        # checks are only registered with their own scanner
+        assert list(foo_scanner.scan(pkg)) == [foo.__class__]
@@ -1,5 +1,6 @@
 from itertools import chain
 
+from pkgcheck import addons
 from pkgcheck.checks import codingstyle
 from pkgcore.ebuild.eapi import EAPI
 from pkgcore.test.misc import FakeRepo
@@ -10,7 +11,7 @@ from .. import misc
 class TestBadCommandsCheck(misc.ReportTestCase):
 
     check_kls = codingstyle.BadCommandsCheck
-    check = codingstyle.BadCommandsCheck(None)
+    check = codingstyle.BadCommandsCheck(None, line_scanner_addon=addons.LineScannerAddon(None))
 
     def mk_pkg(self, eapi='0', lines=()):
         return misc.FakePkg("dev-util/diff-0.5", data={'EAPI': eapi}, lines=lines)
@@ -84,14 +85,14 @@ class TestInsintoCheck(misc.ReportTestCase):
             "/usr/share/applications", "/usr/share/applications",
             "//usr/share//applications",
         )
-        check = self.check_kls(None)
+        check = self.check_kls(None, line_scanner_addon=addons.LineScannerAddon(None))
 
         reports = self.assertReports(check, fake_pkg)
         for r, path in zip(reports, bad):
             assert path in str(r)
 
     def test_docinto(self):
-        check = self.check_kls(None)
+        check = self.check_kls(None, line_scanner_addon=addons.LineScannerAddon(None))
         for path in ('${PF}', '${P}', '${PF}/examples'):
             for eapi_str, eapi in EAPI.known_eapis.items():
                 fake_src = [f'\tinsinto /usr/share/doc/{path}\n']
@@ -144,7 +145,7 @@ class TestAbsoluteSymlink(misc.ReportTestCase):
         fake_src.append("# That's it for now\n")
         fake_pkg = misc.FakePkg("dev-util/diffball-0.5", lines=fake_src)
 
-        check = self.check_kls(None)
+        check = self.check_kls(None, line_scanner_addon=addons.LineScannerAddon(None))
         reports = self.assertReports(check, fake_pkg)
 
         assert len(reports) == len(absolute) + len(absolute_prefixed)
@@ -155,7 +156,7 @@ class TestAbsoluteSymlink(misc.ReportTestCase):
 class TestPathVariablesCheck(misc.ReportTestCase):
 
     check_kls = codingstyle.PathVariablesCheck
-    check = check_kls(None)
+    check = check_kls(None, line_scanner_addon=addons.LineScannerAddon(None))
 
     def _found(self, cls, suffix=''):
         # check single and multiple matches across all specified variables
@@ -268,13 +269,16 @@ class TestObsoleteUri(misc.ReportTestCase):
 
     check_kls = codingstyle.ObsoleteUriCheck
 
+    def mk_check(self):
+        return self.check_kls(None, line_scanner_addon=addons.LineScannerAddon(None))
+
     def test_github_archive_uri(self):
         uri = 'https://github.com/foo/bar/archive/${PV}.tar.gz'
         fake_src = [
             f'SRC_URI="{uri} -> ${{P}}.tar.gz"\n'
         ]
         fake_pkg = misc.FakePkg("dev-util/diffball-0.5", lines=fake_src)
-        self.assertNoReport(self.check_kls(None), fake_pkg)
+        self.assertNoReport(self.mk_check(), fake_pkg)
 
     def test_commented_github_tarball_uri(self):
         uri = 'https://github.com/foo/bar/tarball/${PV}'
@@ -284,7 +288,7 @@ class TestObsoleteUri(misc.ReportTestCase):
             f'# {uri}\n'
         ]
         fake_pkg = misc.FakePkg("dev-util/diffball-0.5", lines=fake_src)
-        self.assertNoReport(self.check_kls(None), fake_pkg)
+        self.assertNoReport(self.mk_check(), fake_pkg)
 
     def test_github_tarball_uri(self):
         uri = 'https://github.com/foo/bar/tarball/${PV}'
@@ -293,7 +297,7 @@ class TestObsoleteUri(misc.ReportTestCase):
         ]
 
         fake_pkg = misc.FakePkg("dev-util/diffball-0.5", lines=fake_src)
-        r = self.assertReport(self.check_kls(None), fake_pkg)
+        r = self.assertReport(self.mk_check(), fake_pkg)
         assert r.line == 1
         assert r.uri == uri
         assert (r.replacement ==
@@ -307,7 +311,7 @@ class TestObsoleteUri(misc.ReportTestCase):
         ]
 
         fake_pkg = misc.FakePkg("dev-util/diffball-0.5", lines=fake_src)
-        r = self.assertReport(self.check_kls(None), fake_pkg)
+        r = self.assertReport(self.mk_check(), fake_pkg)
         assert r.line == 1
         assert r.uri == uri
         assert (r.replacement ==
@@ -320,7 +324,7 @@ class TestObsoleteUri(misc.ReportTestCase):
             f'SRC_URI="{uri}"\n'
         ]
         fake_pkg = misc.FakePkg("dev-util/diffball-0.5", lines=fake_src)
-        self.assertNoReport(self.check_kls(None), fake_pkg)
+        self.assertNoReport(self.mk_check(), fake_pkg)
 
     def test_gitlab_tar_gz_uri(self):
         uri = 'https://gitlab.com/foo/bar/repository/archive.tar.gz?ref=${PV}'
@@ -329,7 +333,7 @@ class TestObsoleteUri(misc.ReportTestCase):
         ]
 
         fake_pkg = misc.FakePkg("dev-util/diffball-0.5", lines=fake_src)
-        r = self.assertReport(self.check_kls(None), fake_pkg)
+        r = self.assertReport(self.mk_check(), fake_pkg)
         assert r.line == 1
         assert r.uri == uri
         assert (r.replacement ==
@@ -343,7 +347,7 @@ class TestObsoleteUri(misc.ReportTestCase):
         ]
 
         fake_pkg = misc.FakePkg("dev-util/diffball-0.5", lines=fake_src)
-        r = self.assertReport(self.check_kls(None), fake_pkg)
+        r = self.assertReport(self.mk_check(), fake_pkg)
         assert r.line == 1
         assert r.uri == uri
         assert (r.replacement ==
@@ -357,7 +361,7 @@ class TestObsoleteUri(misc.ReportTestCase):
         ]
 
         fake_pkg = misc.FakePkg("dev-util/diffball-0.5", lines=fake_src)
-        r = self.assertReport(self.check_kls(None), fake_pkg)
+        r = self.assertReport(self.mk_check(), fake_pkg)
         assert r.line == 1
         assert r.uri == uri
         assert (r.replacement ==
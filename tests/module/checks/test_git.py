@@ -1,4 +1,5 @@
 import os
+import subprocess
 import textwrap
 from datetime import datetime, timedelta
 from unittest.mock import patch
@@ -322,6 +323,47 @@ class TestGitCommitsCheck(ReportTestCase):
         assert r == expected
 
 
+class TestGitObjects:
+
+    @pytest.mark.parametrize('object_format', ('sha1', 'sha256'))
+    def test_extract(self, tmp_path, make_git_repo, object_format):
+        path = str(tmp_path / 'repo')
+        os.makedirs(path)
+        subprocess.run(
+            ['git', 'init', f'--object-format={object_format}'], cwd=path,
+            stdout=subprocess.DEVNULL, check=True)
+        git_repo = make_git_repo(path)
+        os.makedirs(pjoin(path, 'cat', 'pkg', 'files'))
+        with open(pjoin(path, 'cat', 'pkg', 'pkg-1.ebuild'), 'w') as f:
+            f.write('EAPI=7\n')
+        with open(pjoin(path, 'cat', 'pkg', 'files', 'foo.patch'), 'w') as f:
+            f.write('patch\n')
+        with open(pjoin(path, 'cat', 'pkg', 'files', 'foo.sh'), 'w') as f:
+            f.write('#!/bin/sh\n')
+        os.chmod(pjoin(path, 'cat', 'pkg', 'files', 'foo.sh'), 0o755)
+        os.symlink('pkg-1.ebuild', pjoin(path, 'cat', 'pkg', 'pkg-2.ebuild'))
+        git_repo.add_all('cat/pkg: initial import')
+
+        git_objects = git_mod._GitObjects(path)
+        dest = str(tmp_path / 'extracted')
+        git_objects.extract('HEAD:cat/pkg', dest)
+        assert sorted(os.listdir(dest)) == ['files', 'pkg-1.ebuild', 'pkg-2.ebuild']
+        with open(pjoin(dest, 'pkg-1.ebuild')) as f:
+            assert f.read() == 'EAPI=7\n'
+        with open(pjoin(dest, 'files', 'foo.patch')) as f:
+            assert f.read() == 'patch\n'
+        assert os.readlink(pjoin(dest, 'pkg-2.ebuild')) == 'pkg-1.ebuild'
+        # executable files keep their mode
+        assert os.access(pjoin(dest, 'files', 'foo.sh'), os.X_OK)
+        assert not os.access(pjoin(dest, 'files', 'foo.patch'), os.X_OK)
+
+        # the git process is stopped when closed
+        proc = git_objects.proc
+        git_objects.close()
+        assert proc.returncode == 0
+        git_objects.close()
+
+
 class TestGitPkgCommitsCheck(ReportTestCase):
 
     check_kls = git_mod.GitPkgCommitsCheck
@@ -425,9 +467,12 @@ class TestGitPkgCommitsCheck(ReportTestCase):
         expected = git_mod.DroppedStableKeywords(['amd64'], commit, pkg=CPV('cat/pkg-1'))
         assert r == expected
 
-        # git archive failures error out
-        with patch('pkgcheck.checks.git.subprocess.Popen') as git_archive:
-            git_archive.return_value.poll.return_value = -1
+        # git cat-file failures error out
+        self.init_check()
+        with patch('pkgcheck.checks.git.subprocess.run') as git_config, \
+                patch('pkgcheck.checks.git.subprocess.Popen') as git_cat_file:
+            git_config.return_value.stdout = ''
+            git_cat_file.return_value.stdout.readline.return_value = b'HEAD~1:cat/pkg missing\n'
             with pytest.raises(UserException, match='failed populating archive repo'):
                 self.assertNoReport(self.check, self.source)
 
@@ -492,9 +537,12 @@ class TestGitPkgCommitsCheck(ReportTestCase):
         self.init_check()
         self.assertNoReport(self.check, self.source)
 
-        # git archive failures error out
-        with patch('pkgcheck.checks.git.subprocess.Popen') as git_archive:
-            git_archive.return_value.poll.return_value = -1
+        # git cat-file failures error out
+        self.init_check()
+        with patch('pkgcheck.checks.git.subprocess.run') as git_config, \
+                patch('pkgcheck.checks.git.subprocess.Popen') as git_cat_file:
+            git_config.return_value.stdout = ''
+            git_cat_file.return_value.stdout.readline.return_value = b'HEAD~1:cat/pkg missing\n'
             with pytest.raises(UserException, match='failed populating archive repo'):
                 self.assertNoReport(self.check, self.source)
 
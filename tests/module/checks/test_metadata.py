@@ -845,8 +845,11 @@ class TestDependencyCheck(use_based(), misc.ReportTestCase):
                 FakePkg('dev-libs/bar-2', slot='2'),
             )
         kwargs['search_repo'] = FakeRepo(pkgs=pkgs, repo_id='test')
-        git_addon = git.GitAddon(self.get_options(**kwargs))
-        return super().mk_check(options=kwargs, git_addon=git_addon)
+        options = self.get_options(**kwargs)
+        git_addon = git.GitAddon(options)
+        repo_index_addon = addons.RepoIndexAddon(options)
+        return super().mk_check(
+            options=kwargs, git_addon=git_addon, repo_index_addon=repo_index_addon)
 
     # pull the set of dependency attrs from the most recent EAPI
     dep_attrs = list(eapi.EAPI.known_eapis.values())[-1].dep_keys
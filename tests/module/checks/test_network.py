@@ -12,12 +12,16 @@ from unittest.mock import patch
 from pkgcheck import __title__ as project
 from pkgcheck import objects, reporters
 from pkgcheck.checks import NetworkCheck
-from pkgcheck.checks.network import HomepageUrlCheck, FetchablesUrlCheck, DeadUrl
+from pkgcheck.checks.network import (
+    HomepageUrlCheck, FetchablesUrlCheck, DeadUrl, HostUnresponsive, RequestError,
+    UnresponsiveUrl)
 from pkgcheck.packages import RawCPV
 from pkgcheck.scripts import run
 import pytest
 from snakeoil.formatters import PlainTextFormatter
 from snakeoil.osutils import pjoin
+
+from ..netserver import StandInServer
 # skip module tests if requests isn't available
 requests = pytest.importorskip('requests')
 
@@ -151,3 +155,154 @@ class TestNetworkChecks:
                         assert len(results) == 1
                         assert results[0] == expected_result
                         assert self._render_results(results), 'failed rendering results'
+
+    def test_cached_verdicts(self, capsys):
+        check_name = 'HomepageUrlCheck'
+        path = pjoin(self.repos_dir, 'network', check_name, 'RedirectedUrl')
+        data_dir = pjoin(self.repos_data, 'network', check_name, 'RedirectedUrl')
+        spec = importlib.util.spec_from_file_location(
+            'responses_mod', pjoin(path, 'responses.py'))
+        responses_mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(responses_mod)
+        with open(pjoin(data_dir, 'expected.json')) as f:
+            expected_results = set(reporters.JsonStream.from_iter(f))
+
+        args = self.args[:-2] + [
+            '--cache', 'net', '--cache-dir', self.cache_dir,
+            '-r', pjoin(self.repos_dir, 'network'),
+            '-R', 'JsonStream', '-c', check_name, f'{check_name}/RedirectedUrl',
+        ]
+        # requests are made in a separate process so failing connections are
+        # faked to determine if cached verdicts are used
+        failed = requests.exceptions.ConnectionError('failed')
+        for side_effect in (responses_mod.responses, failed):
+            with patch('pkgcheck.net.requests.Session.send') as send:
+                send.side_effect = side_effect
+                with patch('sys.argv', args):
+                    with pytest.raises(SystemExit) as excinfo:
+                        self.script()
+                    assert excinfo.value.code == 0
+            out, err = capsys.readouterr()
+            assert not err
+            assert set(reporters.JsonStream.from_iter(io.StringIO(out))) == expected_results
+
+        # expired verdicts are rechecked
+        with patch('pkgcheck.net.requests.Session.send') as send:
+            send.side_effect = failed
+            with patch('sys.argv', args + ['--url-ttl', '0']):
+                with pytest.raises(SystemExit) as excinfo:
+                    self.script()
+                assert excinfo.value.code == 0
+        out, err = capsys.readouterr()
+        results = list(reporters.JsonStream.from_iter(io.StringIO(out)))
+        assert [x.__class__ for x in results] == [DeadUrl]
+
+    def test_unresponsive_host(self):
+        from pkgcheck.net import Session
+        session = Session()
+        with patch('pkgcheck.net.requests.Session.send') as send:
+            send.side_effect = requests.exceptions.ReadTimeout('timed out')
+            for _ in range(session.max_timeouts):
+                with pytest.raises(RequestError, match='timed out'):
+                    session.head('https://pkgcheck.net/foo')
+            assert send.call_count == session.max_timeouts
+            # requests to unresponsive hosts fail without hitting the network
+            with pytest.raises(HostUnresponsive, match='unresponsive'):
+                session.head('https://pkgcheck.net/bar')
+            assert send.call_count == session.max_timeouts
+            # other hosts are unaffected
+            send.side_effect = None
+            session.head('https://github.com/pkgcore/pkgcheck')
+            assert send.call_count == session.max_timeouts + 1
+
+    def test_unresponsive_host_verdicts(self, make_repo, capsys):
+        repo = make_repo()
+        for i in range(4):
+            repo.create_ebuild(f'cat/pkg{i}-1', homepage=f'https://pkgcheck.net/{i}')
+        args = self.args[:-2] + [
+            '--cache', 'net', '--cache-dir', self.cache_dir, '--host-tasks', '1',
+            '-r', repo.location, '-R', 'JsonStream', '-c', 'HomepageUrlCheck',
+        ]
+
+        # requests are skipped once their host repeatedly times out
+        with patch('pkgcheck.net.requests.Session.send') as send:
+            send.side_effect = requests.exceptions.ReadTimeout('timed out')
+            with patch('sys.argv', args):
+                with pytest.raises(SystemExit) as excinfo:
+                    self.script()
+                assert excinfo.value.code == 0
+        out, err = capsys.readouterr()
+        assert not err
+        results = list(reporters.JsonStream.from_iter(io.StringIO(out)))
+        assert sorted(x.__class__.__name__ for x in results) == [
+            'DeadUrl', 'DeadUrl', 'DeadUrl', 'UnresponsiveUrl']
+        skipped = next(x.package for x in results if isinstance(x, UnresponsiveUrl))
+
+        # and aren't cached, unlike requests that actually failed
+        with patch('pkgcheck.net.requests.Session.send') as send:
+            send.side_effect = requests.exceptions.ConnectionError('failed')
+            with patch('sys.argv', args):
+                with pytest.raises(SystemExit) as excinfo:
+                    self.script()
+                assert excinfo.value.code == 0
+        out, err = capsys.readouterr()
+        assert not err
+        results = {
+            x.package: (x.__class__, x.message)
+            for x in reporters.JsonStream.from_iter(io.StringIO(out))}
+        assert results.pop(skipped) == (DeadUrl, 'connection failed')
+        assert list(results.values()) == [(DeadUrl, 'timed out')] * 3
+
+
+class TestStandInServer:
+
+    script = partial(run, project)
+
+    @pytest.fixture(autouse=True)
+    def _setup(self, testconfig, make_repo):
+        self.repo = make_repo()
+        self.args = [
+            project, '--config', testconfig,
+            'scan', '--config', 'no', '--cache', 'no', '--net', '-r', self.repo.location,
+            '-c', 'HomepageUrlCheck', '-R', 'JsonStream', '--timeout', '0.5',
+        ]
+        with StandInServer() as server:
+            with patch.dict(os.environ, {'REQUESTS_CA_BUNDLE': server.ca_bundle}):
+                self.server = server
+                yield
+
+    def test_scan(self, capsys):
+        server = self.server
+        urls = {
+            'ok': server.url('ok/pkg', 'https'),
+            'http': server.url('ok/pkg'),
+            'moved': server.url('moved/pkg'),
+            'moved-https': server.url('moved-https/pkg'),
+            'hsts': server.url('hsts/pkg'),
+            'refuse-head': server.url('refuse-head/405/pkg', 'https'),
+            'dead': server.url('dead/pkg', 'https'),
+            'ssl': server.ssl_error_url('ok/ssl'),
+            'timeout': server.url('delay/2/ok/pkg', 'https'),
+            'ftp': server.url('pkg.tar.gz', 'ftp'),
+        }
+        for pkg, url in urls.items():
+            self.repo.create_ebuild(f'cat/{pkg}-1', homepage=url)
+
+        with patch('sys.argv', self.args):
+            with pytest.raises(SystemExit) as excinfo:
+                self.script()
+            assert excinfo.value.code == 0
+        out, err = capsys.readouterr()
+        assert not err
+        results = {
+            r.package: (r.__class__.__name__, getattr(r, 'new_url', None))
+            for r in reporters.JsonStream.from_iter(io.StringIO(out))}
+        assert results == {
+            'moved': ('RedirectedUrl', server.url('ok/pkg')),
+            'moved-https': ('HttpsUrlAvailable', server.url('ok/pkg', 'https')),
+            'hsts': ('RedirectedUrl', server.ssl_error_url('ok/pkg')),
+            'dead': ('DeadUrl', None),
+            'ssl': ('SSLCertificateError', None),
+            'timeout': ('DeadUrl', None),
+            'ftp': ('DeadUrl', None),
+        }
@@ -90,6 +90,19 @@ class TestRepoDirCheck(misc.Tmpdir, misc.ReportTestCase):
         assert r.path == 'dev-util/foo/files/foo'
         assert "'dev-util/foo/files/foo'" in str(r)
 
+    def test_subtasks(self):
+        check = self.mk_check()
+        filesdir = self.mk_pkg('dev-util/foo')
+        os.mkdir(pjoin(self.repo.location, '.git'))
+        for path in (pjoin(self.repo.location, 'foo'), pjoin(filesdir, 'foo')):
+            with open(path, 'wb') as f:
+                f.write(b'\xd3\xad\xbe\xef')
+        # the repo root and each non-ignored top-level dir are scanned separately
+        subtasks = check.subtasks()
+        assert subtasks == [self.repo.location, pjoin(self.repo.location, 'dev-util')]
+        results = [[r.path for r in check.run_subtask(x)] for x in subtasks]
+        assert results == [['foo'], ['dev-util/foo/files/foo']]
+
     def test_gitignore(self):
         # distfiles located in deprecated in-tree location are reported by default
         check = self.mk_check()
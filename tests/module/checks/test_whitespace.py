@@ -1,6 +1,7 @@
 import re
 import sys
 import unicodedata
+from pkgcheck import addons
 from pkgcheck.checks import whitespace
 
 from .. import misc
@@ -10,7 +11,7 @@ class WhitespaceCheckTest(misc.ReportTestCase):
     """Various whitespace related test support."""
 
     check_kls = whitespace.WhitespaceCheck
-    check = whitespace.WhitespaceCheck(None)
+    check = whitespace.WhitespaceCheck(None, line_scanner_addon=addons.LineScannerAddon(None))
 
 
 class TestWhitespaceFound(WhitespaceCheckTest):
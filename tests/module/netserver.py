@@ -0,0 +1,297 @@
+"""Local stand-in servers for network checks.
+
+The servers run on localhost in background threads, responding to requests
+based on their paths so network checks can be tested and benchmarked
+without internet access:
+
+- ``/ok/*``: successful response
+- ``/dead/*``: 404 response
+- ``/moved/*``: permanent redirect to the related ``/ok/*`` URL
+- ``/moved-https/*``: permanent redirect to the related HTTPS ``/ok/*`` URL
+- ``/hsts/*``: permanent redirect to the related ``/ok/*`` URL with HSTS enabled
+- ``/refuse-head/<status>/*``: HEAD requests fail with the given status (e.g.
+  405 or 501) while GET requests succeed
+- ``/delay/<seconds>/*``: the response for the remaining path is delayed,
+  e.g. to trigger timeouts
+
+HTTPS requests use a bundled self-signed cert for localhost that must be
+trusted by clients, see :attr:`StandInServer.ca_bundle`. Requesting HTTPS
+URLs from the HTTP server simulates SSL failures while FTP URLs point to a
+server dropping all connections, simulating dead FTP servers.
+
+When run directly, a repo of packages with URLs pointing at the servers is
+generated and scanned using the network checks, outputting the throughput,
+request latencies, and connection counts.
+"""
+
+import argparse
+import os
+import socketserver
+import ssl
+import statistics
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+_data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'net')
+
+
+class _Stats:
+    """Thread-safe request and connection statistics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.connections = 0
+        self.active = 0
+        self.peak = 0
+
+    def connect(self):
+        with self._lock:
+            self.connections += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def disconnect(self):
+        with self._lock:
+            self.active -= 1
+
+    def request(self, latency):
+        with self._lock:
+            self.latencies.append(latency)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler generating responses based on request paths."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.stats.connect()
+
+    def finish(self):
+        try:
+            super().finish()
+        finally:
+            self.server.stats.disconnect()
+
+    def do_HEAD(self):
+        self._respond()
+
+    def do_GET(self):
+        self._respond()
+
+    def _respond(self):
+        start = time.perf_counter()
+        parts = self.path.lstrip('/').split('/')
+        delay = self.server.stand_in.latency
+        if parts[0] == 'delay':
+            delay += float(parts[1])
+            parts = parts[2:]
+        time.sleep(delay)
+
+        kind, path = parts[0], '/'.join(parts[1:])
+        scheme = self.server.scheme
+        headers = {}
+        if kind == 'ok':
+            status = 200
+        elif kind == 'moved':
+            status = 301
+            headers['Location'] = self.server.stand_in.url(f'ok/{path}', scheme)
+        elif kind == 'moved-https':
+            status = 301
+            headers['Location'] = self.server.stand_in.url(f'ok/{path}', 'https')
+        elif kind == 'hsts':
+            status = 301
+            headers['Location'] = self.server.stand_in.url(f'ok/{path}', scheme)
+            headers['Strict-Transport-Security'] = 'max-age=31536000'
+        elif kind == 'refuse-head':
+            status = int(parts[1]) if self.command == 'HEAD' else 200
+        else:
+            status = 404
+
+        try:
+            self.send_response(status)
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        except (BrokenPipeError, ConnectionResetError):
+            # client gave up, e.g. after timing out
+            self.close_connection = True
+        self.server.stats.request(time.perf_counter() - start)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+
+    daemon_threads = True
+    # avoid refusing connections when many clients connect at once
+    request_queue_size = 1024
+
+    def __init__(self, stand_in, scheme, ssl_context=None):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.stand_in = stand_in
+        self.scheme = scheme
+        self.stats = stand_in.stats
+        if ssl_context is not None:
+            # handshake in handler threads instead of blocking the listener
+            self.socket = ssl_context.wrap_socket(
+                self.socket, server_side=True, do_handshake_on_connect=False)
+
+
+class _DroppingServer(socketserver.ThreadingTCPServer):
+    """Server closing all connections as soon as they're accepted."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), socketserver.BaseRequestHandler)
+
+
+class StandInServer:
+    """HTTP, HTTPS, and FTP stand-in servers.
+
+    A latency in seconds can be specified to delay all responses.
+    """
+
+    ca_bundle = os.path.join(_data_dir, 'localhost.crt')
+
+    def __init__(self, latency=0):
+        self.latency = latency
+        self.stats = _Stats()
+        ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        ssl_context.load_cert_chain(
+            self.ca_bundle, os.path.join(_data_dir, 'localhost.key'))
+        self._servers = {
+            'http': _HTTPServer(self, 'http'),
+            'https': _HTTPServer(self, 'https', ssl_context),
+            'ftp': _DroppingServer(),
+        }
+        self._threads = []
+
+    def url(self, path, scheme='http'):
+        """Return the URL for a given path served by the server for a scheme."""
+        port = self._servers[scheme].server_address[1]
+        return f'{scheme}://127.0.0.1:{port}/{path}'
+
+    def ssl_error_url(self, path):
+        """Return an HTTPS URL for a given path that fails the SSL handshake."""
+        return self.url(path).replace('http://', 'https://', 1)
+
+    def start(self):
+        for server in self._servers.values():
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        for server in self._servers.values():
+            server.shutdown()
+            server.server_close()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def create_repo(path, server, pkgs):
+    """Generate an ebuild repo with packages using URLs served by a given server.
+
+    Each package uses a different mix of URL types for its HOMEPAGE, SRC_URI,
+    and metadata.xml.
+    """
+    kinds = (
+        ('ok', 'http'), ('moved', 'http'), ('moved-https', 'http'),
+        ('hsts', 'https'), ('refuse-head/405', 'https'), ('dead', 'https'),
+    )
+    os.makedirs(os.path.join(path, 'profiles'))
+    with open(os.path.join(path, 'profiles', 'repo_name'), 'w') as f:
+        f.write('netbench\n')
+    os.makedirs(os.path.join(path, 'metadata'))
+    with open(os.path.join(path, 'metadata', 'layout.conf'), 'w') as f:
+        f.write('masters =\ncache-formats =\nthin-manifests = true\n')
+    os.makedirs(os.path.join(path, 'licenses'))
+    with open(os.path.join(path, 'licenses', 'blank'), 'w') as f:
+        pass
+
+    for i in range(pkgs):
+        pkg_dir = os.path.join(path, 'cat', f'pkg{i}')
+        os.makedirs(pkg_dir)
+        homepage = server.url(f'{kinds[i % len(kinds)][0]}/pkg{i}', kinds[i % len(kinds)][1])
+        src_uri = server.url(f'ok/pkg{i}-1.tar.gz', 'https')
+        doc = server.url(f'{kinds[(i + 1) % len(kinds)][0]}/pkg{i}/doc')
+        with open(os.path.join(pkg_dir, f'pkg{i}-1.ebuild'), 'w') as f:
+            f.write(textwrap.dedent(f"""\
+                EAPI=7
+                DESCRIPTION="stub package description"
+                HOMEPAGE="{homepage}"
+                SRC_URI="{src_uri}"
+                SLOT=0
+                LICENSE=blank
+            """))
+        with open(os.path.join(pkg_dir, 'metadata.xml'), 'w') as f:
+            f.write(textwrap.dedent(f"""\
+                <?xml version="1.0" encoding="UTF-8"?>
+                <!DOCTYPE pkgmetadata SYSTEM "http://www.gentoo.org/dtd/metadata.dtd">
+                <pkgmetadata>
+                    <upstream>
+                        <doc>{doc}</doc>
+                    </upstream>
+                </pkgmetadata>
+            """))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='benchmark network checks')
+    parser.add_argument('--pkgs', type=int, default=500, help='number of packages to scan')
+    parser.add_argument('--latency', type=float, default=0.05, help='response latency in seconds')
+    parser.add_argument('scan_args', nargs='*', help='extra pkgcheck scan arguments')
+    options = parser.parse_args(args)
+
+    from pkgcheck.scripts import run
+
+    with StandInServer(latency=options.latency) as server, \
+            tempfile.TemporaryDirectory() as tmpdir:
+        repo = os.path.join(tmpdir, 'repo')
+        create_repo(repo, server, options.pkgs)
+        argv = [
+            'pkgcheck', 'scan', '--config', 'no', '--cache', 'no', '--net', '-r', repo,
+            '-c', 'HomepageUrlCheck,FetchablesUrlCheck,MetadataUrlCheck',
+            '-R', 'JsonStream', *options.scan_args,
+        ]
+        env = {'REQUESTS_CA_BUNDLE': server.ca_bundle}
+        start = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, \
+                patch.dict(os.environ, env), patch('sys.argv', argv), \
+                patch('sys.stdout', devnull):
+            try:
+                run('pkgcheck')
+            except SystemExit:
+                pass
+        elapsed = time.perf_counter() - start
+
+    stats = server.stats
+    latencies = stats.latencies
+    print(f'requests: {len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed:.1f}/s)')
+    if len(latencies) > 1:
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(f'latency: p50 {quantiles[49] * 1000:.1f}ms, p99 {quantiles[98] * 1000:.1f}ms')
+    print(f'connections: {stats.connections} opened, {stats.peak} peak concurrent')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
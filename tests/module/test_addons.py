@@ -1,9 +1,14 @@
+import hashlib
+import mmap
 import os
+from types import SimpleNamespace
 from unittest.mock import patch
 
 import pytest
-from pkgcheck import addons
+from pkgcheck import addons, base, sources
+from pkgcheck.packages import FileContent
 from pkgcore.ebuild import repo_objs, repository
+from pkgcore.ebuild.atom import atom
 from pkgcore.restrictions import packages
 from pkgcore.util import commandline
 from snakeoil.cli import arghparse
@@ -418,6 +423,303 @@ class TestProfileAddon(ProfilesMixin):
         assert len(l) == 0, f"checking for profile collapsing: {l!r}"
 
 
+    def test_parallel_resolution(self):
+        self.mk_profiles({
+            'default-linux/x86': ['x86'],
+            'default-linux/ppc': ['ppc'],
+        })
+        options = self.process_check([])
+        options.jobs = 2
+        addon = addons.init_addon(self.addon_kls, options)
+        self.assertProfiles(addon, 'x86', 'default-linux/x86')
+        self.assertProfiles(addon, 'ppc', 'default-linux/ppc')
+
+    def test_scanned_arches(self):
+        self.mk_profiles({
+            'default-linux/x86': ['x86'],
+            'default-linux/ppc': ['ppc'],
+        })
+        options = self.process_check([])
+        options.restrictions = [(base.package_scope, packages.AlwaysTrue)]
+        pkg = FakePkg('cat/pkg-1', data={'KEYWORDS': '~ppc'})
+        profiles = options.target_repo.profiles
+        # profiles are only created and resolved for arches keyworded by targeted packages
+        with patch.object(options.target_repo, 'itermatch', return_value=[pkg]), \
+                patch.object(type(profiles), 'create_profile',
+                             autospec=True, side_effect=type(profiles).create_profile) as create:
+            addon = addons.init_addon(self.addon_kls, options)
+        assert sorted(addon.profile_evaluate_dict) == ['ppc', '~ppc']
+        assert [x.args[1].path for x in create.call_args_list] == ['default-linux/ppc']
+
+
+class TestVisibilityVerdicts:
+
+    def test_lookups(self):
+        verdicts = addons.VisibilityVerdicts()
+        assert verdicts.get(('amd64', 'cat/pkg')) is None
+        verdicts[('amd64', 'cat/pkg')] = verdicts.VISIBLE
+        verdicts[('~amd64', 'cat/pkg')] = verdicts.INSOLUBLE
+        assert verdicts.get(('amd64', 'cat/pkg')) == verdicts.VISIBLE
+        assert verdicts.get(('~amd64', 'cat/pkg')) == verdicts.INSOLUBLE
+
+    def test_full_probe_sequence(self):
+        verdicts = addons.VisibilityVerdicts()
+        with patch.object(verdicts, '_slots', 4), patch.object(verdicts, '_probes', 2):
+            for i in range(10):
+                verdicts[i] = verdicts.VISIBLE
+            # entries are dropped once all slots are used
+            assert sum(verdicts.get(i) is not None for i in range(10)) == 4
+
+    def test_shared_between_processes(self):
+        verdicts = addons.VisibilityVerdicts()
+        pid = os.fork()
+        if pid == 0:
+            verdicts['cat/pkg'] = verdicts.VISIBLE
+            os._exit(0)
+        os.waitpid(pid, 0)
+        assert verdicts.get('cat/pkg') == verdicts.VISIBLE
+
+
+class TestContentAddon:
+
+    def test_shared_content(self, tmp_path):
+        path = str(tmp_path / 'pkg-0.ebuild')
+        with open(path, 'w') as f:
+            f.write('EAPI=7\r\nSLOT="0"\n')
+        addon = addons.ContentAddon(arghparse.Namespace())
+        content = addon.get(path)
+        assert content.lines == ('EAPI=7\n', 'SLOT="0"\n')
+        # file contents are read only once
+        os.unlink(path)
+        assert addon.get(path) is content
+        assert addon.get(path).data == b'EAPI=7\r\nSLOT="0"\n'
+
+    def test_mmap(self, tmp_path):
+        path = str(tmp_path / 'pkg-0.ebuild')
+        with open(path, 'w') as f:
+            f.write('EAPI=7\n' + '# comment\n' * 10)
+        addon = addons.ContentAddon(arghparse.Namespace())
+        with patch.object(FileContent, 'mmap_threshold', 16):
+            content = addon.get(path)
+            # large files are memory-mapped
+            assert isinstance(content.data, mmap.mmap)
+            assert content.data[:7] == b'EAPI=7\n'
+            assert content.lines[0] == 'EAPI=7\n'
+            assert len(content.lines) == 11
+
+    def test_ebuild(self):
+        addon = addons.ContentAddon(arghparse.Namespace())
+        pkg = FakePkg('cat/pkg-0', ebuild='EAPI=7\n')
+        assert addon.ebuild(pkg).lines == ('EAPI=7\n',)
+
+    def test_ebuild_path(self, tmp_path):
+        path = str(tmp_path / 'pkg-0.ebuild')
+        with open(path, 'w') as f:
+            f.write('EAPI=7\n' + '# comment\n' * 10)
+        addon = addons.ContentAddon(arghparse.Namespace())
+        pkg = SimpleNamespace(path=path, ebuild=None)
+        with patch.object(FileContent, 'mmap_threshold', 16):
+            content = addon.ebuild(pkg)
+            # ebuilds existing on disk are read directly, allowing them to be mapped
+            assert isinstance(content.data, mmap.mmap)
+            assert content.lines[-1] == '# comment\n'
+
+    def test_cache_size(self, tmp_path):
+        addon = addons.ContentAddon(arghparse.Namespace())
+        with patch.object(addon, '_cache_size', 2):
+            contents = [addon.get(str(tmp_path / str(i))) for i in range(3)]
+            assert addon.get(str(tmp_path / '2')) is contents[2]
+            assert addon.get(str(tmp_path / '0')) is not contents[0]
+
+
+class TestBashAddon:
+
+    @pytest.fixture(autouse=True)
+    def _setup(self, tool, repo, tmp_path):
+        self.options, _ = tool.parse_args(
+            ['scan', '--repo', repo.location, '--cache-dir', str(tmp_path)])
+        self.addon = addons.BashAddon(self.options)
+
+    def mk_pkg(self, ebuild):
+        pkg = FakePkg('cat/pkg-0', ebuild=ebuild)
+        content = addons.ContentAddon(self.options).ebuild(pkg)
+        return sources._ParsedPkg(pkg, content, self.addon)
+
+    def node_strs(self, pkg, owner):
+        return [
+            (name, self.addon.node_str(pkg, node))
+            for node, name in self.addon.captures(pkg, owner)]
+
+    def test_namespaced_captures(self):
+        self.addon.register_query('a', '(command) @call')
+        self.addon.register_query('b', '(command_name) @call')
+        # re-registering an owner is ignored
+        self.addon.register_query('a', '(variable_name) @call')
+        assert self.addon._queries == {
+            'a': ('_0.', '(command) @_0.call'),
+            'b': ('_1.', '(command_name) @_1.call'),
+        }
+
+    def test_string_literals(self):
+        query = '; @comment\n((command_name) @name (#match? @name "^@foo\\"@bar$"))'
+        self.addon.register_query('a', query)
+        assert self.addon._queries['a'][1] == (
+            '; @comment\n((command_name) @_0.name (#match? @_0.name "^@foo\\"@bar$"))')
+
+    def test_captures(self):
+        self.addon.register_query('a', '(command) @call')
+        self.addon.register_query('b', '(command_name) @call')
+        pkg = self.mk_pkg('foo bar\nbaz\n')
+        # all captures are collected in a single combined query
+        with patch.object(self.addon, 'query', wraps=self.addon.query) as query:
+            assert self.node_strs(pkg, 'a') == [('call', 'foo bar'), ('call', 'baz')]
+            assert self.node_strs(pkg, 'b') == [('call', 'foo'), ('call', 'baz')]
+            assert query.call_count == 1
+        assert self.addon.captures(pkg, 'c') == ()
+
+
+class TestCommandsAddon:
+
+    @pytest.fixture(autouse=True)
+    def _setup(self, tool, repo, tmp_path):
+        self.options, _ = tool.parse_args(
+            ['scan', '--repo', repo.location, '--cache-dir', str(tmp_path)])
+        self.bash = addons.BashAddon(self.options)
+
+    def mk_pkg(self, ebuild):
+        pkg = FakePkg('cat/pkg-0', ebuild=ebuild)
+        content = addons.ContentAddon(self.options).ebuild(pkg)
+        return sources._ParsedPkg(pkg, content, self.bash)
+
+    def mk_addon(self):
+        addon = addons.CommandsAddon(self.options, bash_addon=self.bash)
+        addon.update_cache()
+        return addon
+
+    def test_commands(self):
+        addon = self.mk_addon()
+        pkg = self.mk_pkg('foo bar\nif true; then baz; fi\n')
+        assert addon.get(pkg) == (
+            ('foo', 1, 'foo bar'), ('true', 2, 'true'), ('baz', 2, 'baz'))
+
+    def test_cached(self):
+        pkg = self.mk_pkg('foo bar\n')
+        addon = self.mk_addon()
+        commands = addon.get(pkg)
+        addon.save()
+        # unchanged ebuilds skip parsing
+        addon = self.mk_addon()
+        with patch.object(addon, '_extract') as extract:
+            assert addon.get(pkg) == commands
+            assert not extract.called
+
+    def test_collected(self):
+        pkg = self.mk_pkg('foo bar\n')
+        addon = self.mk_addon()
+        commands = addon.get(pkg)
+        # commands extracted by scanning processes are merged before saving
+        parent = self.mk_addon()
+        parent.update(addon.collect())
+        parent.save()
+        assert self.mk_addon().get(pkg) == commands
+
+    def test_prune(self):
+        addon = self.mk_addon()
+        addon.get(self.mk_pkg('foo\n'))
+        addon.save()
+        addon = self.mk_addon()
+        addon.get(self.mk_pkg('bar\n'))
+        addon.save(prune=True)
+        assert len(self.mk_addon()._commands) == 1
+
+
+class TestRepoIndexAddon:
+
+    @pytest.fixture(autouse=True)
+    def _setup(self, tool, repo):
+        self.tool = tool
+        self.repo = repo
+        self.options, _ = tool.parse_args(['scan', '--repo', repo.location])
+
+    def write_md5_cache(self, cpvstr, **data):
+        category, pf = cpvstr.split('/')
+        package = atom(f'={cpvstr}').package
+        with open(pjoin(self.repo.location, category, package, f'{pf}.ebuild'), 'rb') as f:
+            data['_md5_'] = hashlib.md5(f.read()).hexdigest()
+        cache_dir = pjoin(self.repo.location, 'metadata', 'md5-cache', category)
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(pjoin(cache_dir, pf), 'w') as f:
+            f.write(''.join(f'{k}={v}\n' for k, v in data.items()))
+
+    def test_md5_cache(self):
+        self.repo.create_ebuild('cat/pkg-1')
+        self.repo.create_ebuild('cat/pkg-2')
+        self.write_md5_cache('cat/pkg-1', SLOT='0', KEYWORDS='~amd64', IUSE='+foo')
+        self.write_md5_cache('cat/pkg-2', SLOT='1/2', PROPERTIES='live')
+        addon = addons.RepoIndexAddon(self.options)
+
+        pkgs = addon.match(atom('cat/pkg'))
+        assert [x.cpvstr for x in pkgs] == ['cat/pkg-1', 'cat/pkg-2']
+        assert all(isinstance(x, addons._IndexedPkg) for x in pkgs)
+        assert pkgs[0].keywords == ('~amd64',)
+        assert pkgs[0].iuse_effective == frozenset(['foo'])
+        assert not pkgs[0].live
+        assert (pkgs[1].slot, pkgs[1].subslot) == ('1', '2')
+        assert pkgs[1].live
+
+        assert addon.match(atom('cat/pkg:1')) == [pkgs[1]]
+        assert addon.has_match(atom('=cat/pkg-1'))
+        assert not addon.has_match(atom('=cat/pkg-3'))
+        assert not addon.has_match(atom('cat/nonexistent'))
+
+    def test_outdated_md5_cache(self):
+        self.repo.create_ebuild('cat/pkg-1', keywords=['amd64'])
+        self.write_md5_cache('cat/pkg-1', SLOT='0', KEYWORDS='~amd64')
+        self.repo.create_ebuild('cat/pkg-1', keywords=['x86'])
+        addon = addons.RepoIndexAddon(self.options)
+
+        pkgs = addon.match(atom('cat/pkg'))
+        assert len(pkgs) == 1
+        assert not isinstance(pkgs[0], addons._IndexedPkg)
+        assert pkgs[0].keywords == ('x86',)
+
+    def test_populate(self, tmp_path):
+        self.repo.create_ebuild('cat/pkg-1')
+        self.write_md5_cache('cat/pkg-1', SLOT='0')
+        options, _ = self.tool.parse_args([
+            'scan', '--repo', self.repo.location, '--cache-dir', str(tmp_path),
+            self.repo.location])
+        addon = addons.init_addon(addons.RepoIndexAddon, options)
+        addon.populate()
+        assert 'cat/pkg' in addon._index
+        assert os.path.exists(addon.cache_file(self.repo))
+
+        # validated md5-cache entries are reused by following scans
+        addon = addons.init_addon(addons.RepoIndexAddon, options)
+        addon.populate()
+        assert not addon._updated
+        pkgs = addon.match(atom('cat/pkg'))
+        assert all(isinstance(x, addons._IndexedPkg) for x in pkgs)
+
+        # while changed ebuilds are rehashed
+        self.repo.create_ebuild('cat/pkg-1', keywords=['x86'])
+        self.write_md5_cache('cat/pkg-1', SLOT='0', KEYWORDS='x86')
+        addon = addons.init_addon(addons.RepoIndexAddon, options)
+        addon.populate()
+        assert addon._updated
+        assert addon.match(atom('cat/pkg'))[0].keywords == ('x86',)
+
+    def test_on_demand(self, tmp_path):
+        self.repo.create_ebuild('cat/pkg-1')
+        self.write_md5_cache('cat/pkg-1', SLOT='0')
+        options, _ = self.tool.parse_args([
+            'scan', '--repo', self.repo.location, '--cache-dir', str(tmp_path)])
+        addon = addons.init_addon(addons.RepoIndexAddon, options)
+        # packages are indexed on demand unless populated
+        assert not addon._index
+        assert [x.cpvstr for x in addon.match(atom('cat/pkg'))] == ['cat/pkg-1']
+
+
 class TestUseAddon(ArgparseCheck, Tmpdir):
 
     addon_kls = addons.UseAddon
@@ -466,3 +768,53 @@ class TestNetAddon:
         with patch('pkgcheck.net.Session') as net:
             addon.session
         net.assert_called_once_with(concurrent=50, timeout=10, user_agent='firefox')
+
+
+class TestIncrementalAddon:
+
+    class FooCheck:
+        pass
+
+    class BarCheck:
+        pass
+
+    @pytest.fixture(autouse=True)
+    def _setup(self, tool, tmp_path, repo):
+        args = ['scan', '--cache-dir', str(tmp_path), '--repo', repo.location]
+        self.options, _ = tool.parse_args(args)
+        self.options.incremental = 'origin'
+        self.options.incremental_commit = 'abc123'
+        self.options.incremental_cache = None
+        self.options.incremental_pkgs = None
+
+    def test_disabled(self):
+        self.options.incremental = None
+        addon = addons.IncrementalAddon(self.options)
+        contributions = {'cat/pkg': 1}
+        assert addon.patch(self.FooCheck(), contributions) is contributions
+        addon.save()
+        assert addon.cached() is None
+
+    def test_save(self):
+        addon = addons.IncrementalAddon(self.options)
+        assert addon.patch(self.FooCheck(), {'cat/a': 1, 'cat/b': 1}) == {'cat/a': 1, 'cat/b': 1}
+        assert addon.patch(self.BarCheck(), {'cat/a': 2}) == {'cat/a': 2}
+        # data is only written once all checks are patched
+        assert addon.cached() is None
+        with patch.object(addon, 'save_cache', wraps=addon.save_cache) as save_cache:
+            addon.save()
+            save_cache.assert_called_once()
+        cached = addon.cached()
+        assert dict(cached) == {'FooCheck': {'cat/a': 1, 'cat/b': 1}, 'BarCheck': {'cat/a': 2}}
+        assert cached.commits == {'FooCheck': 'abc123', 'BarCheck': 'abc123'}
+
+        # patching data for changed packages keeps cached data for checks not run
+        self.options.incremental_commit = 'def456'
+        self.options.incremental_cache = cached
+        self.options.incremental_pkgs = frozenset(['cat/a'])
+        addon = addons.IncrementalAddon(self.options)
+        assert addon.patch(self.FooCheck(), {'cat/c': 3}) == {'cat/b': 1, 'cat/c': 3}
+        addon.save()
+        cached = addon.cached()
+        assert dict(cached) == {'FooCheck': {'cat/b': 1, 'cat/c': 3}, 'BarCheck': {'cat/a': 2}}
+        assert cached.commits == {'FooCheck': 'def456', 'BarCheck': 'abc123'}
@@ -40,6 +40,9 @@ class TestCacheNegations:
     def test_defaults(self):
         options = self.parser.parse_args([])
         assert options.cache == dict(argparsers.CacheNegations.caches)
+        # caches that can hide changes outside scanned files must be enabled
+        assert not options.cache['results']
+        assert not options.cache['net']
 
     def test_unknown(self, capsys):
         with pytest.raises(SystemExit) as excinfo:
@@ -77,7 +80,7 @@ class TestCacheNegations:
             if k == cache:
                 assert v is False
             else:
-                assert v is True
+                assert v is argparsers.CacheNegations.caches[k]
 
 
 class TestScopeArgs:
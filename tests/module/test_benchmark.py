@@ -0,0 +1,34 @@
+import glob
+import os
+
+from snakeoil.osutils import pjoin
+
+from .benchmark import create_repo, feed_line_checks, run_scan
+
+
+def test_create_repo(tmp_path):
+    repo = str(tmp_path / 'repo')
+    items = create_repo(repo, categories=2, packages=3, versions=2, profiles=2)
+    assert items == {'version': 12, 'package': 6, 'category': 2, 'repo': 1}
+
+    # returned counts match the generated repo
+    with open(pjoin(repo, 'profiles', 'categories')) as f:
+        assert len(f.read().split()) == items['category']
+    assert len(glob.glob(pjoin(repo, '*', '*', 'metadata.xml'))) == items['package']
+    assert len(glob.glob(pjoin(repo, '*', '*', '*.ebuild'))) == items['version']
+
+
+def test_run_scan(tmp_path):
+    repo = str(tmp_path / 'repo')
+    create_repo(repo, categories=1, packages=2, versions=1, profiles=1)
+    elapsed, rss = run_scan(repo, str(tmp_path / 'cache'), ['-c', 'KeywordsCheck'])
+    assert elapsed > 0
+    assert rss > 0
+    assert os.listdir(tmp_path / 'cache')
+
+
+def test_feed_line_checks(tmp_path):
+    repo = str(tmp_path / 'repo')
+    create_repo(repo, categories=1, packages=2, versions=1, profiles=1)
+    assert feed_line_checks(repo, rounds=1) > 0
+    assert feed_line_checks(repo, shared=False, rounds=1) > 0
@@ -1,8 +1,11 @@
+import multiprocessing
 import os
+import subprocess
 import textwrap
 from unittest.mock import patch
 
 import pytest
+from pkgcheck import eclass as eclass_mod
 from pkgcheck.eclass import Eclass, EclassAddon
 from pkgcore.ebuild.eclass import EclassDocParsingError
 from snakeoil.cli.exceptions import UserException
@@ -109,8 +112,65 @@ class TestEclassAddon:
             self.addon.update_cache()
             save_cache.assert_called_once()
 
+    def test_replaced_cache(self):
+        """Loaded caches are unaffected by other runs replacing the cache file."""
+        for name in ('foo', 'bar'):
+            touch(pjoin(self.eclass_dir, f'{name}.eclass'))
+        self.addon.update_cache()
+        cache = self.addon.load_cache(self.cache_file)
+
+        # replace the cache file with one lacking an entry
+        replaced = self.addon.load_cache(self.cache_file)
+        del replaced['foo']
+        self.addon.save_cache(replaced, self.cache_file)
+
+        assert cache['foo'].path == pjoin(self.eclass_dir, 'foo.eclass')
+        assert 'foo' not in self.addon.load_cache(self.cache_file)
+
+    def test_replaced_cache_forked(self):
+        """Forked processes use their own connections to the loaded cache file."""
+        for name in ('foo', 'bar'):
+            touch(pjoin(self.eclass_dir, f'{name}.eclass'))
+        self.addon.update_cache()
+        cache = self.addon.load_cache(self.cache_file)
+        parent_db = cache.data._connect()
+
+        ctx = multiprocessing.get_context('fork')
+        results = ctx.SimpleQueue()
+
+        def lookup(name):
+            results.put((cache.data._connect() is parent_db, cache[name].path))
+
+        def run(name):
+            p = ctx.Process(target=lookup, args=(name,))
+            p.start()
+            p.join()
+            return results.get()
+
+        assert run('bar') == (False, pjoin(self.eclass_dir, 'bar.eclass'))
+
+        # replace the cache file with one lacking an entry
+        replaced = self.addon.load_cache(self.cache_file)
+        del replaced['foo']
+        self.addon.save_cache(replaced, self.cache_file)
+
+        # entries are pulled from the loaded file, not its replacement
+        assert run('foo') == (False, pjoin(self.eclass_dir, 'foo.eclass'))
+        assert cache['foo'].path == pjoin(self.eclass_dir, 'foo.eclass')
+        # private copies of replaced files aren't left behind
+        assert sorted(os.listdir(os.path.dirname(self.cache_file))) == ['eclass.db']
+
+    def test_legacy_cache_removal(self):
+        legacy_file = pjoin(os.path.dirname(self.cache_file), 'eclass.pickle')
+        os.makedirs(os.path.dirname(legacy_file))
+        touch(legacy_file)
+        touch(pjoin(self.eclass_dir, 'foo.eclass'))
+        self.addon.update_cache()
+        assert os.path.exists(self.cache_file)
+        assert not os.path.exists(legacy_file)
+
     def test_eclass_changes(self):
-        """The cache stores eclass mtimes and regenerates entries if they differ."""
+        """The cache stores eclass content hashes and regenerates entries if they differ."""
         eclass_path = pjoin(self.eclass_dir, 'foo.eclass')
         touch(eclass_path)
         self.addon.update_cache()
@@ -121,12 +181,44 @@ class TestEclassAddon:
             self.addon.update_cache()
             save_cache.assert_called_once()
 
+    def test_eclass_mtime_changes(self):
+        """Eclass entries aren't regenerated when only their mtimes change."""
+        eclass_path = pjoin(self.eclass_dir, 'foo.eclass')
+        touch(eclass_path)
+        self.addon.update_cache()
+        os.utime(eclass_path, (0, 0))
+        with patch('pkgcheck.caches.CachedAddon.save_cache') as save_cache:
+            self.addon.update_cache()
+            save_cache.assert_not_called()
+
+    def test_git_blob_hashes(self):
+        eclass_path = pjoin(self.eclass_dir, 'foo.eclass')
+        with open(eclass_path, 'w') as f:
+            f.write('# eclass\n')
+        assert eclass_mod._git_blob_hashes(self.eclass_dir) == {}
+        subprocess.run(['git', 'init', '-q'], cwd=self.repo.location, check=True)
+        subprocess.run(['git', 'add', 'eclass'], cwd=self.repo.location, check=True)
+        expected = {'foo.eclass': eclass_mod._blob_hash(eclass_path)}
+        assert eclass_mod._git_blob_hashes(self.eclass_dir) == expected
+        # modified eclasses are skipped
+        with open(eclass_path, 'a') as f:
+            f.write('# changed\n')
+        assert eclass_mod._git_blob_hashes(self.eclass_dir) == {}
+
+    def test_parallel_updates(self):
+        names = [f'foo{i}' for i in range(4)]
+        for name in names:
+            touch(pjoin(self.eclass_dir, f'{name}.eclass'))
+        self.addon.options.jobs = 2
+        self.addon.update_cache()
+        assert sorted(self.addon.eclasses) == names
+
     def test_error_loading_cache(self):
         touch(pjoin(self.eclass_dir, 'foo.eclass'))
         self.addon.update_cache()
         assert list(self.addon.eclasses) == ['foo']
 
-        with patch('pkgcheck.caches.pickle.load') as pickle_load:
+        with patch('pkgcheck.caches.pickle.loads') as pickle_load:
             # catastrophic errors are raised
             pickle_load.side_effect = MemoryError('unpickling failed')
             with pytest.raises(MemoryError, match='unpickling failed'):
@@ -141,7 +233,7 @@ class TestEclassAddon:
     def test_error_dumping_cache(self):
         touch(pjoin(self.eclass_dir, 'foo.eclass'))
         # verify IO related dump failures are raised
-        with patch('pkgcheck.caches.pickle.dump') as pickle_dump:
+        with patch('pkgcheck.caches.pickle.dumps') as pickle_dump:
             pickle_dump.side_effect = IOError('unpickling failed')
             with pytest.raises(UserException, match='failed dumping eclass cache'):
                 self.addon.update_cache()
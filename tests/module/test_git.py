@@ -7,7 +7,8 @@ import pytest
 from pkgcore.ebuild.atom import MalformedAtom
 from pkgcore.ebuild.atom import atom as atom_cls
 from pkgcore.restrictions import packages
-from pkgcheck import base, git
+from pkgcheck import base, git, objects
+from pkgcheck.addons import IncrementalAddon, IncrementalCache
 from snakeoil.cli.exceptions import UserException
 from snakeoil.fileutils import touch
 from snakeoil.osutils import pjoin
@@ -107,6 +108,73 @@ class TestPkgcheckScanCommitsParseArgs:
             assert excinfo.value.code == 0
 
 
+class TestPkgcheckScanIncrementalParseArgs:
+
+    @pytest.fixture(autouse=True)
+    def _setup(self, tool, tmp_path):
+        self.tool = tool
+        self.args = ['scan', '--cache-dir', str(tmp_path)]
+
+    def test_incremental_with_targets(self, capsys):
+        with pytest.raises(SystemExit) as excinfo:
+            self.tool.parse_args(self.args + ['--incremental', 'ref', 'dev-util/foo'])
+        assert excinfo.value.code == 2
+        out, err = capsys.readouterr()
+        err = err.strip().split('\n')
+        assert err[-1].startswith(
+            "pkgcheck scan: error: --incremental is mutually exclusive with target: dev-util/foo")
+
+    def test_incremental_without_cache(self):
+        with patch('subprocess.run') as git:
+            git.return_value.stdout = 'abc123\n'
+            options, _func = self.tool.parse_args(self.args + ['--incremental'])
+            assert options.incremental_pkgs is None
+            assert list(options.restrictions) == [(base.repo_scope, packages.AlwaysTrue)]
+
+    def test_incremental_with_cache(self):
+        output = [
+            'dev-libs/foo/metadata.xml\n',
+            'metadata/md5-cache/media-libs/bar-0\n',
+            'eclass/foo.eclass\n',
+        ]
+        checks = {cls.__name__: {} for cls in objects.CHECKS.values()}
+        commits = dict.fromkeys(checks, 'abc123')
+        cache = IncrementalCache(checks, IncrementalAddon.cache, commits=commits)
+        with patch('subprocess.run') as git, \
+                patch('pkgcheck.addons.IncrementalAddon.cached', return_value=cache):
+            git.side_effect = [
+                Mock(stdout='def456\n'), Mock(stdout='abc123\n'), Mock(stdout=''.join(output))]
+            options, _func = self.tool.parse_args(self.args + ['--incremental'])
+            assert options.incremental_pkgs == frozenset(['dev-libs/foo', 'media-libs/bar'])
+            restrictions = list(options.restrictions)
+            atom_restricts = [atom_cls('dev-libs/foo'), atom_cls('media-libs/bar')]
+            assert restrictions[0] == \
+                (base.package_scope, packages.OrRestriction(*atom_restricts))
+            assert restrictions[1][0] == base.eclass_scope
+            assert restrictions[1][1].match(['foo'])
+
+    def test_incremental_repo_data(self):
+        checks = {cls.__name__: {} for cls in objects.CHECKS.values()}
+        commits = dict.fromkeys(checks, 'abc123')
+        cache = IncrementalCache(checks, IncrementalAddon.cache, commits=commits)
+        with patch('subprocess.run') as git, \
+                patch('pkgcheck.addons.IncrementalAddon.cached', return_value=cache):
+            # aggregate checks are run against the cached data for repo-level changes
+            git.side_effect = [
+                Mock(stdout='def456\n'), Mock(stdout='abc123\n'),
+                Mock(stdout='licenses/foo\nprofiles/use.desc\n')]
+            options, _func = self.tool.parse_args(self.args + ['--incremental'])
+            assert options.incremental_pkgs == frozenset()
+            assert list(options.restrictions) == [(base.package_scope, packages.AlwaysFalse)]
+
+            # no relevant changes
+            git.side_effect = [
+                Mock(stdout='def456\n'), Mock(stdout='abc123\n'), Mock(stdout='')]
+            with pytest.raises(SystemExit) as excinfo:
+                self.tool.parse_args(self.args + ['--incremental'])
+            assert excinfo.value.code == 0
+
+
 class TestGitStash:
 
     def test_non_git_repo(self, tmp_path):
@@ -368,6 +436,28 @@ class TestGitChangedRepo:
         removed_repo = git.GitRemovedRepo(data)
         assert len(removed_repo) == 2
 
+    def test_pkg_history_sharded(self, repo, make_git_repo):
+        git_repo = make_git_repo(repo.location, commit=True)
+        for pkg in ('cat/pkg-0', 'cat/pkg-1', 'cat/pkg-2', 'cat2/pkg-0'):
+            repo.create_ebuild(pkg)
+            git_repo.add_all(pkg)
+        git_repo.remove('cat/pkg/pkg-0.ebuild')
+        git_repo.move('cat2', 'cat3')
+        commit = git_repo.HEAD
+        repo.create_ebuild('cat/pkg-3')
+        git_repo.add_all('cat/pkg-3')
+
+        for commit_range in ('HEAD', f'{commit}..HEAD'):
+            serial = git.GitAddon.pkg_history(git_repo.path, commit_range)
+            with patch('pkgcheck.git.GitAddon._min_shard_size', 1):
+                shards = git.GitAddon._commit_shards(git_repo.path, commit_range, 4)
+                sharded = git.GitAddon.pkg_history(git_repo.path, commit_range, jobs=2)
+            if commit_range == 'HEAD':
+                assert len(shards) > 1
+            else:
+                assert shards == [commit_range]
+            assert sharded == serial
+
 
 class TestGitAddon:
 
@@ -523,7 +613,7 @@ class TestGitAddon:
         self.addon.update_cache()
         assert atom_cls('=cat/pkg-0') in self.addon.cached_repo(git.GitAddedRepo)
 
-        with patch('pkgcheck.caches.pickle.load') as pickle_load:
+        with patch('pkgcheck.caches.pickle.loads') as pickle_load:
             # catastrophic errors are raised
             pickle_load.side_effect = MemoryError('unpickling failed')
             with pytest.raises(MemoryError, match='unpickling failed'):
@@ -547,7 +637,7 @@ class TestGitAddon:
         child_repo.run(['git', 'remote', 'set-head', 'origin', 'master'])
 
         # verify IO related dump failures are raised
-        with patch('pkgcheck.caches.pickle.dump') as pickle_dump:
+        with patch('pkgcheck.caches.pickle.dumps') as pickle_dump:
             pickle_dump.side_effect = IOError('unpickling failed')
             with pytest.raises(UserException, match='failed dumping git cache'):
                 self.addon.update_cache()
@@ -0,0 +1,192 @@
+import pickle
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+from pkgcheck import base
+from pkgcheck.checks import metadata
+from pkgcheck.pipeline import (
+    CheckProfile, Pipeline, ResultsCodec, ScanMetrics, SpooledResults, TaskExecutor)
+from pkgcheck.results import LogWarning
+
+from .misc import FakePkg
+
+
+class TestSpooledResults:
+
+    def test_in_memory(self):
+        results = SpooledResults(10)
+        for x in (3, 1, 2):
+            results.append(x)
+        assert not results._runs
+        assert list(results) == [1, 2, 3]
+
+    def test_spilled(self):
+        values = list(range(100))
+        random.shuffle(values)
+        results = SpooledResults(15)
+        for x in values:
+            results.append(x)
+        assert len(results._runs) == 6
+        assert list(results) == sorted(values)
+        # run files are consumed when iterated over
+        assert list(results) == []
+
+
+class TestTaskExecutor:
+
+    def test_key_limits(self):
+        lock = threading.Lock()
+        running = {'a': 0, 'b': 0}
+        max_running = dict(running)
+
+        def task(key):
+            with lock:
+                running[key] += 1
+                max_running[key] = max(max_running[key], running[key])
+            time.sleep(0.01)
+            with lock:
+                running[key] -= 1
+            return key
+
+        with TaskExecutor(8, 2) as executor:
+            futures = [executor.submit(task, k, key=k) for k in 'ab' * 6]
+        assert [f.result() for f in futures] == list('ab' * 6)
+        assert max_running == {'a': 2, 'b': 2}
+
+    def test_deferred(self):
+        event = threading.Event()
+        with TaskExecutor(2) as executor:
+            first = executor.submit(event.wait)
+            # deferred tasks don't occupy a thread while waiting
+            second = executor.submit(lambda: first.done(), after=first)
+            third = executor.submit(event.set)
+        assert first.result() and second.result() and third.result() is None
+
+    def test_exceptions(self):
+        with TaskExecutor(1, 1) as executor:
+            failed = executor.submit(lambda: 1 / 0, key='a')
+            future = executor.submit(lambda: 1, key='a', after=failed)
+        assert isinstance(failed.exception(), ZeroDivisionError)
+        assert future.result() == 1
+
+
+class TestCheckProfile:
+
+    def test_merge(self):
+        profile = CheckProfile()
+        profile.add('Check', 'Source', items=1, results=2, feed=0.5)
+        profile.add('Check', 'Source', items=1, feed=0.25)
+        other = pickle.loads(pickle.dumps(profile))
+        other.add(None, 'Source', items=2, errors=1, feed=1.0)
+        profile.merge(other)
+        assert profile.stats() == [
+            {'check': 'Check', 'source': 'Source', 'items': 4, 'results': 4,
+             'errors': 0, 'start': 0, 'feed': 1.5, 'finish': 0, 'total': 1.5},
+            {'check': None, 'source': 'Source', 'items': 2, 'results': 0,
+             'errors': 1, 'start': 0, 'feed': 1.0, 'finish': 0, 'total': 1.0},
+        ]
+
+    def test_empty(self):
+        profile = CheckProfile()
+        assert not profile
+        assert not pickle.loads(pickle.dumps(profile))
+        profile.add('Check', 'Source', items=1)
+        assert profile
+
+
+class TestScanMetrics:
+
+    def test_progress(self, tmp_path):
+        path = str(tmp_path / 'metrics.prom')
+        with ScanMetrics(2, path=path) as metrics:
+            metrics.queued('package', 3)
+            metrics.queued('repo')
+            for _ in range(2):
+                metrics.task_started()
+                metrics.task_done('package', 0.5)
+            metrics.task_started()
+            metrics.result(LogWarning(msg='warning'))
+            stats = metrics.stats()
+            assert stats['queued']['package'] == 3
+            assert stats['completed']['package'] == 2
+            assert stats['active'] == 1
+            assert stats['busy_time'] == 1.0
+            assert stats['results']['warning'] == 1
+            assert stats['eta'] is not None
+            status = metrics.status(stats)
+            assert 'repo 0/1, package 2/3' in status
+            assert 'results: 1 (0 errors)' in status
+            assert 'workers: 1/2 busy' in status
+
+        with open(path) as f:
+            data = f.read()
+        lines = data.splitlines()
+        assert 'pkgcheck_scan_items_queued{scope="package"} 3' in lines
+        assert 'pkgcheck_scan_items_completed_total{scope="package"} 2' in lines
+        assert 'pkgcheck_scan_results_total{level="warning"} 1' in lines
+        assert 'pkgcheck_scan_results_total{level="error"} 0' in lines
+        assert 'pkgcheck_scan_eta_seconds 0.000' in lines
+        assert 'pkgcheck_scan_finished 1' in lines
+        assert lines[-1] == '# EOF'
+
+
+class TestResultsCodec:
+
+    def test_roundtrip(self):
+        pkg = FakePkg('dev-util/diffball-0.5')
+        results = [
+            metadata.InvalidSlot('slot', 'bad', pkg=pkg),
+            metadata.MissingLicense(pkg=pkg),
+            LogWarning('msg'),
+        ]
+        codec = ResultsCodec([metadata.InvalidSlot, metadata.MissingLicense])
+        encoded = pickle.loads(pickle.dumps(codec.encode(results)))
+        assert isinstance(encoded[0], tuple)
+        # unregistered result classes are passed through as is
+        assert isinstance(encoded[2], LogWarning)
+        assert list(codec.decode(encoded)) == results
+
+    def test_keywords(self):
+        pkg = FakePkg('dev-util/diffball-0.5')
+        results = [
+            metadata.InvalidSlot('slot', 'bad', pkg=pkg),
+            metadata.MissingLicense(pkg=pkg),
+        ]
+        codec = ResultsCodec([metadata.InvalidSlot, metadata.MissingLicense])
+        encoded = codec.encode(results)
+        assert list(codec.decode(encoded, {metadata.MissingLicense})) == results[1:]
+
+
+def test_pickled_scopes():
+    # scopes passed through the work queue keep their identity
+    for scope in base.scopes.values():
+        assert pickle.loads(pickle.dumps(scope)) is scope
+
+
+class TestChunkTasks:
+
+    def chunks(self, tasks, costs=None, jobs=2):
+        pipeline = Pipeline.__new__(Pipeline)
+        pipeline.options = SimpleNamespace(jobs=jobs)
+        pipeline._costs = costs
+        return list(pipeline._chunk_tasks(tasks))
+
+    def test_guided(self):
+        chunks = self.chunks(list(range(1000)))
+        assert sorted(x for chunk in chunks for x in chunk) == list(range(1000))
+        sizes = list(map(len, chunks))
+        # chunk sizes shrink towards the tail of the queue
+        assert sizes == sorted(sizes, reverse=True)
+        assert sizes[0] == Pipeline._max_chunk_size
+        assert sizes[-1] == 1
+
+    def test_costs(self):
+        costs = {x: 1 for x in range(100)}
+        costs.update({0: 1000, 1: 500})
+        chunks = self.chunks(list(range(100)) + [100], costs)
+        # expensive packages are queued first in separate chunks
+        assert chunks[:2] == [(0,), (1,)]
+        # unknown packages use the median cost
+        assert 100 in (x for chunk in chunks[2:] for x in chunk)
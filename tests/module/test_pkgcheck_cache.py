@@ -36,6 +36,17 @@ class TestPkgcheckCacheParseArgs:
             with pytest.raises(argparse.ArgumentError):
                 self.tool.parse_args(self.args + ['--debug'])
 
+    def test_scan_options(self, capsys):
+        """Network options only used by scans aren't supported."""
+        options, _ = self.tool.parse_args(self.args + ['-t', 'net'])
+        assert options.cache['net']
+        for opt in ('--timeout', '--url-ttl'):
+            with pytest.raises(SystemExit) as excinfo:
+                self.tool.parse_args(self.args + [opt, '1'])
+            assert excinfo.value.code == 2
+            out, err = capsys.readouterr()
+            assert f'unrecognized arguments: {opt} 1' in err
+
 
 class TestPkgcheckCache:
 
@@ -101,6 +112,39 @@ class TestPkgcheckCache:
             assert (out, err) == ('', '')
             assert excinfo.value.code == 0
 
+    def test_legacy_cache_removal(self, capsys):
+        legacy_file = os.path.join(self.cache_dir, 'repos', 'standalone', 'profiles.pickle')
+        os.makedirs(os.path.dirname(legacy_file))
+        with open(legacy_file, 'wb'):
+            pass
+
+        # verify pickled caches from older releases show up
+        with patch('sys.argv', self.args):
+            with pytest.raises(SystemExit) as excinfo:
+                self.script()
+            out, err = capsys.readouterr()
+            assert not err
+            assert out.strip().splitlines()[-1] == 'standalone'
+            assert excinfo.value.code == 0
+
+        # and are removed
+        with patch('sys.argv', self.args + ['-r', '-t', 'profiles']):
+            with pytest.raises(SystemExit):
+                self.script()
+        assert not os.path.exists(legacy_file)
+
+    def test_default_removal(self):
+        # caches disabled by default for scans are removed by default
+        cache_file = os.path.join(self.cache_dir, 'repos', 'standalone', 'results.db')
+        os.makedirs(os.path.dirname(cache_file))
+        with open(cache_file, 'wb'):
+            pass
+        with patch('sys.argv', self.args + ['-r']):
+            with pytest.raises(SystemExit) as excinfo:
+                self.script()
+            assert excinfo.value.code == 0
+        assert not os.path.exists(cache_file)
+
     def test_cache_forced_removal(self, capsys):
         # force standalone repo profiles cache regen
         with patch('sys.argv', self.args + ['-uf']):
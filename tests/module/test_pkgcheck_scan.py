@@ -1,12 +1,15 @@
 import argparse
 import io
+import json
 import os
 import shlex
 import shutil
+import sqlite3
 import subprocess
 import tempfile
 import textwrap
 from collections import defaultdict
+from contextlib import closing
 from functools import partial
 from io import StringIO
 from operator import attrgetter
@@ -475,6 +478,244 @@ class TestPkgcheckScan:
                     self.script()
                 assert excinfo.value.code == 0
 
+    def test_results_cache(self, make_repo):
+        repo = make_repo(arches=['amd64'])
+        repo.create_ebuild('cat/pkg-0', keywords=['unknown'])
+        repo.create_ebuild('cat/pkg2-1', keywords=['amd64'])
+        args = ['-r', repo.location, '--cache', 'results', '--exit', 'UnknownKeywords']
+
+        # initial scan populates the cache
+        with patch('sys.argv', self.args + args):
+            with pytest.raises(SystemExit) as excinfo:
+                self.script()
+            assert excinfo.value.code == 1
+        cache_file = pjoin(self.cache_dir, 'repos', 'fake', 'results.db')
+        assert os.path.exists(cache_file)
+
+        # cached results are replayed for unchanged packages
+        mtime = os.stat(cache_file).st_mtime_ns
+        with patch('sys.argv', self.args + args):
+            with pytest.raises(SystemExit) as excinfo:
+                self.script()
+            assert excinfo.value.code == 1
+        assert os.stat(cache_file).st_mtime_ns == mtime
+
+        # touching repo-wide files doesn't invalidate cached results
+        os.utime(pjoin(repo.location, 'profiles', 'arch.list'), (0, 0))
+        with patch('sys.argv', self.args + args):
+            with pytest.raises(SystemExit) as excinfo:
+                self.script()
+            assert excinfo.value.code == 1
+        assert os.stat(cache_file).st_mtime_ns == mtime
+
+        # and regenerated for modified packages
+        repo.create_ebuild('cat/pkg-0', keywords=['amd64'])
+        with patch('sys.argv', self.args + args):
+            with pytest.raises(SystemExit) as excinfo:
+                self.script()
+            assert excinfo.value.code == 0
+
+    def test_results_cache_commands(self, make_repo):
+        repo = make_repo(arches=['amd64'])
+        repo.create_ebuild('cat/pkg-0', keywords=['amd64'], data='src_install() { dobin foo; }')
+        repo.create_ebuild('cat/pkg2-1', keywords=['amd64'], data='src_install() { dobin bar; }')
+        args = ['-r', repo.location, '--cache', 'results,commands']
+        cache_file = pjoin(self.cache_dir, 'repos', 'fake', 'commands.db')
+
+        def commands_keys():
+            with closing(sqlite3.connect(cache_file)) as db:
+                return {k for (k,) in db.execute('SELECT key FROM data')}
+
+        with patch('sys.argv', self.args + args):
+            with pytest.raises(SystemExit) as excinfo:
+                self.script()
+            assert excinfo.value.code == 0
+        keys = commands_keys()
+        assert len(keys) == 2
+
+        # commands of ebuilds with replayed results aren't pruned
+        repo.create_ebuild('cat/pkg2-1', keywords=['amd64'], data='src_install() { dobin baz; }')
+        with patch('sys.argv', self.args + args):
+            with pytest.raises(SystemExit) as excinfo:
+                self.script()
+            assert excinfo.value.code == 0
+        updated_keys = commands_keys()
+        assert len(updated_keys) == 2
+        assert len(keys & updated_keys) == 1
+
+    def test_results_cache_eclasses(self, make_repo):
+        repo = make_repo(arches=['amd64'])
+        eclass_path = pjoin(repo.location, 'eclass', 'foo.eclass')
+        with open(eclass_path, 'w') as f:
+            f.write('# stub eclass\n')
+        repo.create_ebuild('cat/pkg-0', keywords=['amd64'], data='inherit foo')
+        args = ['-r', repo.location, '--cache', 'results,eclass']
+
+        with patch('sys.argv', self.args + args):
+            with pytest.raises(SystemExit) as excinfo:
+                self.script()
+            assert excinfo.value.code == 0
+        cache_file = pjoin(self.cache_dir, 'repos', 'fake', 'results.db')
+        mtime = os.stat(cache_file).st_mtime_ns
+
+        # eclass mtime changes don't invalidate cached results
+        os.utime(eclass_path, (0, 0))
+        with patch('sys.argv', self.args + args):
+            with pytest.raises(SystemExit):
+                self.script()
+        assert os.stat(cache_file).st_mtime_ns == mtime
+
+        # while content changes regenerate them for inheriting packages
+        with open(eclass_path, 'w') as f:
+            f.write('# modified stub eclass\n')
+        with patch('sys.argv', self.args + args):
+            with pytest.raises(SystemExit):
+                self.script()
+        assert os.stat(cache_file).st_mtime_ns != mtime
+
+    def test_costs_cache(self, make_repo):
+        repo = make_repo(arches=['amd64'])
+        repo.create_ebuild('cat/pkg-0', keywords=['unknown'])
+        repo.create_ebuild('cat/pkg2-1', keywords=['amd64'])
+        args = ['-r', repo.location, '--cache', 'costs', '--exit', 'UnknownKeywords']
+
+        # package scanning costs are stored after repo scans
+        for _ in range(2):
+            with patch('sys.argv', self.args + args):
+                with pytest.raises(SystemExit) as excinfo:
+                    self.script()
+                assert excinfo.value.code == 1
+        cache_file = pjoin(self.cache_dir, 'repos', 'fake', 'costs.db')
+        assert os.path.exists(cache_file)
+
+    def test_profile_checks(self, capsys, make_repo):
+        repo = make_repo(arches=['amd64'])
+        repo.create_ebuild('cat/pkg-0', keywords=['unknown'])
+        repo.create_ebuild('cat/pkg-1', keywords=['amd64'])
+        repo.create_ebuild('cat/pkg2-1', keywords=['amd64'])
+        args = ['-r', repo.location, '-c', 'KeywordsCheck', '-R', 'JsonStream']
+
+        with patch('sys.argv', self.args + args + ['--profile-checks', '--profile-checks-format', 'json']):
+            with pytest.raises(SystemExit) as excinfo:
+                self.script()
+            assert excinfo.value.code == 0
+        out, err = capsys.readouterr()
+        stats = {(x['check'], x['source']): x for x in json.loads(err)}
+        check = stats[('KeywordsCheck', 'RepoSource')]
+        assert check['items'] == 3
+        assert check['results'] == len(out.splitlines()) == 1
+        assert check['errors'] == 0
+        assert check['feed'] > 0
+        assert stats[(None, 'RepoSource')]['items'] == 3
+
+        # stats are output in a table by default and targets aren't consumed
+        with patch('sys.argv', self.args + args + ['--profile-checks', 'cat/pkg']):
+            with pytest.raises(SystemExit) as excinfo:
+                self.script()
+            assert excinfo.value.code == 0
+        out, err = capsys.readouterr()
+        header, *rows = err.splitlines()
+        assert header.split() == [
+            'check', 'source', 'items', 'results', 'errors',
+            'start', 'feed', 'finish', 'total']
+        assert any(row.split()[:2] == ['KeywordsCheck', 'RepoSource'] for row in rows)
+        assert len(out.splitlines()) == 1
+
+    def test_trace(self, tmp_path, make_repo):
+        repo = make_repo(arches=['amd64'])
+        repo.create_ebuild('cat/pkg-0', keywords=['unknown'])
+        repo.create_ebuild('cat/pkg2-1', keywords=['amd64'])
+        trace = str(tmp_path / 'trace.json')
+        args = ['-r', repo.location, '-j', '2', '--trace', trace]
+
+        with patch('sys.argv', self.args + args):
+            with pytest.raises(SystemExit) as excinfo:
+                self.script()
+            assert excinfo.value.code == 0
+        with open(trace) as f:
+            events = json.load(f)['traceEvents']
+        processes = {x['pid']: x['args']['name'] for x in events if x['ph'] == 'M'}
+        assert sorted(processes.values()) == [
+            'main process', 'pipeline process', 'scanning process', 'scanning process']
+        spans = defaultdict(set)
+        for x in events:
+            if x['ph'] == 'X':
+                spans[processes[x['pid']]].add(x['name'])
+        assert {'initialize checks', 'update profiles cache', 'sort results'} <= spans['main process']
+        assert {'queue tasks', 'wait for scanning processes'} <= spans['pipeline process']
+        assert {'wait for tasks', 'scan package', 'scan repo'} <= spans['scanning process']
+
+    def test_metrics_file(self, tmp_path, make_repo):
+        repo = make_repo(arches=['amd64'])
+        repo.create_ebuild('cat/pkg-0', keywords=['unknown'])
+        repo.create_ebuild('cat/pkg2-1', keywords=['amd64'])
+        path = str(tmp_path / 'metrics.prom')
+        args = ['-r', repo.location, '-c', 'KeywordsCheck', '--metrics-file', path]
+
+        with patch('sys.argv', self.args + args):
+            with pytest.raises(SystemExit) as excinfo:
+                self.script()
+            assert excinfo.value.code == 0
+        with open(path) as f:
+            lines = f.read().splitlines()
+        assert 'pkgcheck_scan_items_queued{scope="package"} 2' in lines
+        assert 'pkgcheck_scan_items_completed_total{scope="package"} 2' in lines
+        assert 'pkgcheck_scan_results_total{level="error"} 1' in lines
+        assert 'pkgcheck_scan_workers_busy 0' in lines
+        assert 'pkgcheck_scan_finished 1' in lines
+        assert lines[-1] == '# EOF'
+
+    def test_sharded_checks(self, capsys, tmp_path, make_repo):
+        repo = make_repo(arches=['amd64'])
+        repo.create_ebuild('cat/pkg-0', license='lic1')
+        repo.create_ebuild('cat2/pkg-0', license='lic2')
+        touch(pjoin(repo.location, 'licenses', 'unused'))
+        path = str(tmp_path / 'metrics.prom')
+        args = [
+            '-r', repo.location, '-j', '2', '-c', 'UnusedLicensesCheck',
+            '-R', 'JsonStream', '--metrics-file', path]
+
+        with patch('sys.argv', self.args + args):
+            with pytest.raises(SystemExit) as excinfo:
+                self.script()
+            assert excinfo.value.code == 0
+        out, err = capsys.readouterr()
+        assert not err
+        # results are generated from the merged state of all categories
+        results = list(reporters.JsonStream.from_iter(io.StringIO(out)))
+        assert len(results) == 1
+        assert results[0].licenses == ('unused',)
+        # the check is run separately against each category
+        with open(path) as f:
+            lines = f.read().splitlines()
+        assert 'pkgcheck_scan_items_completed_total{scope="repo"} 2' in lines
+
+    def test_split_checks(self, capsys, tmp_path, make_repo):
+        repo = make_repo(arches=['amd64'])
+        repo.create_ebuild('cat/pkg-0')
+        os.makedirs(pjoin(repo.location, 'profiles', 'default'))
+        with open(pjoin(repo.location, 'profiles', 'default', 'package.mask'), 'w') as f:
+            f.write('cat/unknown\n')
+        path = str(tmp_path / 'metrics.prom')
+        args = [
+            '-r', repo.location, '-j', '2', '-c', 'ProfilesCheck',
+            '-R', 'JsonStream', '--metrics-file', path]
+
+        with patch('sys.argv', self.args + args):
+            with pytest.raises(SystemExit) as excinfo:
+                self.script()
+            assert excinfo.value.code == 0
+        out, err = capsys.readouterr()
+        assert not err
+        results = list(reporters.JsonStream.from_iter(io.StringIO(out)))
+        assert len(results) == 1
+        assert results[0].path == 'default/package.mask'
+        assert results[0].packages == ('cat/unknown',)
+        # each profile directory is scanned as a separate subtask
+        with open(path) as f:
+            lines = f.read().splitlines()
+        assert 'pkgcheck_scan_items_completed_total{scope="profiles"} 2' in lines
+
     def test_explict_skip_check(self, capsys):
         """SkipCheck exceptions are raised when triggered for explicitly enabled checks."""
         with patch('sys.argv', self.args + ['-c', 'net']):
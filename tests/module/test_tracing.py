@@ -0,0 +1,62 @@
+import json
+import multiprocessing
+import os
+
+from pkgcheck.tracing import Tracer, get_tracer
+from snakeoil.cli import arghparse
+
+
+class TestTracer:
+
+    def test_disabled(self):
+        tracer = Tracer()
+        assert not tracer
+        tracer.name_process('main')
+        with tracer.span('span'):
+            pass
+        assert tracer.events == []
+        # options without a tracer get a disabled one
+        assert not get_tracer(arghparse.Namespace())
+
+    def test_spans(self, tmp_path):
+        path = str(tmp_path / 'trace.json')
+        tracer = Tracer(path)
+        tracer.name_process('main')
+        with tracer.span('outer', target=('cat', 'pkg'), count=1):
+            with tracer.span('inner'):
+                pass
+        tracer.write()
+
+        with open(path) as f:
+            events = json.load(f)['traceEvents']
+        assert [x['name'] for x in events] == ['process_name', 'inner', 'outer']
+        assert {x['pid'] for x in events} == {os.getpid()}
+        inner, outer = events[1:]
+        assert outer['ph'] == inner['ph'] == 'X'
+        assert outer['ts'] <= inner['ts']
+        assert outer['ts'] + outer['dur'] >= inner['ts'] + inner['dur']
+        # non-primitive arguments are converted to strings
+        assert outer['args'] == {'target': "('cat', 'pkg')", 'count': 1}
+
+    def test_forked(self, tmp_path):
+        tracer = Tracer(str(tmp_path / 'trace.json'))
+        with tracer.span('parent'):
+            pass
+
+        def child(q):
+            with tracer.span('child'):
+                pass
+            q.put(tracer)
+
+        ctx = multiprocessing.get_context('fork')
+        q = ctx.SimpleQueue()
+        p = ctx.Process(target=child, args=(q,))
+        p.start()
+        child_tracer = q.get()
+        p.join()
+
+        # events inherited from the parent are dropped by forked processes
+        assert [x['name'] for x in child_tracer.events] == ['child']
+        tracer.merge(child_tracer)
+        assert [(x['name'], x['pid']) for x in tracer.events] == [
+            ('parent', os.getpid()), ('child', p.pid)]